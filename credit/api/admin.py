@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Profile, Beneficiary, LoanHistory, ConsumptionData,
-    AIScoreLog, BeneficiaryDocument, LoanApplication
+    AIScoreLog, BeneficiaryDocument, LoanApplication, ImportJob, RescoreRun, Scorecard, ScoreExplanation
 )
 from django.contrib import admin
 from .models import (
@@ -44,9 +44,16 @@ class ConsumptionDataAdmin(admin.ModelAdmin):
 @admin.register(AIScoreLog)
 class AIScoreLogAdmin(admin.ModelAdmin):
     list_display = ("beneficiary", "score", "model_used", "created_at")
+    list_select_related = ("beneficiary", "reason")
     readonly_fields = ("created_at",)
 
 
+@admin.register(ScoreExplanation)
+class ScoreExplanationAdmin(admin.ModelAdmin):
+    list_display = ("model_used", "text")
+    readonly_fields = ("digest",)
+
+
 @admin.register(BeneficiaryDocument)
 class BeneficiaryDocumentAdmin(admin.ModelAdmin):
     list_display = ("beneficiary", "doc_type", "document_number", "uploaded_at")
@@ -61,6 +68,24 @@ class LoanApplicationAdmin(admin.ModelAdmin):
     search_fields = ("beneficiary__name", "beneficiary__user__username", "email", "phone")
 
 
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "officer", "status", "rows_done", "rows_failed", "created_at", "finished_at")
+    list_filter = ("status",)
+
+
+@admin.register(RescoreRun)
+class RescoreRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "last_id", "rows_scored", "rows_changed", "created_at", "finished_at")
+    list_filter = ("status",)
+
+
+@admin.register(Scorecard)
+class ScorecardAdmin(admin.ModelAdmin):
+    list_display = ("name", "version", "is_active", "created_at")
+    list_filter = ("name", "is_active")
+
+
 @admin.register(CaseDetails)
 class CaseDetailsAdmin(admin.ModelAdmin):
     list_display = (
@@ -0,0 +1,285 @@
+"""
+Officer dashboard figures.
+
+live_stats() computes every number on the dashboard from a single
+aggregate query: plain and conditional counts, the model_score sum and
+count behind the average, and the score histogram as one filtered COUNT
+per bucket. No beneficiary rows are loaded into Python.
+
+The dashboard itself reads DashboardRollup, the same measures
+pre-aggregated per (state, district, pincode, officer) slice, so a page
+load sums rollup rows instead of scanning the portfolio. Every code path
+that changes a beneficiary's score, band, eligibility or slice, or one of
+its loan applications, marks the affected slices stale (mark_stale(),
+mark_slices_stale()); stale slices are recomputed from Beneficiary and
+LoanApplication, and only those, on the next read. rebuild_rollups() (the
+`rebuild_rollups` command) recomputes them all.
+
+region_stats() drills down the same rows: per state, per district of a
+state, per pincode of a district. Each level is one grouped query over a
+prefix of the rollup table's unique (state, district, pincode, officer_id)
+index.
+"""
+import functools
+import operator
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Beneficiary, DashboardRollup, LoanApplication
+
+
+# (low, high) score buckets; the top one includes its upper edge
+SCORE_BUCKETS = [(300, 400), (400, 500), (500, 600), (600, 700), (700, 800), (800, 900)]
+BUCKET_FIELDS = [f"bucket_{i}" for i in range(len(SCORE_BUCKETS))]
+BENEFICIARY_MEASURES = ["total", "scored", "score_sum", "high_risk", "low_risk", "eligible"] + BUCKET_FIELDS
+MEASURES = BENEFICIARY_MEASURES + ["pending_loans"]
+SLICE_FIELDS = ("state", "district", "pincode", "officer_id")
+SLICE_EMPTY = ("", "", "", 0)  # what NULL is stored as in a rollup key
+REGION_LEVELS = ("state", "district", "pincode")
+# Beneficiary columns that decide a row's contribution to its slice
+DASHBOARD_INPUTS = SLICE_FIELDS + ("score", "model_score", "risk_band", "eligibility")
+
+REFRESH_BATCH = 200  # stale slices recomputed per query
+
+
+def bucket_aggregates(field="score"):
+    """{bucket field: filtered COUNT} of `field` over SCORE_BUCKETS."""
+    aggregates = {}
+    last = len(SCORE_BUCKETS) - 1
+    for i, (low, high) in enumerate(SCORE_BUCKETS):
+        upper = Q(**{f"{field}__lte": high}) if i == last else Q(**{f"{field}__lt": high})
+        aggregates[BUCKET_FIELDS[i]] = Count("pk", filter=Q(**{f"{field}__gte": low}) & upper)
+    return aggregates
+
+
+def stats_aggregates():
+    """{measure: aggregate expression} over Beneficiary rows."""
+    scored = Q(score__isnull=False)
+    return {
+        "total": Count("pk"),
+        "scored": Count("model_score", filter=scored),
+        "score_sum": Sum("model_score", filter=scored),
+        "high_risk": Count("pk", filter=Q(risk_band="High Risk")),
+        "low_risk": Count("pk", filter=Q(risk_band="Low Risk")),
+        "eligible": Count("pk", filter=Q(eligibility="Eligible")),
+        **bucket_aggregates(),
+    }
+
+
+def _finish(stats):
+    stats = {name: stats[name] or 0 for name in MEASURES}
+    stats["avg_score"] = stats["score_sum"] / stats["scored"] if stats["scored"] else None
+    stats["eligibility_rate"] = stats["eligible"] / stats["total"] if stats["total"] else None
+    return stats
+
+
+def score_distribution(stats):
+    """The histogram of a stats dict, as the dashboard template lists it."""
+    return [
+        {"range": f"{low}-{high}", "count": stats[name]}
+        for (low, high), name in zip(SCORE_BUCKETS, BUCKET_FIELDS)
+    ]
+
+
+def live_stats(queryset=None):
+    """
+    Dashboard figures straight from Beneficiary (all rows by default): one
+    aggregate query, plus one count of their pending loan applications.
+    """
+    if queryset is None:
+        queryset = Beneficiary.objects.all()
+    stats = queryset.aggregate(**stats_aggregates())
+    stats["pending_loans"] = LoanApplication.objects.filter(
+        status=LoanApplication.STATUS_PENDING, beneficiary__in=queryset.values("pk"),
+    ).count()
+    return _finish(stats)
+
+
+# --- Rollup maintenance ----------------------------------------------------
+
+def slice_key(*values):
+    return tuple(value or empty for value, empty in zip(values, SLICE_EMPTY))
+
+
+def slice_of(beneficiary):
+    """The slice key of a Beneficiary instance."""
+    return slice_key(*(getattr(beneficiary, name) for name in SLICE_FIELDS))
+
+
+def _slice_q(key, prefix=""):
+    # Beneficiary rows of one slice; "" and 0 stand for NULL as well
+    q = Q()
+    for name, value, empty in zip(SLICE_FIELDS, key, SLICE_EMPTY):
+        name = prefix + name
+        if value == empty:
+            q &= Q(**{f"{name}__isnull": True}) | Q(**{name: empty})
+        else:
+            q &= Q(**{name: value})
+    return q
+
+
+def _beneficiary_slice_q(key):
+    return _slice_q(key, prefix="beneficiary__")
+
+
+def _any(keys, to_q):
+    return functools.reduce(operator.or_, (to_q(key) for key in keys))
+
+
+def _rollup_q(key):
+    return Q(**dict(zip(SLICE_FIELDS, key)))
+
+
+def mark_slices_stale(keys):
+    """
+    Flag the rollup rows of `keys` ((state, district, pincode, officer_id)
+    tuples, in SLICE_FIELDS order) for recomputing.
+    """
+    keys = {slice_key(*key) for key in keys}
+    if not keys:
+        return
+    now = timezone.now()
+    DashboardRollup.objects.bulk_create(
+        [
+            DashboardRollup(**dict(zip(SLICE_FIELDS, key)), stale=True, marked_at=now)
+            for key in keys
+        ],
+        update_conflicts=True,
+        unique_fields=list(SLICE_FIELDS),
+        update_fields=["stale", "marked_at"],
+    )
+
+
+def mark_stale(queryset):
+    """Flag the slices the beneficiaries of `queryset` currently belong to."""
+    mark_slices_stale(queryset.values_list(*SLICE_FIELDS).distinct())
+
+
+def _grouped(queryset, prefix, aggregates):
+    # (slice key, row) per slice of `queryset`, NULL keys folded into ""/0
+    keys = [f"slice_{name}" for name in SLICE_FIELDS]
+    rows = (
+        queryset.order_by()
+        .annotate(**{
+            key: Coalesce(prefix + name, Value(empty))
+            for key, name, empty in zip(keys, SLICE_FIELDS, SLICE_EMPTY)
+        })
+        .values(*keys)
+        .annotate(**aggregates)
+    )
+    return ((tuple(row[key] for key in keys), row) for row in rows)
+
+
+def _compute_slices(keys=None):
+    """
+    {slice key: measures} for the slices `keys` (every slice by default),
+    from one grouped aggregate over Beneficiary and one over their pending
+    loan applications.
+    """
+    beneficiaries = Beneficiary.objects.all()
+    pending = LoanApplication.objects.filter(status=LoanApplication.STATUS_PENDING)
+    if keys is not None:
+        beneficiaries = beneficiaries.filter(_any(keys, _slice_q))
+        pending = pending.filter(_any(keys, _beneficiary_slice_q))
+    computed = {
+        key: {name: row[name] or 0 for name in BENEFICIARY_MEASURES}
+        for key, row in _grouped(beneficiaries, "", stats_aggregates())
+    }
+    for measures in computed.values():
+        measures["pending_loans"] = 0
+    for key, row in _grouped(pending, "beneficiary__", {"pending_loans": Count("pk")}):
+        if key in computed:
+            computed[key]["pending_loans"] = row["pending_loans"]
+    return computed
+
+
+def _rollup_rows(computed, now):
+    return [
+        DashboardRollup(**dict(zip(SLICE_FIELDS, key)), updated_at=now, **measures)
+        for key, measures in computed.items()
+    ]
+
+
+def refresh_stale(batch_size=REFRESH_BATCH):
+    """
+    Recompute the stale slices, `batch_size` per grouped query. A slice
+    marked again while it was being recomputed stays stale.
+    """
+    started = timezone.now()
+    keys = list(DashboardRollup.objects.filter(stale=True).values_list(*SLICE_FIELDS))
+    for start in range(0, len(keys), batch_size):
+        chunk = keys[start:start + batch_size]
+        computed = _compute_slices(chunk)
+        with transaction.atomic():
+            if computed:
+                DashboardRollup.objects.bulk_create(
+                    _rollup_rows(computed, timezone.now()),
+                    update_conflicts=True,
+                    unique_fields=list(SLICE_FIELDS),
+                    update_fields=MEASURES + ["updated_at"],
+                )
+            settled = DashboardRollup.objects.filter(_any(chunk, _rollup_q), marked_at__lte=started)
+            emptied = [key for key in chunk if key not in computed]
+            if emptied:
+                settled.filter(_any(emptied, _rollup_q)).delete()
+            settled.update(stale=False)
+    return len(keys)
+
+
+def rebuild_rollups():
+    """Recompute every slice from scratch; returns the number of slices."""
+    started = timezone.now()
+    computed = _compute_slices()
+    with transaction.atomic():
+        remarked = list(
+            DashboardRollup.objects.filter(marked_at__gt=started).values_list(*SLICE_FIELDS)
+        )
+        DashboardRollup.objects.all().delete()
+        DashboardRollup.objects.bulk_create(_rollup_rows(computed, timezone.now()), batch_size=1000)
+        mark_slices_stale(remarked)  # changed while we were reading
+    return len(computed)
+
+
+def _fresh_rollups():
+    # stale slices recomputed first; an empty table is built on first use
+    if not DashboardRollup.objects.exists():
+        if Beneficiary.objects.exists():
+            rebuild_rollups()
+    else:
+        refresh_stale()
+    return DashboardRollup.objects.all()
+
+
+def _sums():
+    return {name: Sum(name) for name in MEASURES}
+
+
+def portfolio_stats(**slice_filter):
+    """
+    Dashboard figures from the rollup table, optionally for the slices
+    matching `slice_filter` (e.g. state="Kerala").
+    """
+    rollups = _fresh_rollups().filter(**slice_filter)
+    return _finish(rollups.aggregate(**_sums()))
+
+
+def region_stats(state=None, district=None):
+    """
+    Drill-down one region level below the given one: dashboard figures per
+    state, per district of `state`, or per pincode of `state` and
+    `district`. Returns (level, rows), each row the figures of one region
+    under "region" ("" for beneficiaries without one), ordered by region.
+    """
+    rollups = _fresh_rollups()
+    filters = {"state": state, "district": district}
+    level = "state"
+    for parent, child in zip(REGION_LEVELS, REGION_LEVELS[1:]):
+        if filters[parent] is None:
+            break
+        rollups = rollups.filter(**{parent: filters[parent]})
+        level = child
+    rows = rollups.values(level).annotate(**_sums()).order_by(level)
+    return level, [{"region": row[level], **_finish(row)} for row in rows]
@@ -0,0 +1,162 @@
+"""
+Feature store: one FeatureVector row per beneficiary.
+
+refresh_features() rebuilds the rows of a set of beneficiaries from their
+source tables with one query per table (Beneficiary, CaseDetails, an
+aggregate over LoanHistory, ConsumptionData) and writes them back with a
+single upsert. It is called for the beneficiaries a save touches (see
+api.signals) and for every import batch, so the store follows its sources
+incrementally; rebuild_features() (the `rebuild_features` command) fills
+it for the whole portfolio.
+
+iter_stored_feature_chunks() reads the store in the (ids, features) shape
+of scoring.iter_feature_chunks(). Only the columns named after a scoring
+input are read, and those are copied unchanged from Beneficiary, so
+score_batch() scores them exactly like the source rows. The CaseDetails
+figures and derived ratios are named apart from the scorer's inputs: the
+scorer does not read them.
+"""
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Beneficiary, CaseDetails, ConsumptionData, FeatureVector, LoanHistory
+
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Beneficiary and CaseDetails columns copied as they are
+BENEFICIARY_SOURCES = (
+    "cibil_score", "estimated_monthly_income", "income_est",
+    "work_consistency_days", "employment_type", "emi_due_delays",
+)
+CASE_DETAILS_SOURCES = {
+    "bank_balance": "average_bank_balance",
+    "transactions_per_month": "transactions_per_month",
+    "total_emi_per_month": "total_emi_per_month",
+    "active_loans": "number_of_active_loans",
+}
+CASE_DETAILS_BILLS = ("electricity_bill", "average_mobile_bill", "gas_bill")
+CONSUMPTION_BILLS = ("electricity_bill", "mobile_bill", "other_bills")
+
+FEATURE_FIELDS = [
+    f.name for f in FeatureVector._meta.concrete_fields if not f.primary_key
+]
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _ratio(numerator, denominator):
+    if numerator is None or not denominator:
+        return None
+    return numerator / denominator
+
+
+def _bills(values):
+    values = [float(v) for v in values if v is not None]
+    return sum(values) if values else None
+
+
+def build_features(beneficiary_ids):
+    """Unsaved FeatureVector objects for the existing ones of `beneficiary_ids`."""
+    case_columns = list(CASE_DETAILS_SOURCES.values()) + list(CASE_DETAILS_BILLS)
+    cases = {
+        row[0]: dict(zip(case_columns, row[1:]))
+        for row in CaseDetails.objects.filter(beneficiary_id__in=beneficiary_ids)
+        .values_list("beneficiary_id", *case_columns)
+    }
+    loans = {
+        row[0]: row[1:]
+        for row in LoanHistory.objects.filter(beneficiary_id__in=beneficiary_ids)
+        .values("beneficiary_id")
+        .annotate(
+            total=Count("pk"),
+            paid=Count("pk", filter=Q(repayment_status="Paid")),
+            amount=Sum("amount"),
+        )
+        .values_list("beneficiary_id", "total", "paid", "amount")
+    }
+    # ordered oldest first, so the last row seen per beneficiary is the latest
+    consumption = {
+        row[0]: _bills(row[1:])
+        for row in ConsumptionData.objects.filter(beneficiary_id__in=beneficiary_ids)
+        .order_by("created_at", "pk")
+        .values_list("beneficiary_id", *CONSUMPTION_BILLS)
+    }
+
+    now = timezone.now()
+    vectors = []
+    for row in Beneficiary.objects.filter(pk__in=beneficiary_ids).values_list(
+        "pk", *BENEFICIARY_SOURCES
+    ):
+        pk, values = row[0], dict(zip(BENEFICIARY_SOURCES, row[1:]))
+        vector = FeatureVector(beneficiary_id=pk, updated_at=now)
+        for name, value in values.items():
+            setattr(vector, name, value if name == "employment_type" else _float(value))
+
+        case = cases.get(pk, {})
+        for name, column in CASE_DETAILS_SOURCES.items():
+            setattr(vector, name, _float(case.get(column)))
+        total, paid, amount = loans.get(pk, (0, 0, None))
+        vector.loans_total, vector.loans_paid, vector.loan_amount_total = total, paid, amount or 0
+        if pk in consumption:
+            vector.monthly_bills = consumption[pk]
+        else:
+            vector.monthly_bills = _bills(case.get(column) for column in CASE_DETAILS_BILLS)
+
+        # the scorer's income: estimated_monthly_income, else income_est
+        vector.monthly_income = vector.estimated_monthly_income or vector.income_est or None
+        vector.repaid_loan_ratio = _ratio(paid, total)
+        vector.emi_to_income_ratio = _ratio(vector.total_emi_per_month, vector.monthly_income)
+        vector.liquidity_ratio = _ratio(vector.bank_balance, vector.monthly_income)
+        vector.bills_to_income_ratio = _ratio(vector.monthly_bills, vector.monthly_income)
+        vectors.append(vector)
+    return vectors
+
+
+def refresh_features(beneficiary_ids):
+    """Rebuild and upsert the feature rows of `beneficiary_ids`; returns the count."""
+    vectors = build_features(list(beneficiary_ids))
+    if vectors:
+        FeatureVector.objects.bulk_create(
+            vectors,
+            update_conflicts=True,
+            unique_fields=["beneficiary"],
+            update_fields=FEATURE_FIELDS,
+        )
+    return len(vectors)
+
+
+def rebuild_features(chunk_size=DEFAULT_CHUNK_SIZE, after=None):
+    """Refresh every beneficiary's row in pk-ordered chunks; yields each chunk's last pk."""
+    queryset = Beneficiary.objects.order_by("pk").values_list("pk", flat=True)
+    while True:
+        chunk = queryset if after is None else queryset.filter(pk__gt=after)
+        pks = list(chunk[:chunk_size])
+        if not pks:
+            return
+        refresh_features(pks)
+        after = pks[-1]
+        yield after, len(pks)
+
+
+def iter_stored_feature_chunks(chunk_size=DEFAULT_CHUNK_SIZE, after=None):
+    """
+    Yield (ids, features) from the store in pk order: the scorer's
+    Beneficiary inputs (scoring.model_features()), ready for score_batch().
+    """
+    from .scoring import _columns, model_features
+
+    names = model_features()
+    missing = set(names) - set(FEATURE_FIELDS)
+    if missing:
+        raise LookupError(f"The feature store lacks scoring inputs: {', '.join(sorted(missing))}")
+    queryset = FeatureVector.objects.order_by("pk")
+    while True:
+        chunk = queryset if after is None else queryset.filter(pk__gt=after)
+        rows = list(chunk.values_list("pk", *names)[:chunk_size])
+        if not rows:
+            return
+        yield _columns(rows, names)
+        after = rows[-1][0]
@@ -0,0 +1,504 @@
+"""
+Bulk ingestion engine for officer CSV uploads.
+
+Rows are parsed into plain dicts, grouped into batches, and every batch is
+written with one bulk INSERT per table (Beneficiary, LoanHistory,
+ConsumptionData) inside its own transaction.
+"""
+import csv
+import io
+import itertools
+import math
+import time
+from contextlib import closing
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .dashboard import mark_stale
+from .features import refresh_features
+from .timeseries import day_of, mark_days_stale
+from .models import (
+    Beneficiary, LoanHistory, ConsumptionData, ImportJob, ImportRowError,
+    generate_beneficiary_ids
+)
+from .readers import open_rows
+from .scorecards import income_category_for
+from .scoring import mark_dirty_many, model_features
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# a RUNNING job whose checkpoint has not moved for this long is assumed
+# to belong to a crashed worker and may be picked up again
+DEFAULT_STALE_AFTER = timedelta(minutes=10)
+
+
+def _p_bool(val):
+    if val is None:
+        return False
+    v = str(val).strip().lower()
+    return v in ("1", "true", "yes", "y")
+
+
+class RowError(ValueError):
+    """A CSV row that failed validation; the message is the reason."""
+
+
+_MAX_LENGTHS = {
+    name: Beneficiary._meta.get_field(name).max_length
+    for name in ("name", "location", "state", "district", "pincode", "phone", "employment_type")
+}
+_MAX_LENGTHS["repayment_status"] = LoanHistory._meta.get_field("repayment_status").max_length
+
+
+def _str(row, field, default=None):
+    val = row.get(field)
+    if not val:
+        return default
+    if len(val) > _MAX_LENGTHS[field]:
+        raise RowError(f"{field}: longer than {_MAX_LENGTHS[field]} characters")
+    return val
+
+
+def _int(row, field, default=None):
+    val = row.get(field)
+    if not val:
+        return default
+    try:
+        num = int(val)
+    except ValueError:
+        raise RowError(f"{field}: {val!r} is not a whole number") from None
+    if num < 0:
+        raise RowError(f"{field}: must not be negative")
+    return num
+
+
+def _float(row, field):
+    val = row.get(field)
+    if not val:
+        return None
+    try:
+        num = float(val)
+    except ValueError:
+        raise RowError(f"{field}: {val!r} is not a number") from None
+    if not math.isfinite(num) or num < 0:
+        raise RowError(f"{field}: must be a non-negative number")
+    return num
+
+
+def parse_row(row):
+    """
+    Validate one CSV row and turn it into (beneficiary, loan, consumption)
+    field dicts. `loan` / `consumption` are None when the row carries no
+    such data. Raises RowError for values the write stage would reject.
+    income_category is computed here so the beneficiary is inserted once.
+    """
+    name = _str(row, "name")
+    if not name:
+        raise RowError("name: required")
+    income_est = _float(row, "income_est")
+    monthly = _float(row, "estimated_monthly_income")
+    ben = {
+        "name": name,
+        "age": _int(row, "age"),
+        "location": _str(row, "location", ""),
+        "state": _str(row, "state"),
+        "district": _str(row, "district"),
+        "pincode": _str(row, "pincode"),
+        "phone": _str(row, "phone"),
+        "income_est": income_est,
+        "estimated_monthly_income": monthly,
+        # use the higher of the two income fields
+        "income_category": income_category_for(max(income_est or 0.0, monthly or 0.0)),
+        "consent_given": _p_bool(row.get("consent_given")),
+        "aadhaar_verified": _p_bool(row.get("aadhaar_verified")),
+        "pan_available": _p_bool(row.get("pan_available")),
+        "bank_account_active": _p_bool(row.get("bank_account_active")),
+        "employment_type": _str(row, "employment_type"),
+    }
+
+    loan = None
+    amount = _float(row, "loan_amount")
+    if amount is not None:
+        loan = {
+            "amount": amount,
+            "tenure": _int(row, "tenure", 12),
+            "repayment_status": _str(row, "repayment_status", "Pending"),
+        }
+
+    consumption = None
+    electricity = _float(row, "electricity_bill")
+    mobile = _float(row, "mobile_bill")
+    other = _float(row, "other_bills")
+    if electricity is not None or mobile is not None:
+        consumption = {
+            "electricity_bill": electricity,
+            "mobile_bill": mobile,
+            "other_bills": other,
+        }
+
+    return ben, loan, consumption
+
+
+# natural keys an upsert import can match existing beneficiaries on
+UPSERT_KEYS = {
+    "phone": ("phone",),
+    "name_pincode": ("name", "pincode"),
+}
+
+
+def _natural_key(ben, key_fields):
+    key = tuple(ben[f] for f in key_fields)
+    return None if None in key else key
+
+
+def _match_existing(bens, key_fields):
+    """
+    Look up the beneficiaries already stored under the natural keys of
+    `bens` with one query. Returns {key: stored field values}.
+    """
+    keys = {_natural_key(ben, key_fields) for ben in bens} - {None}
+    if not keys:
+        return {}
+    # one IN-list per key column; for composite keys this fetches a small
+    # superset, narrowed to exact tuples below
+    lookup = {
+        f"{field}__in": {key[i] for key in keys}
+        for i, field in enumerate(key_fields)
+    }
+    existing = {}
+    rows = (
+        Beneficiary.objects.filter(**lookup)
+        .order_by("id")
+        .values("id", *bens[0].keys())
+    )
+    for row in rows:
+        key = _natural_key(row, key_fields)
+        if key in keys:
+            existing.setdefault(key, row)
+    return existing
+
+
+def build_new_objects(parsed, officer, now):
+    """
+    Unsaved Beneficiary / LoanHistory / ConsumptionData objects for rows
+    that become new beneficiaries, with IDs reserved in one lookup.
+    """
+    bens, loans, consumptions = [], [], []
+    ids = generate_beneficiary_ids(len(parsed))
+    for ben_id, (ben, loan, consumption) in zip(ids, parsed):
+        bens.append(Beneficiary(id=ben_id, officer=officer, created_at=now, **ben))
+        if loan:
+            loans.append(LoanHistory(beneficiary_id=ben_id, created_at=now, **loan))
+        if consumption:
+            consumptions.append(
+                ConsumptionData(beneficiary_id=ben_id, created_at=now, **consumption)
+            )
+    return bens, loans, consumptions
+
+
+def write_batch(parsed, officer=None, upsert_key=None):
+    """
+    Write a batch of parse_row() results inside a single transaction with
+    one bulk statement per table. Returns (inserted, updated).
+
+    With `upsert_key` (a key of UPSERT_KEYS) rows matching an existing
+    beneficiary update it in place, and only when a value changed; loan
+    and consumption rows identical to ones already stored are skipped.
+    """
+    if not parsed:
+        return 0, 0
+    now = timezone.now()
+    fields = list(parsed[0][0])
+    key_fields = None
+    existing = {}
+    if upsert_key:
+        key_fields = UPSERT_KEYS[upsert_key]
+        existing = _match_existing([ben for ben, _, _ in parsed], key_fields)
+        # a key repeated inside the batch: the last row wins
+        deduped = {}
+        for item in parsed:
+            key = _natural_key(item[0], key_fields)
+            deduped[key if key is not None else object()] = item
+        parsed = list(deduped.values())
+
+    updates = []
+    rescore = []  # updated rows whose scoring inputs changed
+    inputs = set(fields).intersection(model_features())
+    with transaction.atomic():
+        new_rows = []
+        matched = []
+        for item in parsed:
+            stored = existing.get(_natural_key(item[0], key_fields)) if existing else None
+            if stored is None:
+                new_rows.append(item)
+            else:
+                matched.append((stored, item))
+
+        bens, loans, consumptions = build_new_objects(new_rows, officer, now)
+
+        if matched:
+            matched_ids = [stored["id"] for stored, _ in matched]
+            known_loans = set(
+                LoanHistory.objects.filter(beneficiary_id__in=matched_ids)
+                .values_list("beneficiary_id", "amount", "tenure", "repayment_status")
+            )
+            known_consumption = set(
+                ConsumptionData.objects.filter(beneficiary_id__in=matched_ids)
+                .values_list("beneficiary_id", "electricity_bill", "mobile_bill", "other_bills")
+            )
+            for stored, (ben, loan, consumption) in matched:
+                ben_id = stored["id"]
+                if any(stored[f] != ben[f] for f in fields):
+                    updates.append(Beneficiary(id=ben_id, updated_at=now, **ben))
+                    if any(stored[f] != ben[f] for f in inputs):
+                        rescore.append(ben_id)
+                if loan and (ben_id, *loan.values()) not in known_loans:
+                    loans.append(LoanHistory(beneficiary_id=ben_id, created_at=now, **loan))
+                if consumption and (ben_id, *consumption.values()) not in known_consumption:
+                    consumptions.append(
+                        ConsumptionData(beneficiary_id=ben_id, created_at=now, **consumption)
+                    )
+
+        if bens:
+            Beneficiary.objects.bulk_create(bens)
+        if updates:
+            # slices the updated rows may be leaving
+            mark_stale(Beneficiary.objects.filter(pk__in=[ben.id for ben in updates]))
+            Beneficiary.objects.bulk_update(updates, fields + ["updated_at"])
+        if loans:
+            LoanHistory.objects.bulk_create(loans)
+        if consumptions:
+            ConsumptionData.objects.bulk_create(consumptions)
+        refresh_features(
+            {ben.id for ben in bens + updates}
+            | {obj.beneficiary_id for obj in loans + consumptions}
+        )
+        mark_stale(Beneficiary.objects.filter(pk__in=[ben.id for ben in bens + updates]))
+        mark_days_stale({day_of(ben.created_at) for ben in bens})
+        mark_dirty_many([ben.id for ben in bens] + rescore)
+    return len(bens), len(updates)
+
+
+class ImportResult:
+    def __init__(self):
+        self.added = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.batches = 0
+        self.elapsed = 0.0
+        # (line number, reason, raw row) for every row that failed validation
+        self.errors = []
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    @property
+    def processed(self):
+        return self.added + self.updated + self.unchanged + self.failed
+
+    @property
+    def rows_per_second(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def _write(self, batch, officer, upsert_key, writer):
+        inserted, updated = writer(batch, officer=officer, upsert_key=upsert_key)
+        self.added += inserted
+        self.updated += updated
+        self.unchanged += len(batch) - inserted - updated
+        self.batches += 1
+
+    def __str__(self):
+        return (
+            f"{self.added} added, {self.updated} updated, {self.unchanged} unchanged "
+            f"in {self.batches} batches, {self.failed} failed, "
+            f"{self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/sec)"
+        )
+
+
+def iter_parsed(rows):
+    """
+    Run parse_row() over `rows`, yielding (line, parsed, reason, row) in
+    order: `parsed` for good rows, `reason` and the raw `row` for bad ones.
+    This is the stream the write stage consumes; api.parallel_import
+    produces the same stream from a process pool.
+    """
+    # header is line 1; line_num is only known when fed a csv.DictReader
+    for index, row in enumerate(rows):
+        try:
+            parsed = parse_row(row)
+        except RowError as e:
+            yield getattr(rows, "line_num", index + 2), None, str(e), row
+        else:
+            yield getattr(rows, "line_num", index + 2), parsed, None, None
+
+
+def import_parsed(stream, officer=None, batch_size=DEFAULT_BATCH_SIZE, upsert_key=None,
+                  writer=None):
+    """
+    Write an iter_parsed()-style stream in chunked transactions of
+    `batch_size` rows. Bad rows are collected on result.errors instead of
+    aborting the import. See write_batch() for `upsert_key`; `writer` may
+    swap in another batch writer with the same signature
+    (e.g. api.pg_copy.write_batch_copy).
+    """
+    writer = writer or write_batch
+    result = ImportResult()
+    started = time.perf_counter()
+    batch = []
+    for line, parsed, reason, row in stream:
+        if parsed is None:
+            result.errors.append((line, reason, row))
+            continue
+        batch.append(parsed)
+        if len(batch) >= batch_size:
+            result._write(batch, officer, upsert_key, writer)
+            batch = []
+    if batch:
+        result._write(batch, officer, upsert_key, writer)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def import_rows(rows, officer=None, batch_size=DEFAULT_BATCH_SIZE, upsert_key=None,
+                writer=None):
+    """Validate and write an iterable of CSV dict rows; see import_parsed()."""
+    return import_parsed(
+        iter_parsed(rows), officer=officer, batch_size=batch_size,
+        upsert_key=upsert_key, writer=writer,
+    )
+
+
+# ---------- Background import jobs ----------
+
+
+def claim_next_job(stale_after=DEFAULT_STALE_AFTER):
+    """
+    Lock and mark RUNNING the oldest pending job (or a stale running one).
+    Returns None when the queue is empty.
+    """
+    cutoff = timezone.now() - stale_after
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImportJob.STATUS_PENDING)
+                | Q(status=ImportJob.STATUS_RUNNING, updated_at__lt=cutoff)
+            )
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ImportJob.STATUS_RUNNING
+        job.save(update_fields=["status", "updated_at"])
+    return job
+
+
+def _checkpoint(job, batch, failures, elapsed, writer):
+    # the batch, its error rows and the new offset commit together, so a
+    # crash can never leave rows inserted without the checkpoint covering them
+    with transaction.atomic():
+        inserted, updated = writer(batch, officer=job.officer, upsert_key=job.upsert_key or None)
+        job.rows_done += len(batch)
+        job.rows_inserted += inserted
+        job.rows_updated += updated
+        if failures:
+            ImportRowError.objects.bulk_create(failures)
+        job.rows_failed += len(failures)
+        job.elapsed_seconds += elapsed
+        job.save(update_fields=[
+            "rows_done", "rows_inserted", "rows_updated", "rows_failed",
+            "elapsed_seconds", "updated_at",
+        ])
+
+
+def parsed_stream(fh, name, workers=1, path=None):
+    """
+    iter_parsed() stream for an open upload. CSV files that also have a
+    local `path` are parsed by `workers` processes when workers > 1.
+    """
+    rows = open_rows(fh, name)
+    if workers > 1 and path and isinstance(rows, csv.DictReader):
+        from .parallel_import import iter_parsed_parallel
+        return iter_parsed_parallel(path, workers=workers)
+    return iter_parsed(rows)
+
+
+def _job_stream(job, fh, workers):
+    try:
+        path = job.file.path
+    except NotImplementedError:
+        # storage without local paths cannot be sharded by byte range
+        path = None
+    return parsed_stream(fh, job.file.name, workers=workers, path=path)
+
+
+def run_import_job(job, batch_size=DEFAULT_BATCH_SIZE, workers=1, writer=None):
+    """
+    Process `job` from its last checkpoint to the end of the file.
+    Rows before job.offset were committed by an earlier run and are skipped.
+    Rows failing validation are stored as ImportRowError and counted in
+    rows_failed; the rest of the file still imports. With workers > 1 the
+    parse stage of CSV files runs in a process pool (see api.parallel_import).
+    """
+    writer = writer or write_batch
+    try:
+        with job.file.open("rb") as fh, closing(_job_stream(job, fh, workers)) as stream:
+            started = time.perf_counter()
+            batch, failures = [], []
+            for line, parsed, reason, row in itertools.islice(stream, job.offset, None):
+                if parsed is None:
+                    failures.append(
+                        ImportRowError(job=job, line=line, reason=reason[:256], data=row)
+                    )
+                else:
+                    batch.append(parsed)
+                if len(batch) + len(failures) >= batch_size:
+                    now = time.perf_counter()
+                    _checkpoint(job, batch, failures, now - started, writer)
+                    started = now
+                    batch, failures = [], []
+            if batch or failures:
+                _checkpoint(job, batch, failures, time.perf_counter() - started, writer)
+    except Exception as e:
+        job.status = ImportJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = ImportJob.STATUS_DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at", "updated_at"])
+    return job
+
+
+def iter_error_csv(job):
+    """
+    Yield the rejected rows of `job` as CSV lines: line number, reason,
+    then the original columns.
+    """
+    errors = job.row_errors.order_by("line").iterator()
+    first = next(errors, None)
+    if first is None:
+        return
+    # JSONB does not keep key order, so take the columns from the file header
+    try:
+        with job.file.open("rb") as fh:
+            columns = list(open_rows(fh, job.file.name).fieldnames or [])
+    except (OSError, ValueError):
+        columns = [key for key in first.data if key != "null"]
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def _line(values):
+        out.seek(0)
+        out.truncate()
+        writer.writerow(values)
+        return out.getvalue()
+
+    yield _line(["line", "reason"] + columns)
+    for err in itertools.chain([first], errors):
+        yield _line([err.line, err.reason] + [err.data.get(col, "") for col in columns])
@@ -0,0 +1,103 @@
+"""
+Officer beneficiary listing with keyset pagination.
+
+Beneficiaries are listed newest first on (created_at, id). A page after
+the cursor (c, i) of the previous page's last row is
+
+    WHERE created_at <= c AND (created_at < c OR id < i)
+    ORDER BY created_at DESC, id DESC LIMIT n
+
+where the redundant `created_at <= c` bound lets the database start its
+index scan at the cursor, so page N reads as many index entries as page 1
+instead of skipping an OFFSET. Only the columns the officer table shows
+are selected.
+
+Every filter column has a (column, created_at, id) index, so a page with
+one filter is also a single index range scan. Several filters use one of
+those indexes and check the others on the rows it returns.
+"""
+import datetime
+
+from django.db.models import Q
+
+from .models import Beneficiary
+
+
+LIST_COLUMNS = (
+    "id", "name", "age", "location", "income_est", "score", "risk_band", "need_band",
+    "eligibility", "created_at",
+)
+FILTERS = ("state", "district", "risk_band", "eligibility", "case_type", "officer")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def encode_cursor(row):
+    """The URL-safe cursor of a listed row: microseconds since the epoch, "_", id."""
+    return f"{(row['created_at'] - _EPOCH) // datetime.timedelta(microseconds=1)}_{row['id']}"
+
+
+def decode_cursor(cursor):
+    """(created_at, id) of a cursor; raises ValueError for a malformed one."""
+    micros, _, pk = cursor.partition("_")
+    if not pk:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    try:
+        return _EPOCH + datetime.timedelta(microseconds=int(micros)), pk
+    except OverflowError:  # beyond the datetime range
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def listing_filters(params):
+    """
+    {lookup: value} for the FILTERS given in `params` (e.g. request.GET),
+    skipping blank ones; raises ValueError for a non-numeric officer.
+    """
+    filters = {}
+    for name in FILTERS:
+        value = (params.get(name) or "").strip()
+        if not value:
+            continue
+        if name == "officer":
+            filters["officer_id"] = int(value)
+        else:
+            filters[name] = value
+    return filters
+
+
+def beneficiary_page(filters=None, after=None, before=None, size=DEFAULT_PAGE_SIZE):
+    """
+    One page of the listing, newest first: the rows after cursor `after`,
+    the rows before cursor `before`, or the first page. Returns a dict with
+    the row dicts under "rows" and the cursors of the neighbouring pages
+    under "next" and "previous" (None at either end).
+    """
+    queryset = Beneficiary.objects.filter(**(filters or {}))
+    backwards = before is not None
+    if backwards:
+        created_at, pk = decode_cursor(before)
+        queryset = queryset.filter(
+            Q(created_at__gte=created_at), Q(created_at__gt=created_at) | Q(id__gt=pk),
+        ).order_by("created_at", "id")
+    else:
+        if after is not None:
+            created_at, pk = decode_cursor(after)
+            queryset = queryset.filter(
+                Q(created_at__lte=created_at), Q(created_at__lt=created_at) | Q(id__lt=pk),
+            )
+        queryset = queryset.order_by("-created_at", "-id")
+
+    rows = list(queryset.values(*LIST_COLUMNS)[:size + 1])
+    more = len(rows) > size
+    rows = rows[:size]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return {"rows": [], "next": None, "previous": None}
+    return {
+        "rows": rows,
+        "next": encode_cursor(rows[-1]) if more or backwards else None,
+        "previous": encode_cursor(rows[0]) if (more if backwards else after is not None) else None,
+    }
@@ -0,0 +1,104 @@
+import csv
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import (
+    DEFAULT_BATCH_SIZE, UPSERT_KEYS, ImportResult, import_parsed, parsed_stream, write_batch
+)
+from api.pg_copy import write_batch_copy
+
+
+class Command(BaseCommand):
+    help = "Import beneficiaries from a CSV, XLSX or Parquet file without going through the web upload."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Parse processes; above 1 a CSV file is sharded by byte range.",
+        )
+        parser.add_argument(
+            "--upsert-key", choices=sorted(UPSERT_KEYS),
+            help="Update beneficiaries matching on this natural key instead of adding duplicates.",
+        )
+        parser.add_argument(
+            "--officer",
+            help="Username of the officer the imported beneficiaries are attributed to.",
+        )
+        parser.add_argument(
+            "--backend", choices=["bulk", "copy"], default="bulk",
+            help="'copy' streams batches with PostgreSQL COPY (bulk_create elsewhere).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Validate every row and report errors without writing anything.",
+        )
+        parser.add_argument(
+            "--errors",
+            help="Write rejected rows (line, reason, original columns) to this CSV file.",
+        )
+
+    def handle(self, *args, **options):
+        officer = None
+        if options["officer"]:
+            officer = User.objects.filter(username=options["officer"]).first()
+            if officer is None:
+                raise CommandError(f"No user named {options['officer']!r}")
+
+        path = options["path"]
+        try:
+            fh = open(path, "rb")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with fh:
+            stream = parsed_stream(fh, path, workers=options["workers"], path=path)
+            if options["dry_run"]:
+                result = self._validate(stream)
+            else:
+                result = import_parsed(
+                    stream,
+                    officer=officer,
+                    batch_size=options["batch_size"],
+                    upsert_key=options["upsert_key"],
+                    writer=write_batch_copy if options["backend"] == "copy" else write_batch,
+                )
+
+        if options["errors"] and result.errors:
+            self._write_errors(options["errors"], result.errors)
+
+        for line, reason, _row in result.errors[:10]:
+            self.stderr.write(f"line {line}: {reason}")
+        if result.failed > 10:
+            self.stderr.write(f"... and {result.failed - 10} more rejected rows")
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Dry run: {result.unchanged} valid rows, {result.failed} rejected, "
+                f"{result.elapsed:.2f}s ({result.rows_per_second:.0f} rows/sec)"
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Imported {result}"))
+
+    def _validate(self, stream):
+        result = ImportResult()
+        started = time.perf_counter()
+        for line, parsed, reason, row in stream:
+            if parsed is None:
+                result.errors.append((line, reason, row))
+            else:
+                # nothing is written, so count valid rows as unchanged
+                result.unchanged += 1
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _write_errors(self, path, errors):
+        columns = list(dict.fromkeys(key for _, _, row in errors for key in row if key is not None))
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(["line", "reason"] + columns)
+            for line, reason, row in errors:
+                writer.writerow([line, reason] + [row.get(col) or "" for col in columns])
@@ -0,0 +1,56 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.importer import DEFAULT_BATCH_SIZE, claim_next_job, run_import_job, write_batch
+from api.pg_copy import write_batch_copy
+
+
+class Command(BaseCommand):
+    help = "Process queued beneficiary import jobs (resumes crashed jobs from their last checkpoint)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Parse processes per job; above 1 the file is sharded by byte range.",
+        )
+        parser.add_argument(
+            "--backend", choices=["bulk", "copy"], default="bulk",
+            help="'copy' streams batches with PostgreSQL COPY (bulk_create elsewhere).",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=5.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--stale-after", type=int, default=600,
+            help="Seconds without a checkpoint before a RUNNING job is taken over.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options["stale_after"])
+        while True:
+            job = claim_next_job(stale_after=stale_after)
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Processing import job {job.pk} from row {job.offset}")
+            run_import_job(
+                job,
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                writer=write_batch_copy if options["backend"] == "copy" else write_batch,
+            )
+            self.stdout.write(
+                f"Job {job.pk} {job.status}: {job.rows_done} rows done, "
+                f"{job.rows_failed} failed, {job.rows_per_second:.0f} rows/sec"
+            )
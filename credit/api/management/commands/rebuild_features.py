@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.features import DEFAULT_CHUNK_SIZE, rebuild_features
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the FeatureVector row of every beneficiary from Beneficiary, "
+        "CaseDetails, LoanHistory and ConsumptionData."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--after", default=None,
+            help="Only rebuild beneficiaries after this ID (to continue a stopped rebuild).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        done = 0
+        last = None
+        for last, count in rebuild_features(options["chunk_size"], after=options["after"]):
+            done += count
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{done} rebuilt, up to {last}")
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Rebuilt {done} feature rows in {elapsed:.1f}s"
+            + (f" (last ID {last})" if last else "")
+        )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.dashboard import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the dashboard rollup table (counts per state, district, pincode and officer) "
+        "from the beneficiary and loan application tables."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        slices = rebuild_rollups()
+        self.stdout.write(f"Rebuilt {slices} rollup slices in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import RescoreRun
+from api.scorecards import get_scorecard
+from api.scoring import DEFAULT_CHUNK_SIZE, drain_dirty, run_rescore, shadow_report_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Rescore every beneficiary in pk-ordered chunks and write back model_score, "
+        "risk_band and eligibility_label where they changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Processes scoring and writing chunks in parallel.",
+        )
+        parser.add_argument(
+            "--score-workers", type=int, default=1,
+            help="Processes scoring each chunk's rows over shared memory, while this "
+                 "process reads and writes the chunks (not combinable with --workers).",
+        )
+        parser.add_argument(
+            "--time-budget", type=float, default=None,
+            help="Seconds after which no new chunk is started; the run is left paused.",
+        )
+        parser.add_argument(
+            "--shadow", type=int, action="append", default=[], metavar="VERSION",
+            help="Also score this credit_score scorecard version and report how it "
+                 "compares with the active one (repeatable).",
+        )
+        parser.add_argument(
+            "--compare-only", action="store_true",
+            help="With --shadow: only build the comparison report, write no scores.",
+        )
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument(
+            "--resume", action="store_true",
+            help="Continue the most recent unfinished run from its checkpoint.",
+        )
+        group.add_argument(
+            "--after", default=None,
+            help="Start a new run after this beneficiary ID.",
+        )
+        group.add_argument(
+            "--dirty", action="store_true",
+            help="Only rescore beneficiaries queued because a scoring input changed.",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] > 1 and options["score_workers"] > 1:
+            raise CommandError("Use either --workers or --score-workers, not both.")
+        if options["dirty"]:
+            scored, changed = drain_dirty()
+            self.stdout.write(f"Rescored {scored} queued beneficiaries, {changed} changed")
+            return
+        if options["resume"]:
+            run = (
+                RescoreRun.objects.exclude(status=RescoreRun.STATUS_DONE)
+                .order_by("-created_at", "-pk")
+                .first()
+            )
+            if run is None:
+                raise CommandError("No unfinished rescore run to resume.")
+            self.stdout.write(f"Resuming rescore run {run.pk} after {run.last_id or 'the start'}")
+        else:
+            if options["compare_only"] and not options["shadow"]:
+                raise CommandError("--compare-only needs at least one --shadow version.")
+            for version in options["shadow"]:
+                try:
+                    get_scorecard("credit_score", version)
+                except LookupError as exc:
+                    raise CommandError(str(exc))
+            run = RescoreRun.objects.create(
+                last_id=options["after"] or "",
+                shadow_versions=options["shadow"],
+                compare_only=options["compare_only"],
+            )
+
+        run_rescore(
+            run,
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            time_budget=options["time_budget"],
+            score_workers=options["score_workers"],
+        )
+        self.stdout.write(
+            f"Rescore run {run.pk} {run.status}: {run.rows_scored} scored, "
+            f"{run.rows_changed} changed, {run.rows_per_second:.0f} rows/sec"
+            + (f"; resume with --resume (last ID {run.last_id})"
+               if run.status == RescoreRun.STATUS_PAUSED else "")
+        )
+        for line in shadow_report_lines(run):
+            self.stdout.write(line)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_importrowerror'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='rows_inserted',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='rows_updated',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='upsert_key',
+            field=models.CharField(blank=True, choices=[('phone', 'Phone'), ('name_pincode', 'Name + pincode')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['phone'], name='api_benefic_phone_7f0c6e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['pincode', 'name'], name='api_benefic_pincode_c801a8_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+def seed_beneficiary_counter(apps, schema_editor):
+    Beneficiary = apps.get_model("api", "Beneficiary")
+    IdCounter = apps.get_model("api", "IdCounter")
+    last_ben = Beneficiary.objects.order_by("-id").first()
+    next_value = int(last_ben.id.replace("BEN", "")) + 1 if last_ben else 100000
+    IdCounter.objects.create(name="beneficiary", next_value=next_value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_alter_consumptiondata_fk_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(seed_beneficiary_counter, migrations.RunPython.noop),
+    ]
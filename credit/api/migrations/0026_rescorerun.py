@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_idcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RescoreRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('PAUSED', 'Paused'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='RUNNING', max_length=20)),
+                ('last_id', models.CharField(blank=True, max_length=20)),
+                ('rows_scored', models.PositiveIntegerField(default=0)),
+                ('rows_changed', models.PositiveIntegerField(default=0)),
+                ('elapsed_seconds', models.FloatField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
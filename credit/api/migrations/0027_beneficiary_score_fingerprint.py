@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_rescorerun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='beneficiary',
+            name='score_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
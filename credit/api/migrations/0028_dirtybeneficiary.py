@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_beneficiary_score_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyBeneficiary',
+            fields=[
+                ('beneficiary', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='api.beneficiary')),
+                ('queued_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_dirtybeneficiary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Scorecard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('version', models.PositiveIntegerField()),
+                ('definition', models.JSONField()),
+                ('is_active', models.BooleanField(default=False)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'version'), name='unique_scorecard_version')],
+            },
+        ),
+    ]
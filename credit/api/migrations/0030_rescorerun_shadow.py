@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_scorecard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rescorerun',
+            name='compare_only',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='rescorerun',
+            name='shadow_report',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='rescorerun',
+            name='shadow_versions',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
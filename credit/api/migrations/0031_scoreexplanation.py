@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:12
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_explanations(apps, schema_editor):
+    AIScoreLog = apps.get_model("api", "AIScoreLog")
+    ScoreExplanation = apps.get_model("api", "ScoreExplanation")
+    pairs = AIScoreLog.objects.values_list("model_used", "explanation").distinct()
+    for model_used, text in pairs.iterator():
+        digest = hashlib.sha1(f"{model_used}\x00{text}".encode()).hexdigest()
+        reason = ScoreExplanation.objects.create(model_used=model_used, text=text, digest=digest)
+        AIScoreLog.objects.filter(model_used=model_used, explanation=text).update(reason=reason)
+
+
+def restore_explanations(apps, schema_editor):
+    AIScoreLog = apps.get_model("api", "AIScoreLog")
+    ScoreExplanation = apps.get_model("api", "ScoreExplanation")
+    for reason in ScoreExplanation.objects.iterator():
+        AIScoreLog.objects.filter(reason=reason).update(
+            model_used=reason.model_used, explanation=reason.text
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_rescorerun_shadow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreExplanation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_used', models.CharField(max_length=100)),
+                ('text', models.TextField()),
+                ('digest', models.CharField(max_length=40, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='aiscorelog',
+            name='reason',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='logs', to='api.scoreexplanation'),
+        ),
+        migrations.RunPython(move_explanations, restore_explanations),
+        migrations.AlterField(
+            model_name='aiscorelog',
+            name='explanation',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='aiscorelog',
+            name='explanation',
+        ),
+        migrations.RemoveField(
+            model_name='aiscorelog',
+            name='model_used',
+        ),
+        migrations.AlterField(
+            model_name='aiscorelog',
+            name='reason',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='logs', to='api.scoreexplanation'),
+        ),
+        migrations.AddIndex(
+            model_name='aiscorelog',
+            index=models.Index(fields=['beneficiary', '-created_at'], name='ai_log_history_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0031_scoreexplanation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeatureVector',
+            fields=[
+                ('beneficiary', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='features', serialize=False, to='api.beneficiary')),
+                ('cibil_score', models.FloatField(null=True)),
+                ('estimated_monthly_income', models.FloatField(null=True)),
+                ('income_est', models.FloatField(null=True)),
+                ('work_consistency_days', models.FloatField(null=True)),
+                ('employment_type', models.CharField(max_length=50, null=True)),
+                ('emi_due_delays', models.FloatField(null=True)),
+                ('average_bank_balance', models.FloatField(null=True)),
+                ('transactions_count', models.FloatField(null=True)),
+                ('total_emi_per_month', models.FloatField(null=True)),
+                ('number_of_active_loans', models.FloatField(null=True)),
+                ('loans_total', models.PositiveIntegerField(default=0)),
+                ('loans_paid', models.PositiveIntegerField(default=0)),
+                ('loan_amount_total', models.FloatField(default=0)),
+                ('monthly_bills', models.FloatField(null=True)),
+                ('monthly_income', models.FloatField(null=True)),
+                ('repaid_loan_ratio', models.FloatField(null=True)),
+                ('debt_to_income_ratio', models.FloatField(null=True)),
+                ('liquidity_ratio', models.FloatField(null=True)),
+                ('bills_to_income_ratio', models.FloatField(null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:26
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0032_featurevector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(blank=True, default='', max_length=100)),
+                ('district', models.CharField(blank=True, default='', max_length=100)),
+                ('officer_id', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('scored', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('high_risk', models.PositiveIntegerField(default=0)),
+                ('low_risk', models.PositiveIntegerField(default=0)),
+                ('eligible', models.PositiveIntegerField(default=0)),
+                ('bucket_0', models.PositiveIntegerField(default=0)),
+                ('bucket_1', models.PositiveIntegerField(default=0)),
+                ('bucket_2', models.PositiveIntegerField(default=0)),
+                ('bucket_3', models.PositiveIntegerField(default=0)),
+                ('bucket_4', models.PositiveIntegerField(default=0)),
+                ('bucket_5', models.PositiveIntegerField(default=0)),
+                ('stale', models.BooleanField(default=False)),
+                ('marked_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['state', 'district', 'officer'], name='ben_rollup_slice_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dashboardrollup',
+            constraint=models.UniqueConstraint(fields=('state', 'district', 'officer_id'), name='dashboard_rollup_slice'),
+        ),
+    ]
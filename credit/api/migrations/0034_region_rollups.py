@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fix_loan_application_fk(apps, schema_editor):
+    # 0005 made Beneficiary ids varchar but left this column uuid on
+    # PostgreSQL (as 0007 fixed for documents), so no join to Beneficiary works
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT data_type FROM information_schema.columns"
+            " WHERE table_name = 'api_loanapplication' AND column_name = 'beneficiary_id'"
+        )
+        row = cursor.fetchone()
+    if not row or row[0] != "uuid":
+        return
+    schema_editor.execute(
+        "ALTER TABLE api_loanapplication DROP CONSTRAINT IF EXISTS api_loanapplication_beneficiary_id_fkey"
+    )
+    schema_editor.execute(
+        "ALTER TABLE api_loanapplication ALTER COLUMN beneficiary_id TYPE varchar(20) USING beneficiary_id::text"
+    )
+    schema_editor.execute(
+        "ALTER TABLE api_loanapplication ADD CONSTRAINT api_loanapplication_beneficiary_id_fkey"
+        " FOREIGN KEY (beneficiary_id) REFERENCES api_beneficiary(id)"
+        " DEFERRABLE INITIALLY DEFERRED"
+    )
+
+
+def clear_rollups(apps, schema_editor):
+    # slices are now per pincode; the table is rebuilt on the next dashboard read
+    apps.get_model("api", "DashboardRollup").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0033_dashboardrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_loan_application_fk, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='dashboardrollup',
+            name='dashboard_rollup_slice',
+        ),
+        migrations.RemoveIndex(
+            model_name='beneficiary',
+            name='ben_rollup_slice_idx',
+        ),
+        migrations.AddField(
+            model_name='dashboardrollup',
+            name='pending_loans',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dashboardrollup',
+            name='pincode',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['state', 'district', 'pincode', 'officer'], name='ben_rollup_slice_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanapplication',
+            index=models.Index(fields=['status', 'beneficiary'], name='loan_app_status_ben_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dashboardrollup',
+            constraint=models.UniqueConstraint(fields=('state', 'district', 'pincode', 'officer_id'), name='dashboard_rollup_slice'),
+        ),
+        migrations.RunPython(clear_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0035_daily_summaries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='beneficiary',
+            name='ben_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['created_at', 'id'], name='ben_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['state', 'created_at', 'id'], name='ben_list_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['district', 'created_at', 'id'], name='ben_list_district_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['officer', 'created_at', 'id'], name='ben_list_officer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['risk_band', 'created_at', 'id'], name='ben_list_risk_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['eligibility', 'created_at', 'id'], name='ben_list_eligibility_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['case_type', 'created_at', 'id'], name='ben_list_case_type_idx'),
+        ),
+    ]
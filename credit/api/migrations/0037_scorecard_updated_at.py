@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0036_beneficiary_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scorecard',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
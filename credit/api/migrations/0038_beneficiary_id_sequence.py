@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:55
+
+from django.db import migrations, models
+
+
+SEQUENCE = "api_idcounter_beneficiary_seq"
+
+
+def create_sequence(apps, schema_editor):
+    # PostgreSQL allocates from a sequence, seeded where the counter row was
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Beneficiary = apps.get_model("api", "Beneficiary")
+    IdCounter = apps.get_model("api", "IdCounter")
+    counter = IdCounter.objects.filter(name="beneficiary").first()
+    if counter is not None:
+        next_value = counter.next_value
+    else:
+        last_ben = Beneficiary.objects.order_by("-id").first()
+        next_value = int(last_ben.id.replace("BEN", "")) + 1 if last_ben else 100000
+    schema_editor.execute(f"CREATE SEQUENCE {SEQUENCE} START WITH {int(next_value)}")
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    IdCounter = apps.get_model("api", "IdCounter")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s)", [SEQUENCE])
+        next_value = cursor.fetchone()[0]
+    IdCounter.objects.update_or_create(name="beneficiary", defaults={"next_value": next_value})
+    schema_editor.execute(f"DROP SEQUENCE {SEQUENCE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0037_scorecard_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='beneficiary',
+            name='id',
+            field=models.CharField(editable=False, max_length=20, primary_key=True, serialize=False),
+        ),
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
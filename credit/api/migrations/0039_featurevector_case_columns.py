@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0038_beneficiary_id_sequence'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='featurevector',
+            old_name='average_bank_balance',
+            new_name='bank_balance',
+        ),
+        migrations.RenameField(
+            model_name='featurevector',
+            old_name='transactions_count',
+            new_name='transactions_per_month',
+        ),
+        migrations.RenameField(
+            model_name='featurevector',
+            old_name='number_of_active_loans',
+            new_name='active_loans',
+        ),
+        migrations.RenameField(
+            model_name='featurevector',
+            old_name='debt_to_income_ratio',
+            new_name='emi_to_income_ratio',
+        ),
+    ]
@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import connection, models
+from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
+import hashlib
 import uuid
 from django import forms
 from django.utils import timezone
@@ -13,24 +15,81 @@ ROLE_CHOICES = [
 
 
 
+BENEFICIARY_ID_SERIES = "beneficiary"
+
+
+def _first_free_beneficiary_number():
+    from api.models import Beneficiary  # local import to avoid circular import
+    # IDs are fixed width ("BEN100005"), so string order is numeric order
+    last_ben = Beneficiary.objects.all().order_by("-id").first()
+    return int(last_ben.id.replace("BEN", "")) + 1 if last_ben else 100000
+
+
+def id_sequence_name(series):
+    """The PostgreSQL sequence behind an ID series (see allocate_ids())."""
+    return f"api_idcounter_{series}_seq"
+
+
+def allocate_ids(series, count, first_free):
+    """
+    Reserve `count` numbers of an ID series in one round trip and return
+    them in ascending order.
+
+    On PostgreSQL a series is a sequence (created by migration) and the
+    numbers come from nextval(), which neither waits for nor holds a lock:
+    concurrent imports and registrations reserve blocks independently, and
+    the block of a rolled-back transaction is just a gap. A block is
+    consecutive unless another caller's nextval() calls interleave.
+
+    Elsewhere the block is taken from the series' IdCounter row with
+    UPDATE ... RETURNING, whose lock lasts until the surrounding
+    transaction ends (SQLite runs one writer at a time anyway).
+    `first_free` seeds that row the first time a series is used.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                [id_sequence_name(series), count],
+            )
+            return sorted(value for value, in cursor.fetchall())
+        table = connection.ops.quote_name(IdCounter._meta.db_table)
+        cursor.execute(
+            f"UPDATE {table} SET next_value = next_value + %s WHERE name = %s RETURNING next_value",
+            [count, series],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        IdCounter.objects.get_or_create(name=series, defaults={"next_value": first_free()})
+        return allocate_ids(series, count, first_free)
+    end = row[0]
+    return range(end - count, end)
+
+
+def generate_beneficiary_ids(count):
+    """
+    Reserve `count` beneficiary IDs: BEN100000, BEN100001, BEN100002, ...
+    Used by bulk importers to pre-assign IDs for a whole batch.
+    """
+    numbers = allocate_ids(BENEFICIARY_ID_SERIES, count, _first_free_beneficiary_number)
+    return [f"BEN{num:06d}" for num in numbers]
+
+
 def generate_beneficiary_id():
+    """Next beneficiary ID (assigned by Beneficiary.save())."""
+    return generate_beneficiary_ids(1)[0]
+
+
+class IdCounter(models.Model):
     """
-    Generate next beneficiary ID in sequence:
-    BEN100000, BEN100001, BEN100002, ...
+    Next free number of a sequential ID series outside PostgreSQL; see
+    allocate_ids().
     """
-    from api.models import Beneficiary  # local import to avoid circular import
-    try:
-        # Get the last beneficiary ordered by id (string, but fixed numeric width)
-        last_ben = Beneficiary.objects.all().order_by("-id").first()
-        if last_ben:
-            # Extract number from id like "BEN100005" -> 100005
-            num = int(last_ben.id.replace("BEN", ""))
-            return f"BEN{num + 1:06d}"
-        else:
-            return "BEN100000"
-    except Exception:
-        # Fallback if anything goes wrong (e.g., DB not ready yet)
-        return "BEN100000"
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
 
 
 class Profile(models.Model):
@@ -67,10 +126,10 @@ class Beneficiary(models.Model):
         (CASE4, "Case 4"),
     ]
 
+    # assigned on first save, so an unsaved instance takes no ID
     id = models.CharField(
         max_length=20,
         primary_key=True,
-        default=generate_beneficiary_id,
         editable=False,
     )
 
@@ -135,6 +194,8 @@ class Beneficiary(models.Model):
 
     eligibility_label = models.CharField(max_length=50, blank=True, null=True)
     model_score = models.FloatField(null=True, blank=True)
+    # scoring.score_fingerprint() of the inputs model_score was computed from
+    score_fingerprint = models.CharField(max_length=40, blank=True, default="")
     approval_flag = models.BooleanField(null=True, blank=True)
     other_details = models.JSONField(null=True, blank=True, default=dict)
 
@@ -191,7 +252,28 @@ class Beneficiary(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
-
+    class Meta:
+        indexes = [
+            # natural keys used by upsert imports
+            models.Index(fields=["phone"]),
+            models.Index(fields=["pincode", "name"]),
+            # dashboard rollup slices
+            models.Index(fields=["state", "district", "pincode", "officer"], name="ben_rollup_slice_idx"),
+            # daily registration summaries, and the officer listing's keyset order
+            models.Index(fields=["created_at", "id"], name="ben_created_idx"),
+            # officer listing filtered on one of these, in keyset order
+            models.Index(fields=["state", "created_at", "id"], name="ben_list_state_idx"),
+            models.Index(fields=["district", "created_at", "id"], name="ben_list_district_idx"),
+            models.Index(fields=["officer", "created_at", "id"], name="ben_list_officer_idx"),
+            models.Index(fields=["risk_band", "created_at", "id"], name="ben_list_risk_idx"),
+            models.Index(fields=["eligibility", "created_at", "id"], name="ben_list_eligibility_idx"),
+            models.Index(fields=["case_type", "created_at", "id"], name="ben_list_case_type_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.id:
+            self.id = generate_beneficiary_id()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} ({self.id})"
@@ -343,16 +425,53 @@ class ConsumptionData(models.Model):
     def __str__(self):
         return f"Consumption for {self.beneficiary.name}"
 
+class ScoreExplanation(models.Model):
+    """
+    One distinct (model, explanation text) pair. Score logs point here
+    instead of repeating the text; digest is the lookup key, since a
+    unique index on unbounded text is not an option.
+    """
+    model_used = models.CharField(max_length=100)
+    text = models.TextField()
+    digest = models.CharField(max_length=40, unique=True)
+
+    @staticmethod
+    def digest_for(model_used, text):
+        return hashlib.sha1(f"{model_used}\x00{text}".encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.digest = self.digest_for(self.model_used, self.text)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.model_used}: {self.text[:50]}"
+
+
 class AIScoreLog(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     beneficiary = models.ForeignKey(Beneficiary, on_delete=models.CASCADE, related_name="ai_logs")
     score = models.FloatField()
     risk_band = models.CharField(max_length=50)
     need_band = models.CharField(max_length=50)
-    explanation = models.TextField()
-    model_used = models.CharField(max_length=100, default="fallback")
+    reason = models.ForeignKey(ScoreExplanation, on_delete=models.PROTECT, related_name="logs")
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # a beneficiary's history, newest first, without touching other rows
+            models.Index(fields=["beneficiary", "-created_at"], name="ai_log_history_idx"),
+            # daily scoring summaries
+            models.Index(fields=["created_at"], name="ai_log_created_idx"),
+        ]
+
+    @property
+    def explanation(self):
+        return self.reason.text
+
+    @property
+    def model_used(self):
+        return self.reason.model_used
+
     def __str__(self):
         return f"AILog {self.score} for {self.beneficiary.name}"
 
@@ -439,10 +558,307 @@ class LoanApplication(models.Model):
         related_name="approved_loans"
     )
     decision_notes = models.TextField(blank=True)
+    # when the application was approved or rejected; None while pending
+    decided_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # pending applications per beneficiary, for the dashboard rollups
+            models.Index(fields=["status", "beneficiary"], name="loan_app_status_ben_idx"),
+            # daily decision summaries
+            models.Index(fields=["decided_at"], name="loan_app_decided_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.status == self.STATUS_PENDING:
+            self.decided_at = None
+        elif self.decided_at is None:
+            self.decided_at = timezone.now()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.beneficiary.name} - {self.loan_amount} ({self.status})"
 
 
+
+
+class ImportJob(models.Model):
+    """
+    A beneficiary file queued by officer_upload and processed by the
+    `process_imports` worker. rows_done + rows_failed is the checkpoint:
+    the row offset already committed, so a restarted worker resumes there.
+    """
+    STATUS_PENDING = "PENDING"
+    STATUS_RUNNING = "RUNNING"
+    STATUS_DONE = "DONE"
+    STATUS_FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    UPSERT_KEY_CHOICES = [
+        ("phone", "Phone"),
+        ("name_pincode", "Name + pincode"),
+    ]
+
+    officer = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="import_jobs",
+    )
+    file = models.FileField(upload_to="imports/")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+    )
+    # blank = plain insert; otherwise match existing rows on this natural key
+    upsert_key = models.CharField(max_length=20, choices=UPSERT_KEY_CHOICES, blank=True)
+    rows_done = models.PositiveIntegerField(default=0)
+    rows_inserted = models.PositiveIntegerField(default=0)
+    rows_updated = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    elapsed_seconds = models.FloatField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def offset(self):
+        return self.rows_done + self.rows_failed
+
+    @property
+    def rows_per_second(self):
+        return self.offset / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def __str__(self):
+        return f"ImportJob {self.pk} ({self.status})"
+
+
+class ImportRowError(models.Model):
+    """A row an ImportJob rejected, kept for the downloadable error report."""
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name="row_errors")
+    line = models.PositiveIntegerField()  # line number in the uploaded file
+    reason = models.CharField(max_length=256)
+    data = models.JSONField(default=dict)  # the raw CSV row
+
+    def __str__(self):
+        return f"Line {self.line}: {self.reason}"
+
+
+class FeatureVector(models.Model):
+    """
+    Denormalized scoring inputs: one narrow row per beneficiary, built by
+    api.features from Beneficiary, CaseDetails, LoanHistory and
+    ConsumptionData, with the derived ratios computed once. Columns named
+    after a scoring input hold exactly the value the scorer reads; the
+    CaseDetails figures and ratios have names of their own.
+    """
+    beneficiary = models.OneToOneField(
+        Beneficiary, on_delete=models.CASCADE, primary_key=True, related_name="features"
+    )
+    # Beneficiary
+    cibil_score = models.FloatField(null=True)
+    estimated_monthly_income = models.FloatField(null=True)
+    income_est = models.FloatField(null=True)
+    work_consistency_days = models.FloatField(null=True)
+    employment_type = models.CharField(max_length=50, null=True)
+    emi_due_delays = models.FloatField(null=True)
+    # CaseDetails
+    bank_balance = models.FloatField(null=True)
+    transactions_per_month = models.FloatField(null=True)
+    total_emi_per_month = models.FloatField(null=True)
+    active_loans = models.FloatField(null=True)
+    # LoanHistory
+    loans_total = models.PositiveIntegerField(default=0)
+    loans_paid = models.PositiveIntegerField(default=0)
+    loan_amount_total = models.FloatField(default=0)
+    # latest ConsumptionData, else the CaseDetails bills
+    monthly_bills = models.FloatField(null=True)
+    # derived
+    monthly_income = models.FloatField(null=True)
+    repaid_loan_ratio = models.FloatField(null=True)
+    emi_to_income_ratio = models.FloatField(null=True)
+    liquidity_ratio = models.FloatField(null=True)
+    bills_to_income_ratio = models.FloatField(null=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Features of {self.beneficiary_id}"
+
+
+class DashboardRollup(models.Model):
+    """
+    Dashboard counts for one (state, district, pincode, officer) slice of
+    the portfolio, maintained by api.dashboard. Missing region values are
+    stored as "" and a missing officer as 0, so every slice has exactly
+    one row. A stale row is recomputed from Beneficiary on the next read.
+    """
+    state = models.CharField(max_length=100, blank=True, default="")
+    district = models.CharField(max_length=100, blank=True, default="")
+    pincode = models.CharField(max_length=20, blank=True, default="")
+    officer_id = models.PositiveIntegerField(default=0)
+
+    total = models.PositiveIntegerField(default=0)
+    # rows with a score, and the sum of their model_score (for the average)
+    scored = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    high_risk = models.PositiveIntegerField(default=0)
+    low_risk = models.PositiveIntegerField(default=0)
+    eligible = models.PositiveIntegerField(default=0)
+    # one per dashboard.SCORE_BUCKETS entry
+    bucket_0 = models.PositiveIntegerField(default=0)
+    bucket_1 = models.PositiveIntegerField(default=0)
+    bucket_2 = models.PositiveIntegerField(default=0)
+    bucket_3 = models.PositiveIntegerField(default=0)
+    bucket_4 = models.PositiveIntegerField(default=0)
+    bucket_5 = models.PositiveIntegerField(default=0)
+    # PENDING loan applications of the slice's beneficiaries
+    pending_loans = models.PositiveIntegerField(default=0)
+
+    stale = models.BooleanField(default=False)
+    marked_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["state", "district", "pincode", "officer_id"],
+                name="dashboard_rollup_slice",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"Rollup {self.state or '-'}/{self.district or '-'}/{self.pincode or '-'}"
+            f"/{self.officer_id}"
+        )
+
+
+class DailySummary(models.Model):
+    """
+    Analytics counts for one calendar day (in the project time zone),
+    maintained by api.timeseries: registrations, scoring events from
+    AIScoreLog with their score histogram, and loan decisions. A stale row
+    is recomputed from those tables on the next read.
+    """
+    day = models.DateField(unique=True)
+
+    registrations = models.PositiveIntegerField(default=0)
+    # AIScoreLog entries of the day and the sum of their scores
+    scored = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    # one per dashboard.SCORE_BUCKETS entry
+    bucket_0 = models.PositiveIntegerField(default=0)
+    bucket_1 = models.PositiveIntegerField(default=0)
+    bucket_2 = models.PositiveIntegerField(default=0)
+    bucket_3 = models.PositiveIntegerField(default=0)
+    bucket_4 = models.PositiveIntegerField(default=0)
+    bucket_5 = models.PositiveIntegerField(default=0)
+    approvals = models.PositiveIntegerField(default=0)
+    rejections = models.PositiveIntegerField(default=0)
+
+    stale = models.BooleanField(default=False)
+    marked_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Summary {self.day}"
+
+
+class RescoreRun(models.Model):
+    """
+    One `rescore_all` pass over the portfolio. last_id is the checkpoint:
+    every beneficiary with a smaller or equal pk has been rescored, so an
+    interrupted or time-boxed run resumes right after it.
+    """
+    STATUS_RUNNING = "RUNNING"
+    STATUS_PAUSED = "PAUSED"
+    STATUS_DONE = "DONE"
+    STATUS_FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_PAUSED, "Paused"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    last_id = models.CharField(max_length=20, blank=True)
+    rows_scored = models.PositiveIntegerField(default=0)
+    rows_changed = models.PositiveIntegerField(default=0)
+    # credit_score scorecard versions scored alongside the active one, and
+    # their comparison with it ({label: api.shadow counts})
+    shadow_versions = models.JSONField(default=list, blank=True)
+    shadow_report = models.JSONField(default=dict, blank=True)
+    # compare shadows only; leave the stored scores alone
+    compare_only = models.BooleanField(default=False)
+    elapsed_seconds = models.FloatField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def rows_per_second(self):
+        return self.rows_scored / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def __str__(self):
+        return f"RescoreRun {self.pk} ({self.status})"
+
+
+class DirtyBeneficiary(models.Model):
+    """
+    Rescore queue: a beneficiary whose scoring inputs changed since it was
+    last scored. Filled by api.signals, drained by `rescore_all --dirty`.
+    """
+    beneficiary = models.OneToOneField(
+        Beneficiary,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+    )
+    queued_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.beneficiary_id} (queued {self.queued_at:%Y-%m-%d %H:%M})"
+
+
+class Scorecard(models.Model):
+    """
+    A stored scorecard definition (see api.scorecards for the format).
+    The newest active version of a name replaces the built-in definition.
+    """
+    name = models.CharField(max_length=50)
+    version = models.PositiveIntegerField()
+    definition = models.JSONField()
+    is_active = models.BooleanField(default=False)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "version"], name="unique_scorecard_version"),
+        ]
+
+    def clean(self):
+        from .scorecards import CompiledScorecard
+
+        try:
+            CompiledScorecard(self.name, self.definition)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValidationError({"definition": f"Invalid scorecard: {exc}"})
+
+    def __str__(self):
+        return f"{self.name} v{self.version}{' (active)' if self.is_active else ''}"
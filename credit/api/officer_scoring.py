@@ -0,0 +1,102 @@
+"""
+Officer fallback scoring, one beneficiary or many.
+
+The officer_fallback scorecard scores a beneficiary from their number of
+paid loans and income_est. iter_fallback_scores() applies it to a whole
+queryset in pk-ordered chunks: per chunk one query for the beneficiaries,
+one aggregate query for their paid-loan counts, one UPDATE per distinct
+result and one bulk insert of score log entries, whatever the chunk size.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from .dashboard import mark_stale
+from .models import Beneficiary, LoanHistory
+from .score_log import ScoreLogWriter
+from .scorecards import get_scorecard
+
+
+DEFAULT_CHUNK_SIZE = 1000
+EXPLANATION = "Fallback scoring algorithm used."
+MODEL_USED = "fallback"  # the score log label readers of the log already know
+
+
+def fallback_score(card, paid_loans, income_est):
+    """(score, risk_band, need_band, eligibility) under officer_fallback `card`."""
+    score = card.params["base_score"] + paid_loans * card.params["points_per_paid_loan"]
+    return (
+        score,
+        card.lookup("risk_band", score),
+        card.lookup("need_band", income_est or 0),
+        card.lookup("eligibility", score),
+    )
+
+
+def paid_loan_counts(beneficiary_ids):
+    """{beneficiary id: number of Paid loans}, omitting beneficiaries with none."""
+    return dict(
+        LoanHistory.objects.filter(beneficiary_id__in=beneficiary_ids, repayment_status="Paid")
+        .values("beneficiary_id")
+        .annotate(paid=Count("pk"))
+        .values_list("beneficiary_id", "paid")
+    )
+
+
+def select_beneficiaries(ids=None, state=None, district=None, officer=None, unscored=False):
+    """The beneficiaries to batch-score: given IDs and/or filter values."""
+    queryset = Beneficiary.objects.all()
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    if state:
+        queryset = queryset.filter(state__iexact=state)
+    if district:
+        queryset = queryset.filter(district__iexact=district)
+    if officer is not None:
+        queryset = queryset.filter(officer_id=officer)
+    if unscored:
+        queryset = queryset.filter(score__isnull=True)
+    return queryset
+
+
+def iter_fallback_scores(queryset, chunk_size=DEFAULT_CHUNK_SIZE, card=None):
+    """
+    Score every beneficiary in `queryset`, store the results and log them,
+    yielding a result dict per beneficiary in pk order. Each chunk is
+    written in its own transaction before its results are yielded.
+    """
+    card = card or get_scorecard("officer_fallback")
+    log = ScoreLogWriter(batch_size=chunk_size + 1)  # flushed per chunk, below
+    queryset = queryset.order_by("pk")
+    after = None
+    while True:
+        chunk = queryset if after is None else queryset.filter(pk__gt=after)
+        rows = list(chunk.values_list("pk", "income_est")[:chunk_size])
+        if not rows:
+            return
+        after = rows[-1][0]
+        paid = paid_loan_counts([pk for pk, _ in rows])
+
+        results = [fallback_score(card, paid.get(pk, 0), income_est) for pk, income_est in rows]
+        groups = defaultdict(list)
+        for (pk, _), result in zip(rows, results):
+            groups[result].append(pk)
+        with transaction.atomic():
+            for (score, risk_band, need_band, eligibility), pks in groups.items():
+                Beneficiary.objects.filter(pk__in=pks).update(
+                    score=score, risk_band=risk_band, need_band=need_band, eligibility=eligibility,
+                )
+            mark_stale(Beneficiary.objects.filter(pk__in=[pk for pk, _ in rows]))
+            for (pk, _), (score, risk_band, need_band, _) in zip(rows, results):
+                log.add(pk, score, risk_band, need_band, EXPLANATION, MODEL_USED)
+            log.flush()
+
+        for (pk, _), (score, risk_band, need_band, eligibility) in zip(rows, results):
+            yield {
+                "id": pk,
+                "score": score,
+                "risk_band": risk_band,
+                "need_band": need_band,
+                "eligibility": eligibility,
+            }
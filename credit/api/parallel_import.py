@@ -0,0 +1,106 @@
+"""
+Multi-process parse stage for large beneficiary imports.
+
+The file is cut into byte ranges ending on line boundaries. A process pool
+decodes, validates and transforms each range with parse_row(), and the
+parent consumes the results in file order, so it stays the single DB
+writer. Shards are cut on raw newlines: quoted fields must not contain
+line breaks in files imported this way.
+
+Nothing here imports Django models at module level, because spawned
+workers import this module before Django is set up.
+"""
+import collections
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+DEFAULT_SHARD_BYTES = 8 * 1024 * 1024
+
+
+def plan_shards(path, shard_bytes=DEFAULT_SHARD_BYTES):
+    """
+    Return (fieldnames, [(start, end), ...]) for the data rows of the CSV
+    at `path`; every range ends right after a newline (or at EOF).
+    """
+    with open(path, "rb") as fh:
+        header = fh.readline()
+        size = os.fstat(fh.fileno()).st_size
+        shards = []
+        start = fh.tell()
+        while start < size:
+            fh.seek(min(start + shard_bytes, size))
+            if fh.tell() < size:
+                fh.readline()  # run on to the end of the current line
+            end = fh.tell()
+            shards.append((start, end))
+            start = end
+    fieldnames = next(csv.reader([header.decode("utf-8-sig")]), [])
+    return fieldnames, shards
+
+
+def _init_worker(settings_module, scorecards=None):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+    if scorecards:
+        from .scorecards import install_scorecards
+        install_scorecards(scorecards)
+
+
+def _parse_shard(path, fieldnames, start, end):
+    """
+    Worker: parse one byte range. Returns the iter_parsed() entries for it
+    (line numbers relative to the shard) and the number of lines it spans.
+    """
+    from .importer import iter_parsed
+
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        data = fh.read(end - start)
+    reader = csv.DictReader(io.StringIO(data.decode("utf-8"), newline=""), fieldnames=fieldnames)
+    entries = list(iter_parsed(reader))
+    lines = data.count(b"\n") + (0 if data.endswith(b"\n") else 1)
+    return entries, lines
+
+
+def iter_parsed_parallel(path, workers=None, shard_bytes=DEFAULT_SHARD_BYTES):
+    """
+    Same stream as api.importer.iter_parsed(), produced by `workers`
+    processes. At most 2 * workers shards are in flight, so memory stays
+    bounded even when the writer is slower than the parsers.
+    """
+    from django.conf import settings
+    from .scorecards import export_scorecards
+
+    workers = workers or os.cpu_count() or 1
+    fieldnames, shards = plan_shards(path, shard_bytes)
+    shards = iter(shards)
+    line_offset = 1  # the header line
+    # spawn, not fork: a forked child would share the parent's DB socket
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        # parse_row() derives income_category from the "income" scorecard
+        initargs=(settings.SETTINGS_MODULE, export_scorecards(["income"])),
+    )
+    try:
+        pending = collections.deque(
+            pool.submit(_parse_shard, path, fieldnames, start, end)
+            for start, end in itertools.islice(shards, workers * 2)
+        )
+        while pending:
+            entries, lines = pending.popleft().result()
+            shard = next(shards, None)
+            if shard is not None:
+                pending.append(pool.submit(_parse_shard, path, fieldnames, *shard))
+            for line, parsed, reason, row in entries:
+                yield line_offset + line, parsed, reason, row
+            line_offset += lines
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,194 @@
+"""
+Multi-process batch scoring over shared memory.
+
+ParallelScorer is a drop-in for scoring.score_batch(): the scoring input
+columns of a batch (other columns are left out) are copied once into
+multiprocessing.shared_memory blocks, a
+process pool scores contiguous slices of them through zero-copy views,
+and each worker writes its block scores and final scores straight into
+shared output arrays. The parent then derives risk bands and eligibility
+labels from the gathered scores with one searchsorted per ladder, and
+returns a BatchScores ready for a single bulk write.
+
+Nothing here imports Django models at module level, because spawned
+workers import this module before Django is set up.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+BLOCK_NAMES = ("repayment", "debt", "income", "banking", "flags")
+OUTPUTS = ("score",) + BLOCK_NAMES
+
+
+class _SharedArrays:
+    """Named 1-D arrays living in shared memory blocks."""
+
+    def __init__(self):
+        self.blocks = []
+        self.specs = {}  # name -> (shm name, dtype str, length)
+
+    def add(self, name, array):
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.blocks.append(block)
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        view[:] = array
+        self.specs[name] = (block.name, array.dtype.str, len(array))
+        return view
+
+    def empty(self, name, dtype, length):
+        return self.add(name, np.zeros(length, dtype=dtype))
+
+    def release(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def _attach(specs):
+    blocks, arrays = [], {}
+    for name, (shm_name, dtype, length) in specs.items():
+        block = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)
+    return blocks, arrays
+
+
+def _fill_slice(columns, results, categories, card_name, definition, start, stop):
+    from .scorecards import CompiledScorecard
+    from .scoring import score_batch
+
+    features = {}
+    for name, column in columns.items():
+        view = column[start:stop]  # zero-copy
+        if name in categories:
+            view = np.asarray(categories[name], dtype=object)[view]
+        features[name] = view
+    batch = score_batch(features, size=stop - start, card=CompiledScorecard(card_name, definition))
+    results["score"][start:stop] = batch.score
+    for name in BLOCK_NAMES:
+        results[name][start:stop] = batch.blocks[name]
+
+
+def _score_slice(inputs, outputs, categories, card_name, definition, start, stop):
+    """Worker: score rows [start, stop) of the shared inputs into the shared outputs."""
+    in_blocks, columns = _attach(inputs)
+    out_blocks, results = _attach(outputs)
+    try:
+        _fill_slice(columns, results, categories, card_name, definition, start, stop)
+    finally:
+        # the views must go before their blocks can be closed
+        del columns, results
+        for block in in_blocks + out_blocks:
+            try:
+                block.close()
+            except BufferError:  # a traceback still holds a view
+                pass
+    return stop - start
+
+
+class ParallelScorer:
+    """
+    Callable like score_batch(features, size=None, card=None), fanning the
+    batch out over `workers` processes in slices of at least `min_slice`
+    rows. Use as a context manager, or call close(), to stop the pool.
+    """
+
+    def __init__(self, workers=None, min_slice=10000):
+        from django.conf import settings
+        from .parallel_import import _init_worker
+
+        self.workers = workers or os.cpu_count() or 1
+        self.min_slice = min_slice
+        # spawn, not fork: a forked child would share the parent's DB socket
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.SETTINGS_MODULE,),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def _slices(self, size):
+        step = max(self.min_slice, -(-size // self.workers))
+        return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+    def __call__(self, features, size=None, card=None):
+        from .scorecards import get_scorecard
+        from .scoring import BatchScores, NUMERIC_FEATURES, SCORE_INPUTS, score_batch
+
+        card = card or get_scorecard("credit_score")
+        if size is None:
+            size = len(next(iter(features.values()))) if features else 0
+        if size <= self.min_slice:
+            return score_batch(features, size=size, card=card)
+
+        shared = _SharedArrays()
+        results = None
+        try:
+            categories = {}
+            for name, values in features.items():
+                if name not in SCORE_INPUTS:
+                    continue  # e.g. stored scores, which only the caller reads
+                if name in NUMERIC_FEATURES:
+                    shared.add(name, np.asarray(values, dtype=float))
+                    continue
+                values = np.asarray(values, dtype=object)
+                if name == "employment_type":
+                    # text goes over as codes into a small category list
+                    values = np.where(values == None, "", values).astype(str)  # noqa: E711
+                    labels, codes = np.unique(values, return_inverse=True)
+                    categories[name] = labels.tolist()
+                    shared.add(name, codes.reshape(-1).astype(np.int32))
+                else:
+                    shared.add(name, values.astype(bool))
+            inputs = dict(shared.specs)
+            # one row scored here gives the output dtypes, which depend only
+            # on the card (float ladder values make float blocks)
+            probe = score_batch(
+                {name: features[name][:1] for name in SCORE_INPUTS if name in features},
+                size=1, card=card,
+            )
+            dtypes = {"score": probe.score.dtype}
+            dtypes.update((name, probe.blocks[name].dtype) for name in BLOCK_NAMES)
+            results = {
+                name: shared.empty(name, dtypes[name], size) for name in OUTPUTS
+            }
+            outputs = {name: shared.specs[name] for name in OUTPUTS}
+
+            futures = [
+                self.pool.submit(
+                    _score_slice, inputs, outputs, categories,
+                    card.name, card.definition, start, stop,
+                )
+                for start, stop in self._slices(size)
+            ]
+            wait(futures)
+            for future in futures:
+                future.result()  # re-raise worker errors
+
+            score = results["score"].copy()
+            blocks = {name: results[name].copy() for name in BLOCK_NAMES}
+        finally:
+            results = None  # drop the views before unlinking their blocks
+            shared.release()
+        return BatchScores(
+            blocks,
+            score,
+            card.ladders["risk_band"].lookup_many(score),
+            card.ladders["eligibility"].lookup_many(score),
+        )
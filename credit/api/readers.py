@@ -0,0 +1,146 @@
+"""
+Row readers for officer uploads.
+
+Readers yield one dict of strings per data row (like csv.DictReader) and
+never hold the whole file in memory, so any of them can be fed straight
+into api.importer.import_rows(). open_rows() picks one by file extension.
+"""
+import codecs
+import csv
+import os
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_chunks(fileobj, chunk_size):
+    # Django UploadedFile objects know how to chunk themselves
+    # (in-memory or temp file); plain file objects fall back to read().
+    if hasattr(fileobj, "chunks"):
+        yield from fileobj.chunks(chunk_size)
+        return
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def iter_text_lines(fileobj, encoding="utf-8-sig", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Decode a binary file chunk by chunk and yield complete lines
+    (line endings kept, as the csv module expects).
+    The default "utf-8-sig" codec drops the BOM Excel puts on CSV exports.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    for chunk in _iter_chunks(fileobj, chunk_size):
+        pending += decoder.decode(chunk)
+        # split on "\n" only: str.splitlines() also breaks on \x0c,
+        # etc., which would cut a record in two. Whatever follows the last
+        # "\n" is a partial line and waits for the next chunk.
+        end = pending.rfind("\n")
+        if end == -1:
+            continue
+        lines = pending[:end].split("\n")
+        pending = pending[end + 1:]
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(fileobj, encoding="utf-8-sig", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lazily yield csv.DictReader rows from a binary upload."""
+    return csv.DictReader(iter_text_lines(fileobj, encoding=encoding, chunk_size=chunk_size))
+
+
+def _cell_str(value):
+    # parse_row() expects CSV-style strings; whole-number floats become
+    # "30", not "30.0", so integer columns still validate
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class XlsxRows:
+    """
+    Rows of the first worksheet of an .xlsx file, header in row 1.
+    Uses openpyxl's read-only mode, which streams rows from the archive.
+    """
+
+    def __init__(self, fileobj):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("XLSX uploads need the openpyxl package installed.") from None
+        self._workbook = load_workbook(fileobj, read_only=True, data_only=True)
+        self._rows = self._workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(self._rows, ())
+        self.fieldnames = [_cell_str(v) for v in header]
+        self.line_num = 1
+
+    def __iter__(self):
+        try:
+            for values in self._rows:
+                self.line_num += 1
+                if not any(v is not None for v in values):
+                    continue
+                yield dict(zip(self.fieldnames, map(_cell_str, values)))
+        finally:
+            self._workbook.close()
+
+
+class ParquetRows:
+    """
+    Rows of a Parquet file, read one record batch at a time. Each column
+    of a batch is cast to strings with a single Arrow kernel call instead
+    of converting cell by cell in Python.
+    """
+
+    def __init__(self, fileobj, batch_size=10000):
+        try:
+            import pyarrow
+            import pyarrow.compute
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Parquet uploads need the pyarrow package installed.") from None
+        self._pa = pyarrow
+        self._cast = pyarrow.compute.cast
+        self._file = pyarrow.parquet.ParquetFile(fileobj)
+        self._batch_size = batch_size
+        self.fieldnames = self._file.schema_arrow.names
+        self.line_num = 1  # record number, counting a notional header
+
+    def __iter__(self):
+        string = self._pa.string()
+        for batch in self._file.iter_batches(batch_size=self._batch_size):
+            columns = [
+                self._cast(column, string).to_pylist() for column in batch.columns
+            ]
+            for values in zip(*columns):
+                self.line_num += 1
+                yield dict(zip(self.fieldnames, values))
+
+
+READERS = {
+    ".csv": iter_csv_rows,
+    ".xlsx": XlsxRows,
+    ".parquet": ParquetRows,
+}
+
+
+def open_rows(fileobj, name):
+    """
+    Row reader for an open binary upload, chosen by `name`'s extension;
+    anything that is not .xlsx or .parquet is read as CSV.
+    """
+    ext = os.path.splitext(name)[1].lower()
+    return READERS.get(ext, iter_csv_rows)(fileobj)
@@ -0,0 +1,145 @@
+"""
+Score history: buffered AIScoreLog writes and per-beneficiary trends.
+
+ScoreLogWriter collects log entries and inserts them with bulk_create(),
+so scoring many beneficiaries costs one INSERT per batch instead of one
+per row. The explanation text and model label of each entry are stored
+once in ScoreExplanation and referenced by id; the writer resolves all
+new pairs of a batch in two queries and remembers them for later batches.
+Resolved pairs are also remembered per process once their transaction
+commits, so a single log_score() for a known pair is just its INSERT.
+Each flush marks the daily summaries of its entries' days stale.
+
+score_history() reads one beneficiary's entries through the
+(beneficiary, -created_at) index, newest first, and returns them
+oldest-first with the change from the previous score.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AIScoreLog, Beneficiary, ScoreExplanation
+from .timeseries import day_of, mark_days_stale
+
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_HISTORY_LIMIT = 50
+KNOWN_LIMIT = 1024  # explanation ids remembered per process
+
+_known = {}  # (model_used, text) -> ScoreExplanation id, committed ones only
+
+
+def _remember(reasons):
+    if len(_known) + len(reasons) > KNOWN_LIMIT:
+        _known.clear()
+    _known.update(reasons)
+
+
+def forget_explanations():
+    _known.clear()
+
+
+class ScoreLogWriter:
+    """
+    Buffer of AIScoreLog rows, flushed every `batch_size` entries and on
+    leaving the `with` block (call flush() when not used as a context
+    manager).
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.pending = []  # (log, (model_used, text))
+        self.reasons = {}  # (model_used, text) -> ScoreExplanation id
+        self.written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, beneficiary, score, risk_band, need_band, explanation, model_used,
+            created_at=None):
+        """Queue one entry; `beneficiary` may be an instance or a pk."""
+        log = AIScoreLog(
+            score=score, risk_band=risk_band, need_band=need_band,
+            created_at=created_at or timezone.now(),
+        )
+        if isinstance(beneficiary, Beneficiary):
+            log.beneficiary = beneficiary
+        else:
+            log.beneficiary_id = beneficiary
+        self.pending.append((log, (model_used, explanation)))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def _resolve(self, keys):
+        for key in keys:
+            if key not in self.reasons and key in _known:
+                self.reasons[key] = _known[key]
+        missing = {key: ScoreExplanation.digest_for(*key) for key in keys if key not in self.reasons}
+        if not missing:
+            return
+        ScoreExplanation.objects.bulk_create(
+            [
+                ScoreExplanation(model_used=model_used, text=text, digest=digest)
+                for (model_used, text), digest in missing.items()
+            ],
+            ignore_conflicts=True,  # another writer may have added the same pair
+        )
+        ids = dict(
+            ScoreExplanation.objects.filter(digest__in=missing.values()).values_list("digest", "pk")
+        )
+        resolved = {key: ids[digest] for key, digest in missing.items()}
+        self.reasons.update(resolved)
+        # a rolled-back insert must not be handed to other writers
+        transaction.on_commit(lambda: _remember(resolved))
+
+    def flush(self):
+        """Insert the buffered entries; returns how many were written."""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, []
+        self._resolve({key for _, key in pending})
+        logs = []
+        for log, key in pending:
+            log.reason_id = self.reasons[key]
+            logs.append(log)
+        AIScoreLog.objects.bulk_create(logs, batch_size=self.batch_size)
+        mark_days_stale({day_of(log.created_at) for log in logs})
+        self.written += len(logs)
+        return len(logs)
+
+
+def log_score(beneficiary, score, risk_band, need_band, explanation, model_used):
+    """Write a single score log entry (a one-entry ScoreLogWriter)."""
+    with ScoreLogWriter() as writer:
+        writer.add(beneficiary, score, risk_band, need_band, explanation, model_used)
+
+
+def score_history(beneficiary_id, limit=DEFAULT_HISTORY_LIMIT, since=None):
+    """
+    The latest `limit` score log entries of one beneficiary (after `since`
+    if given), oldest first, as dicts with the score's change from the
+    entry before it. Only the beneficiary's own index range is read.
+    """
+    logs = AIScoreLog.objects.filter(beneficiary_id=beneficiary_id)
+    if since is not None:
+        logs = logs.filter(created_at__gt=since)
+    rows = list(
+        logs.order_by("-created_at")
+        .values_list("created_at", "score", "risk_band", "need_band", "reason__model_used")[:limit]
+    )
+    history = []
+    previous = None
+    for created_at, score, risk_band, need_band, model_used in reversed(rows):
+        history.append({
+            "at": created_at,
+            "score": score,
+            "change": None if previous is None else score - previous,
+            "risk_band": risk_band,
+            "need_band": need_band,
+            "model_used": model_used,
+        })
+        previous = score
+    return history
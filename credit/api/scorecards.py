@@ -0,0 +1,298 @@
+"""
+Declarative scorecards.
+
+A scorecard is data: named ladders (sorted bin edges plus the value for
+each bin), block weights and a few scalar params. Built-in definitions
+live in DEFAULT_SCORECARDS; an active Scorecard row in the database with
+the same name overrides them, so a new scorecard version is a data change.
+
+Definitions are compiled on first use into sorted float arrays and cached
+per process. Saving a Scorecard clears the cache of that process; every
+process also re-reads the generation of the active rows (their count,
+newest pk and newest updated_at) at most every CACHE_TTL seconds and
+drops its compiled cards when it has moved, so an activation made
+elsewhere, even by a queryset update(), is picked up within the TTL. A
+ladder lookup is then one binary search: bisect for a single value,
+np.searchsorted for a whole column.
+
+Ladder format::
+
+    {"edges": [600, 650, 720, 780], "values": [0, 10, 20, 30, 40]}
+
+values[i] applies from edges[i-1] up to edges[i]; an edge is reached at
+x >= edge. With "op": ">" every edge is reached only at x > edge, and a
+single edge can be written {">": 100000} to mix the two.
+"""
+import bisect
+import hashlib
+import json
+import time
+
+import numpy as np
+
+
+DEFAULT_SCORECARDS = {
+    # scoring.compute_credit_score() / score_batch()
+    "credit_score": {
+        "version": 1,
+        "ladders": {
+            "on_time_ratio": {"edges": [0.80, 0.95], "values": [10, 25, 40]},
+            "max_dpd_penalty": {"op": ">", "edges": [0, 30, 90], "values": [0, 5, 15, 25]},
+            "missed_emi_penalty": {"edges": [3], "values": [0, 10]},
+            "cibil": {"edges": [600, 650, 720, 780], "values": [0, 10, 20, 30, 40]},
+            "dti_penalty": {"op": ">", "edges": [0.25, 0.40, 0.60], "values": [0, 15, 30, 50]},
+            "active_loans_penalty": {"op": ">", "edges": [1, 3, 5], "values": [0, 10, 20, 30]},
+            "income": {"edges": [8000, 15000, 30000, 60000], "values": [10, 25, 40, 50, 60]},
+            "liquidity": {"edges": [0.2, 0.5, 1.0], "values": [10, 20, 30, 40]},
+            "utility_ontime": {"edges": [0.7, 0.9], "values": [10, 25, 40]},
+            "hard_inquiries_penalty": {"op": ">", "edges": [1, 4], "values": [0, 20, 40]},
+            "risk_band": {
+                "edges": [650, 700, 750, 800],
+                "values": ["Very_High_Risk", "High_Risk", "Medium_Risk", "Low_Risk", "Very_Low_Risk"],
+            },
+            "eligibility": {
+                "edges": [700, 750],
+                "values": ["Not_Eligible", "Eligible_Manual", "Eligible_Auto"],
+            },
+        },
+        "weights": {"repayment": 0.35, "debt": 0.20, "income": 0.20, "banking": 0.15, "flags": 0.10},
+        "params": {
+            "repayment_cap": 60,
+            "stable_employment": ["salaried", "government"],
+            "stable_min_days": 25,
+            "stable_points": 40,
+            "business_employment": ["self-employed", "business"],
+            "business_min_years": 3,
+            "business_points": 30,
+            "irregular_below_days": 20,
+            "irregular_points": 15,
+            "other_stability_points": 20,
+            "digital_active_frequency": 15,
+            "digital_active_transactions": 20,
+            "digital_active_points": 20,
+            "digital_some_frequency": 5,
+            "digital_some_points": 10,
+            "digital_other_points": 5,
+            "score_floor": 300,
+            "score_range": 600,
+        },
+    },
+    # income_category and bill-based income estimates
+    "income": {
+        "version": 1,
+        "ladders": {
+            "category": {
+                "edges": [10000, 25000, 40000, 75000, {">": 100000}],
+                "values": ["very low", "low", "lower medium", "medium", "upper medium", "high"],
+            },
+            "bills_to_income": {
+                "op": ">", "edges": [0, 1000, 2000, 4000], "values": [0, 6000, 10000, 16000, 25000],
+            },
+        },
+    },
+    # views.case1_input()
+    "case1_income": {
+        "version": 1,
+        "ladders": {
+            "electricity": {"op": ">", "edges": [300, 600], "values": [5, 15, 30]},
+            "mobile": {"op": ">", "edges": [100, 200], "values": [5, 15, 25]},
+            "utilities": {"op": ">", "edges": [200, 500], "values": [3, 7, 10]},
+            "income_band": {
+                "op": ">", "edges": [20, 40, 60, 80],
+                "values": ["< 10,000", "10,000 – 25,000", "25,000 – 40,000",
+                           "40,000 – 75,000", "75,000 – 1,00,000"],
+            },
+            "income_value": {
+                "op": ">", "edges": [20, 40, 60, 80], "values": [8000, 18000, 32000, 55000, 90000],
+            },
+            "risk_band": {"op": ">", "edges": [20, 40], "values": ["Low", "Medium", "High"]},
+            "need_band": {"op": ">", "edges": [20, 40], "values": ["High", "Medium", "High"]},
+        },
+    },
+    # views.beneficiary_calculate()
+    "loan_estimate": {
+        "version": 1,
+        "ladders": {
+            "loan_amount_penalty": {"op": ">", "edges": [100000], "values": [0, 20]},
+            "tenure": {"edges": [12, 24], "values": [0, 15, 30]},
+            "bills": {"op": ">", "edges": [2000, 5000], "values": [0, 20, 40]},
+            "risk_band": {"op": ">", "edges": [650], "values": ["High Risk", "Low Risk"]},
+            "need_band": {"op": ">", "edges": [50000], "values": ["Low Need", "High Need"]},
+        },
+        "params": {"base_score": 600, "min_score": 300, "max_score": 900},
+    },
+    # views.officer_score() fallback scoring
+    "officer_fallback": {
+        "version": 1,
+        "ladders": {
+            "risk_band": {"op": ">", "edges": [650], "values": ["High Risk", "Low Risk"]},
+            "need_band": {"edges": [50000], "values": ["High Need", "Low Need"]},
+            "eligibility": {"op": ">", "edges": [600], "values": ["Not Eligible", "Eligible"]},
+        },
+        "params": {"base_score": 600, "points_per_paid_loan": 50},
+    },
+}
+
+
+class Ladder:
+    """A compiled ladder; edges are stored as ">=" thresholds."""
+
+    def __init__(self, edges, values):
+        self.edges = edges  # list, for bisect
+        self.edge_array = np.array(edges, dtype=float)
+        self.values = values
+        if all(type(v) is int for v in values):
+            dtype = np.int64
+        elif all(type(v) in (int, float) for v in values):
+            dtype = float
+        else:
+            dtype = object
+        self.value_array = np.array(values, dtype=dtype)
+
+    def lookup(self, x):
+        return self.values[bisect.bisect_right(self.edges, x)]
+
+    def lookup_many(self, xs):
+        return self.value_array[np.searchsorted(self.edge_array, xs, side="right")]
+
+
+def compile_ladder(spec):
+    op = spec.get("op", ">=")
+    edges = []
+    for edge in spec["edges"]:
+        edge_op = op
+        if isinstance(edge, dict):
+            (edge_op, edge), = edge.items()
+        if edge_op not in (">=", ">"):
+            raise ValueError(f"Unknown ladder operator {edge_op!r}.")
+        edge = float(edge)
+        # x > e is exactly x >= the next float above e
+        edges.append(float(np.nextafter(edge, np.inf)) if edge_op == ">" else edge)
+    if edges != sorted(edges):
+        raise ValueError("Ladder edges must be in ascending order.")
+    values = list(spec["values"])
+    if len(values) != len(edges) + 1:
+        raise ValueError("A ladder needs exactly one more value than it has edges.")
+    return Ladder(edges, values)
+
+
+class CompiledScorecard:
+
+    def __init__(self, name, definition):
+        self.name = name
+        self.version = definition.get("version", 1)
+        self.definition = definition
+        self.ladders = {
+            key: compile_ladder(spec) for key, spec in definition.get("ladders", {}).items()
+        }
+        self.weights = dict(definition.get("weights", {}))
+        self.params = dict(definition.get("params", {}))
+        # identifies the exact rules, for score fingerprints
+        self.digest = hashlib.sha1(
+            json.dumps([name, definition], sort_keys=True).encode()
+        ).hexdigest()
+
+    @property
+    def label(self):
+        return f"{self.name} v{self.version}"
+
+    def lookup(self, ladder, x):
+        return self.ladders[ladder].lookup(x)
+
+    def __repr__(self):
+        return f"<CompiledScorecard {self.name} v{self.version}>"
+
+
+CACHE_TTL = 5  # seconds between generation checks
+
+_cache = {}
+_checked_at = None
+_generation = None
+_pinned = False
+
+
+def _active_generation():
+    from django.db.models import Count, Max
+
+    from .models import Scorecard
+
+    return tuple(
+        Scorecard.objects.filter(is_active=True)
+        .aggregate(Count("pk"), Max("pk"), Max("updated_at")).values()
+    )
+
+
+def _check_generation():
+    # drop the compiled cards once the active rows have changed
+    global _checked_at, _generation
+    if _pinned:
+        return
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < CACHE_TTL:
+        return
+    generation = _active_generation()
+    if generation != _generation:
+        _cache.clear()
+        _generation = generation
+    _checked_at = now
+
+
+def get_scorecard(name, version=None):
+    """
+    The compiled scorecard called `name`. By default the active one: the
+    newest active Scorecard row, else the built-in definition. A given
+    `version` is looked up whether active or not (the built-in counts as
+    the version it declares); LookupError if there is no such version.
+    """
+    _check_generation()
+    key = (name, version)
+    card = _cache.get(key)
+    if card is None:
+        from .models import Scorecard
+
+        rows = Scorecard.objects.filter(name=name)
+        rows = rows.filter(is_active=True) if version is None else rows.filter(version=version)
+        row = rows.order_by("-version").values_list("version", "definition").first()
+        if row is not None:
+            found, definition = row
+            card = CompiledScorecard(name, dict(definition, version=found))
+        elif name in DEFAULT_SCORECARDS and (
+            version is None or DEFAULT_SCORECARDS[name].get("version", 1) == version
+        ):
+            card = CompiledScorecard(name, DEFAULT_SCORECARDS[name])
+        else:
+            raise LookupError(f"No scorecard {name} v{version}.")
+        _cache[key] = card
+    return card
+
+
+def clear_cache():
+    global _checked_at
+    _cache.clear()
+    _checked_at = None
+
+
+def export_scorecards(keys):
+    """
+    {(name, version): definition} for install_scorecards(); a key may be a
+    bare name, meaning the active version.
+    """
+    keys = [(key, None) if isinstance(key, str) else tuple(key) for key in keys]
+    return {key: get_scorecard(*key).definition for key in keys}
+
+
+def install_scorecards(definitions):
+    """
+    Compile and cache `definitions` without reading the database, so pool
+    workers score with exactly the rules their parent exported. The cache
+    of the process is pinned: no generation checks drop them.
+    """
+    global _pinned
+    _pinned = True
+    for (name, version), definition in definitions.items():
+        _cache[name, version] = CompiledScorecard(name, definition)
+
+
+def income_category_for(base):
+    """Map a monthly income figure to the income_category ladder."""
+    return get_scorecard("income").lookup("category", base)
@@ -0,0 +1,700 @@
+"""
+Credit scoring.
+
+compute_credit_score() is the rule-based scorer for one beneficiary, and
+score_beneficiary() memoizes it on the row for the score pages.
+score_batch() applies the same rules to whole columns at once: each feature
+is a NumPy array, every if/elif band becomes one np.digitize() or
+np.select() call, and the result is one array per block score plus the
+300-900 score, risk band and eligibility label.
+For the same inputs it returns exactly what compute_credit_score() returns.
+
+iter_scored_chunks() feeds it straight from the database, reading only the
+feature columns with values_list() in primary-key order, and run_rescore()
+(the `rescore_all` command) writes whole-portfolio results back.
+"""
+import collections
+import contextlib
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.utils import timezone
+
+from . import shadow
+from .dashboard import mark_slices_stale, mark_stale, slice_of
+from .models import Beneficiary, DirtyBeneficiary, RescoreRun
+from .scorecards import export_scorecards, get_scorecard
+
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Inputs read by the scalar scorer. Those missing on Beneficiary are simply
+# absent from the feature dict and score as 0 / False, like its getattr().
+NUMERIC_FEATURES = (
+    "on_time_payment_ratio_12m",
+    "max_dpd",
+    "missed_emi_count_12m",
+    "cibil_score",
+    "debt_to_income_ratio",
+    "number_of_active_loans",
+    "estimated_monthly_income",
+    "income_est",
+    "average_bank_balance",
+    "utility_bills_ontime_ratio",
+    "digital_payments_frequency",
+    "transactions_count",
+    "hard_inquiries_last_6_months",
+    "work_consistency_days",
+    "years_in_business",
+)
+FLAG_FEATURES = ("default_flag", "fraud_flag", "seasonal_business_flag")
+TEXT_FEATURES = ("employment_type",)
+SCORE_INPUTS = NUMERIC_FEATURES + FLAG_FEATURES + TEXT_FEATURES
+
+# Which inputs each block of compute_credit_score() reads.
+BLOCK_INPUTS = {
+    "repayment": (
+        "on_time_payment_ratio_12m", "max_dpd", "missed_emi_count_12m",
+        "default_flag", "cibil_score",
+    ),
+    "debt": ("debt_to_income_ratio", "number_of_active_loans"),
+    "income": (
+        "estimated_monthly_income", "income_est", "employment_type",
+        "work_consistency_days", "years_in_business", "seasonal_business_flag",
+    ),
+    "banking": (
+        "average_bank_balance", "estimated_monthly_income", "income_est",
+        "utility_bills_ontime_ratio", "digital_payments_frequency", "transactions_count",
+    ),
+    "flags": ("fraud_flag", "hard_inquiries_last_6_months"),
+}
+# CaseDetails columns that reach the score indirectly: the bills feed
+# income_est through views.auto_compute_income_from_details().
+CASE_DETAILS_INPUTS = ("electricity_bill", "average_mobile_bill", "gas_bill")
+
+BLOCKS = ("repayment", "debt", "income", "banking", "flags")
+
+
+def model_features():
+    """Names of the scoring inputs that are real columns on Beneficiary."""
+    names = []
+    for name in SCORE_INPUTS:
+        try:
+            Beneficiary._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        names.append(name)
+    return names
+
+
+def blocks_reading(fields):
+    """Names of the score blocks that read any of `fields`."""
+    fields = set(fields)
+    return [block for block, inputs in BLOCK_INPUTS.items() if fields.intersection(inputs)]
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def compute_credit_score(ben, card=None):
+    """
+    Rule-based credit score: 300–900, from the "credit_score" scorecard
+    (or `card`). Uses whatever fields are available on the Beneficiary
+    safely. Returns (score, risk_band, eligibility_label); saves nothing.
+    """
+    card = card or get_scorecard("credit_score")
+    p = card.params
+
+    # --- Safely read attributes (0 if missing) ---
+    ontime = getattr(ben, "on_time_payment_ratio_12m", None) or 0
+    max_dpd = getattr(ben, "max_dpd", None) or 0
+    missed = getattr(ben, "missed_emi_count_12m", None) or 0
+    default_flag = bool(getattr(ben, "default_flag", False))
+    cibil = getattr(ben, "cibil_score", None)
+    dti = getattr(ben, "debt_to_income_ratio", None) or 0
+    active_loans = getattr(ben, "number_of_active_loans", None) or 0
+    income = getattr(ben, "estimated_monthly_income", None) or getattr(ben, "income_est", None) or 0
+    avg_balance = getattr(ben, "average_bank_balance", None) or 0
+    util_ratio = getattr(ben, "utility_bills_ontime_ratio", None) or 0
+    digital_freq = getattr(ben, "digital_payments_frequency", None) or 0
+    transactions = getattr(ben, "transactions_count", None) or 0
+    fraud = bool(getattr(ben, "fraud_flag", False))
+    hard6 = getattr(ben, "hard_inquiries_last_6_months", None) or 0
+    emp_type = (getattr(ben, "employment_type", None) or "").lower()
+    work_days = getattr(ben, "work_consistency_days", None) or 0
+    years_business = getattr(ben, "years_in_business", None) or 0
+    seasonal = bool(getattr(ben, "seasonal_business_flag", False))
+
+    # ---------- 1. Repayment + CIBIL (0–100) ----------
+    if default_flag:
+        repay_score = 0
+    else:
+        repay_score = (
+            card.lookup("on_time_ratio", ontime)
+            - card.lookup("max_dpd_penalty", max_dpd)
+            - card.lookup("missed_emi_penalty", missed)
+        )
+        repay_score = _clamp(repay_score, 0, p["repayment_cap"])
+    cibil_part = 0 if cibil is None else card.lookup("cibil", cibil)
+    block_repayment = _clamp(repay_score + cibil_part, 0, 100)
+
+    # ---------- 2. Debt burden (0–100) ----------
+    block_debt = _clamp(
+        100 - card.lookup("dti_penalty", dti) - card.lookup("active_loans_penalty", active_loans),
+        0, 100,
+    )
+
+    # ---------- 3. Income & stability (0–100) ----------
+    if emp_type in p["stable_employment"] and work_days >= p["stable_min_days"]:
+        stab_score = p["stable_points"]
+    elif emp_type in p["business_employment"] and years_business >= p["business_min_years"]:
+        stab_score = p["business_points"]
+    elif seasonal or work_days < p["irregular_below_days"]:
+        stab_score = p["irregular_points"]
+    else:
+        stab_score = p["other_stability_points"]
+    block_income = _clamp(card.lookup("income", income) + stab_score, 0, 100)
+
+    # ---------- 4. Banking & cashflow (0–100) ----------
+    liquidity_ratio = avg_balance / float(income or 1.0)
+    if digital_freq >= p["digital_active_frequency"] and transactions >= p["digital_active_transactions"]:
+        digi_score = p["digital_active_points"]
+    elif digital_freq >= p["digital_some_frequency"]:
+        digi_score = p["digital_some_points"]
+    else:
+        digi_score = p["digital_other_points"]
+    block_bank = _clamp(
+        card.lookup("liquidity", liquidity_ratio) + card.lookup("utility_ontime", util_ratio) + digi_score,
+        0, 100,
+    )
+
+    # ---------- 5. Flags & inquiries (0–100) ----------
+    block_flags = 0 if fraud else _clamp(100 - card.lookup("hard_inquiries_penalty", hard6), 0, 100)
+
+    # ---------- 6. Weighted overall 0–100 ----------
+    blocks = dict(zip(BLOCKS, (block_repayment, block_debt, block_income, block_bank, block_flags)))
+    overall_0_100 = 0.0
+    for block in BLOCKS:
+        overall_0_100 += card.weights[block] * blocks[block]
+
+    credit_score = p["score_floor"] + (overall_0_100 / 100.0) * p["score_range"]
+    credit_score = int(round(credit_score))
+
+    # ---------- 7. Risk band and eligibility ----------
+    return (
+        credit_score,
+        card.lookup("risk_band", credit_score),
+        card.lookup("eligibility", credit_score),
+    )
+
+
+def score_fingerprint(ben, card=None):
+    """Hash of every input compute_credit_score() reads, plus the scorecard digest."""
+    card = card or get_scorecard("credit_score")
+    values = tuple(getattr(ben, name, None) for name in SCORE_INPUTS)
+    return hashlib.sha1(repr((card.digest,) + values).encode()).hexdigest()
+
+
+def _stored_result(ben, card, fingerprint):
+    # the stored result, if `card` computed it from the current inputs
+    if fingerprint != ben.score_fingerprint or ben.model_score is None:
+        return None
+    score = int(ben.model_score)
+    # officer and case scoring overwrite the band without touching the fingerprint
+    if (ben.risk_band, ben.eligibility_label) != (
+        card.lookup("risk_band", score), card.lookup("eligibility", score)
+    ):
+        return None
+    return score, ben.risk_band, ben.eligibility_label
+
+
+def score_beneficiary(ben):
+    """
+    compute_credit_score() for a saved beneficiary, memoized on the row.
+    While the input fingerprint matches the stored one, and the stored band
+    and label are the ones the scorecard gives the stored score, the stored
+    result is returned without writing anything; otherwise only the columns
+    whose value changed are written, with a queryset update() that leaves
+    the rest of the row (updated_at included) alone.
+    """
+    card = get_scorecard("credit_score")
+    fingerprint = score_fingerprint(ben, card)
+    stored = _stored_result(ben, card, fingerprint)
+    if stored is not None:
+        return stored
+
+    credit_score, risk_band, eligibility_label = compute_credit_score(ben, card)
+    values = {
+        "model_score": float(credit_score),
+        "risk_band": risk_band,
+        "eligibility_label": eligibility_label,
+        "score_fingerprint": fingerprint,
+    }
+    changed = {field: value for field, value in values.items() if getattr(ben, field) != value}
+    if changed:
+        Beneficiary.objects.filter(pk=ben.pk).update(**changed)
+        for field, value in changed.items():
+            setattr(ben, field, value)
+        if changed.keys() - {"score_fingerprint"}:
+            mark_slices_stale([slice_of(ben)])
+    return credit_score, risk_band, eligibility_label
+
+
+class BatchScores:
+    """Per-row score arrays for one batch, in input order."""
+
+    def __init__(self, blocks, score, risk_band, eligibility_label):
+        self.blocks = blocks
+        self.score = score
+        self.risk_band = risk_band
+        self.eligibility_label = eligibility_label
+
+    def __len__(self):
+        return len(self.score)
+
+    def row(self, i):
+        """(score, risk_band, eligibility_label) as the scalar scorer returns them."""
+        return int(self.score[i]), self.risk_band[i], self.eligibility_label[i]
+
+
+def score_batch(features, size=None, card=None):
+    """
+    Score a batch of beneficiaries with the "credit_score" scorecard (or
+    `card`). `features` maps feature names to equal-length sequences (None
+    for missing values); features that are not given count as missing for
+    every row.
+    """
+    card = card or get_scorecard("credit_score")
+    p = card.params
+    if size is None:
+        size = len(next(iter(features.values()))) if features else 0
+
+    def num(name):
+        # `value or 0`: None (NaN here) becomes 0
+        values = features.get(name)
+        if values is None:
+            return np.zeros(size)
+        values = np.asarray(values, dtype=float)
+        return np.where(np.isnan(values), 0.0, values)
+
+    def flag(name):
+        values = features.get(name)
+        if values is None:
+            return np.zeros(size, dtype=bool)
+        values = np.asarray(values)
+        if values.dtype == bool:
+            return values
+        return values.astype(object).astype(bool)
+
+    def lower_text(name):
+        # lower-case each distinct value once instead of once per row
+        values = features.get(name)
+        if values is None:
+            return np.full(size, "", dtype=object)
+        values = np.asarray(values, dtype=object)
+        values = np.where(values == None, "", values).astype(str)  # noqa: E711
+        distinct, inverse = np.unique(values, return_inverse=True)
+        lowered = np.array([v.lower() for v in distinct], dtype=object)
+        return lowered[inverse.reshape(-1)]
+
+    def ladder(name, values):
+        return card.ladders[name].lookup_many(values)
+
+    ontime = num("on_time_payment_ratio_12m")
+    max_dpd = num("max_dpd")
+    missed = num("missed_emi_count_12m")
+    default = flag("default_flag")
+    dti = num("debt_to_income_ratio")
+    active_loans = num("number_of_active_loans")
+    income = num("estimated_monthly_income")
+    income = np.where(income == 0, num("income_est"), income)
+    avg_balance = num("average_bank_balance")
+    util_ratio = num("utility_bills_ontime_ratio")
+    digital_freq = num("digital_payments_frequency")
+    transactions = num("transactions_count")
+    fraud = flag("fraud_flag")
+    emp_type = lower_text("employment_type")
+    hard6 = num("hard_inquiries_last_6_months")
+    work_days = num("work_consistency_days")
+    years_business = num("years_in_business")
+    seasonal = flag("seasonal_business_flag")
+
+    cibil = features.get("cibil_score")
+    cibil = np.full(size, np.nan) if cibil is None else np.asarray(cibil, dtype=float)
+
+    # 1. repayment + CIBIL
+    repay = (
+        ladder("on_time_ratio", ontime)
+        - ladder("max_dpd_penalty", max_dpd)
+        - ladder("missed_emi_penalty", missed)
+    )
+    repay = np.where(default, 0, np.clip(repay, 0, p["repayment_cap"]))
+    # a missing CIBIL score earns nothing
+    missing_cibil = np.isnan(cibil)
+    cibil_part = np.where(missing_cibil, 0, ladder("cibil", np.where(missing_cibil, 0.0, cibil)))
+    block_repayment = np.clip(repay + cibil_part, 0, 100)
+
+    # 2. debt burden
+    block_debt = np.clip(
+        100 - ladder("dti_penalty", dti) - ladder("active_loans_penalty", active_loans), 0, 100
+    )
+
+    # 3. income & stability
+    stab_score = np.select(
+        [
+            np.isin(emp_type, p["stable_employment"]) & (work_days >= p["stable_min_days"]),
+            np.isin(emp_type, p["business_employment"]) & (years_business >= p["business_min_years"]),
+            seasonal | (work_days < p["irregular_below_days"]),
+        ],
+        [p["stable_points"], p["business_points"], p["irregular_points"]],
+        p["other_stability_points"],
+    )
+    block_income = np.clip(ladder("income", income) + stab_score, 0, 100)
+
+    # 4. banking & cashflow
+    liquidity_ratio = avg_balance / np.where(income == 0, 1.0, income)
+    digi_score = np.select(
+        [
+            (digital_freq >= p["digital_active_frequency"])
+            & (transactions >= p["digital_active_transactions"]),
+            digital_freq >= p["digital_some_frequency"],
+        ],
+        [p["digital_active_points"], p["digital_some_points"]],
+        p["digital_other_points"],
+    )
+    block_bank = np.clip(
+        ladder("liquidity", liquidity_ratio) + ladder("utility_ontime", util_ratio) + digi_score,
+        0, 100,
+    )
+
+    # 5. flags & inquiries
+    block_flags = np.where(
+        fraud, 0, np.clip(100 - ladder("hard_inquiries_penalty", hard6), 0, 100)
+    )
+
+    blocks = dict(zip(BLOCKS, (block_repayment, block_debt, block_income, block_bank, block_flags)))
+    # same operand order as the scalar sum, so floats round identically
+    overall = np.zeros(size)
+    for block in BLOCKS:
+        overall = overall + card.weights[block] * blocks[block]
+    # np.round, like round(), rounds halves to even
+    score = np.round(p["score_floor"] + (overall / 100.0) * p["score_range"]).astype(np.int64)
+
+    return BatchScores(blocks, score, ladder("risk_band", score), ladder("eligibility", score))
+
+
+def _columns(rows, names):
+    columns = list(zip(*rows)) if rows else [()] * (len(names) + 1)
+    ids = list(columns[0])
+    features = {}
+    for name, values in zip(names, columns[1:]):
+        if name in NUMERIC_FEATURES or name == "model_score":
+            features[name] = np.array(values, dtype=float)
+        else:
+            features[name] = np.array(values, dtype=object)
+    return ids, features
+
+
+def iter_feature_chunks(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE, after=None, upto=None,
+                        extra=()):
+    """
+    Yield (ids, features) for `queryset` (all beneficiaries by default) in
+    primary-key order, `chunk_size` rows at a time, reading the scoring
+    columns plus `extra` ones with values_list(). Chunks are fetched by
+    keyset (pk > last id), so `after` resumes behind a given id; `upto`
+    stops at one (inclusive).
+    """
+    if queryset is None:
+        queryset = Beneficiary.objects.all()
+    names = model_features() + list(extra)
+    queryset = queryset.order_by("pk")
+    if upto is not None:
+        queryset = queryset.filter(pk__lte=upto)
+    while True:
+        chunk = queryset
+        if after is not None:
+            chunk = chunk.filter(pk__gt=after)
+        rows = list(chunk.values_list("pk", *names)[:chunk_size])
+        if not rows:
+            return
+        yield _columns(rows, names)
+        if len(rows) < chunk_size:
+            return
+        after = rows[-1][0]
+
+
+def iter_scored_chunks(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE, after=None):
+    """Yield (ids, BatchScores) for the chunks of iter_feature_chunks()."""
+    for ids, features in iter_feature_chunks(queryset, chunk_size, after):
+        yield ids, score_batch(features, size=len(ids))
+
+
+# --- Portfolio rescoring -------------------------------------------------
+
+SCORE_FIELDS = ("model_score", "risk_band", "eligibility_label")
+DEFAULT_UPDATE_BATCH_SIZE = 1000
+
+
+def changed_rows(features, batch):
+    """Boolean mask of rows whose stored score, band or label differ from `batch`."""
+    return (
+        (features["model_score"] != batch.score)  # NaN (never scored) != anything
+        | (features["risk_band"] != batch.risk_band)
+        | (features["eligibility_label"] != batch.eligibility_label)
+    )
+
+
+def write_scores(ids, batch, mask=None, batch_size=DEFAULT_UPDATE_BATCH_SIZE):
+    """
+    Store model_score, risk_band and eligibility_label for the rows of
+    `batch` selected by `mask` (all by default), touching no other column.
+    Band and label follow from the score, and a chunk only holds a few
+    hundred distinct scores, so rows are grouped by score and written with
+    one UPDATE ... WHERE pk IN (...) per group. That is far cheaper than
+    bulk_update(), which builds a CASE WHEN branch for every row.
+    The rows' score_fingerprint is cleared, as it cannot be grouped: the
+    next score_beneficiary() recomputes and stores it.
+    Returns the number of rows written.
+    """
+    rows = np.arange(len(ids)) if mask is None else np.flatnonzero(mask)
+    if not len(rows):
+        return 0
+    ids = np.asarray(ids, dtype=object)[rows]
+    scores = batch.score[rows]
+    order = np.argsort(scores, kind="stable")
+    groups = np.split(order, np.flatnonzero(np.diff(scores[order])) + 1)
+    with transaction.atomic():
+        for group in groups:
+            first = rows[group[0]]
+            values = {
+                "model_score": float(batch.score[first]),
+                "risk_band": batch.risk_band[first],
+                "eligibility_label": batch.eligibility_label[first],
+                "score_fingerprint": "",
+            }
+            group_ids = ids[group].tolist()
+            for start in range(0, len(group_ids), batch_size):
+                Beneficiary.objects.filter(
+                    pk__in=group_ids[start:start + batch_size]
+                ).update(**values)
+        ids = ids.tolist()
+        for start in range(0, len(ids), batch_size):
+            mark_stale(Beneficiary.objects.filter(pk__in=ids[start:start + batch_size]))
+    return len(rows)
+
+
+def rescore_range(after, upto, chunk_size=DEFAULT_CHUNK_SIZE,
+                  update_batch_size=DEFAULT_UPDATE_BATCH_SIZE, shadows=(), write=True,
+                  scorer=score_batch):
+    """
+    Rescore beneficiaries with after < pk <= upto (either end open when
+    None) and write the score columns of the rows that changed. Each
+    credit_score version in `shadows` is scored from the same feature
+    arrays and compared with the active result; nothing is written when
+    `write` is false. `scorer` stands in for score_batch(), e.g. a
+    parallel_scoring.ParallelScorer. Returns (scored, changed, {label: comparison}).
+    """
+    shadow_cards = [get_scorecard("credit_score", version) for version in shadows]
+    comparisons = {card.label: shadow.empty_comparison() for card in shadow_cards}
+    scored = changed = 0
+    for ids, features in iter_feature_chunks(
+        chunk_size=chunk_size, after=after, upto=upto, extra=SCORE_FIELDS
+    ):
+        batch = scorer(features, size=len(ids))
+        for card in shadow_cards:
+            comparisons[card.label] = shadow.merge(
+                comparisons[card.label],
+                shadow.compare(batch, scorer(features, size=len(ids), card=card)),
+            )
+        if write:
+            changed += write_scores(
+                ids, batch, changed_rows(features, batch), batch_size=update_batch_size
+            )
+        scored += len(ids)
+    return scored, changed, comparisons
+
+
+def plan_ranges(after=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield (after, upto) pk ranges of `chunk_size` beneficiaries, walking
+    only the primary-key index; the last range is open-ended (upto=None).
+    """
+    queryset = Beneficiary.objects.order_by("pk").values_list("pk", flat=True)
+    while True:
+        rest = queryset if after is None else queryset.filter(pk__gt=after)
+        upto = rest[chunk_size - 1:chunk_size].first()
+        yield after, upto
+        if upto is None:
+            return
+        after = upto
+
+
+def _checkpoint(run, upto, result, elapsed):
+    scored, changed, comparisons = result
+    run.last_id = upto or run.last_id
+    run.rows_scored += scored
+    run.rows_changed += changed
+    for label, comparison in comparisons.items():
+        run.shadow_report[label] = shadow.merge(run.shadow_report.get(label, {}), comparison)
+    run.elapsed_seconds = elapsed
+    run.save(update_fields=[
+        "last_id", "rows_scored", "rows_changed", "shadow_report", "elapsed_seconds", "updated_at",
+    ])
+
+
+def shadow_report_lines(run):
+    """The run's shadow comparisons as text, bands in scorecard order."""
+    bands = get_scorecard("credit_score").ladders["risk_band"].values
+    lines = []
+    for label, comparison in run.shadow_report.items():
+        lines.extend(shadow.format_comparison(label, comparison, bands))
+    return lines
+
+
+def run_rescore(run, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, time_budget=None,
+                score_workers=1):
+    """
+    Rescore the portfolio from run.last_id onwards, checkpointing `run`
+    after every chunk. With workers > 1 chunks are scored and written by
+    a process pool, at most 2 * workers in flight; checkpoints still
+    advance in pk order. Once `time_budget` seconds have passed no new
+    chunks are started and the run is left PAUSED for a later --resume.
+    run.shadow_versions are scored in the same pass and compared into
+    run.shadow_report; with run.compare_only no scores are written.
+    With score_workers > 1 (and workers == 1) each chunk is instead read
+    and written here while its scoring is split across a ParallelScorer.
+    """
+    started = time.monotonic() - run.elapsed_seconds
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    ranges = plan_ranges(after=run.last_id or None, chunk_size=chunk_size)
+    run.status = RescoreRun.STATUS_RUNNING
+    run.save(update_fields=["status", "updated_at"])
+
+    def out_of_time():
+        return deadline is not None and time.monotonic() >= deadline
+
+    try:
+        if workers <= 1:
+            with contextlib.ExitStack() as stack:
+                scorer = score_batch
+                if score_workers > 1:
+                    from .parallel_scoring import ParallelScorer
+
+                    scorer = stack.enter_context(ParallelScorer(score_workers))
+                for after, upto in ranges:
+                    if out_of_time():
+                        break
+                    result = rescore_range(
+                        after, upto, chunk_size,
+                        shadows=run.shadow_versions, write=not run.compare_only, scorer=scorer,
+                    )
+                    _checkpoint(run, upto, result, time.monotonic() - started)
+                else:
+                    ranges = None
+        else:
+            ranges = _run_pool(run, ranges, chunk_size, workers, out_of_time, started)
+    except Exception as exc:
+        run.status = RescoreRun.STATUS_FAILED
+        run.error = str(exc)
+        run.save(update_fields=["status", "error", "updated_at"])
+        raise
+
+    if ranges is None:
+        run.status = RescoreRun.STATUS_DONE
+        run.finished_at = timezone.now()
+    else:
+        run.status = RescoreRun.STATUS_PAUSED
+    run.save(update_fields=["status", "finished_at", "updated_at"])
+    return run
+
+
+def _run_pool(run, ranges, chunk_size, workers, out_of_time, started):
+    # returns the unfinished `ranges` iterator, or None once exhausted
+    from django.conf import settings
+    from .parallel_import import _init_worker
+
+    # spawn, not fork: a forked child would share the parent's DB socket
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(
+            settings.SETTINGS_MODULE,
+            export_scorecards(
+                ["credit_score"] + [("credit_score", v) for v in run.shadow_versions]
+            ),
+        ),
+    )
+    pending = collections.deque()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < workers * 2 and not out_of_time():
+                span = next(ranges, None)
+                if span is None:
+                    exhausted = True
+                    break
+                future = pool.submit(
+                    rescore_range, *span, chunk_size, DEFAULT_UPDATE_BATCH_SIZE,
+                    run.shadow_versions, not run.compare_only,
+                )
+                pending.append((span[1], future))
+            if not pending:
+                break
+            upto, future = pending.popleft()
+            _checkpoint(run, upto, future.result(), time.monotonic() - started)
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return None if exhausted else ranges
+
+
+# --- Incremental rescoring -------------------------------------------------
+
+def mark_dirty(beneficiary_id):
+    """Queue a beneficiary for rescoring (re-queueing moves queued_at forward)."""
+    DirtyBeneficiary.objects.update_or_create(
+        beneficiary_id=beneficiary_id, defaults={"queued_at": timezone.now()}
+    )
+
+
+def mark_dirty_many(beneficiary_ids):
+    """mark_dirty() for many beneficiaries in one upsert."""
+    beneficiary_ids = set(beneficiary_ids)
+    if not beneficiary_ids:
+        return
+    now = timezone.now()
+    DirtyBeneficiary.objects.bulk_create(
+        [DirtyBeneficiary(beneficiary_id=pk, queued_at=now) for pk in beneficiary_ids],
+        update_conflicts=True,
+        unique_fields=["beneficiary"],
+        update_fields=["queued_at"],
+    )
+
+
+def drain_dirty(batch_size=DEFAULT_UPDATE_BATCH_SIZE):
+    """
+    Rescore queued beneficiaries `batch_size` at a time through
+    score_batch() and write_scores(). Each batch's queue entries are
+    removed after its write, unless they were re-queued meanwhile.
+    Returns (scored, changed).
+    """
+    names = model_features() + list(SCORE_FIELDS)
+    scored = changed = 0
+    while True:
+        started = timezone.now()
+        queued = DirtyBeneficiary.objects.filter(queued_at__lte=started).order_by("queued_at")
+        pks = list(queued.values_list("beneficiary_id", flat=True)[:batch_size])
+        if not pks:
+            return scored, changed
+        rows = list(Beneficiary.objects.filter(pk__in=pks).values_list("pk", *names))
+        ids, features = _columns(rows, names)
+        batch = score_batch(features, size=len(ids))
+        changed += write_scores(ids, batch, changed_rows(features, batch))
+        scored += len(ids)
+        DirtyBeneficiary.objects.filter(beneficiary_id__in=pks, queued_at__lte=started).delete()
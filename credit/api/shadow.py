@@ -0,0 +1,124 @@
+"""
+Shadow scoring reports.
+
+A shadow scorecard version is scored in the same pass as the active one
+(see scoring.rescore_range) and compared with it chunk by chunk. The
+comparison is kept as plain JSON-able counts so chunks scored in other
+processes, or in an earlier part of a resumed run, merge by addition:
+score deltas, the risk band migration matrix and eligibility flips.
+"""
+import numpy as np
+
+
+DELTA_BUCKET = 10  # points per score-delta histogram bucket
+
+
+def _pair_counts(before, after):
+    """{(b, a): count} over aligned label arrays, without a Python loop per row."""
+    before_labels, before_codes = np.unique(before.astype(str), return_inverse=True)
+    after_labels, after_codes = np.unique(after.astype(str), return_inverse=True)
+    codes = before_codes.reshape(-1) * len(after_labels) + after_codes.reshape(-1)
+    counts = np.bincount(codes, minlength=len(before_labels) * len(after_labels))
+    return {
+        (before_labels[code // len(after_labels)], after_labels[code % len(after_labels)]): int(n)
+        for code, n in enumerate(counts) if n
+    }
+
+
+def empty_comparison():
+    return {
+        "rows": 0,
+        "changed_scores": 0,
+        "delta_sum": 0,
+        "delta_sq_sum": 0,
+        "delta_min": None,
+        "delta_max": None,
+        "delta_histogram": {},
+        "band_migration": {},
+        "eligibility_flips": {},
+    }
+
+
+def compare(active, shadow):
+    """Comparison counts for one chunk: two BatchScores over the same rows."""
+    result = empty_comparison()
+    if not len(active):
+        return result
+    delta = shadow.score - active.score
+    result.update(
+        rows=len(delta),
+        changed_scores=int(np.count_nonzero(delta)),
+        delta_sum=int(delta.sum()),
+        delta_sq_sum=int((delta * delta).sum()),
+        delta_min=int(delta.min()),
+        delta_max=int(delta.max()),
+    )
+    buckets, counts = np.unique((delta // DELTA_BUCKET) * DELTA_BUCKET, return_counts=True)
+    result["delta_histogram"] = {str(b): int(n) for b, n in zip(buckets, counts)}
+    for (was, now), n in _pair_counts(active.risk_band, shadow.risk_band).items():
+        result["band_migration"].setdefault(was, {})[now] = n
+    for (was, now), n in _pair_counts(active.eligibility_label, shadow.eligibility_label).items():
+        if was != now:
+            result["eligibility_flips"][f"{was} -> {now}"] = n
+    return result
+
+
+def merge(total, part):
+    """Add comparison `part` into `total` (both dicts as from compare())."""
+    total = dict(empty_comparison(), **total)
+    for key in ("rows", "changed_scores", "delta_sum", "delta_sq_sum"):
+        total[key] += part[key]
+    for key, pick in (("delta_min", min), ("delta_max", max)):
+        values = [v for v in (total[key], part[key]) if v is not None]
+        total[key] = pick(values) if values else None
+    for key in ("delta_histogram", "eligibility_flips"):
+        counts = dict(total[key])
+        for bucket, n in part[key].items():
+            counts[bucket] = counts.get(bucket, 0) + n
+        total[key] = counts
+    matrix = {was: dict(row) for was, row in total["band_migration"].items()}
+    for was, row in part["band_migration"].items():
+        counts = matrix.setdefault(was, {})
+        for now, n in row.items():
+            counts[now] = counts.get(now, 0) + n
+    total["band_migration"] = matrix
+    return total
+
+
+def format_comparison(label, data, bands=()):
+    """Text report lines for one shadow version; `bands` orders the matrix."""
+    rows = data["rows"]
+    lines = [f"{label} vs active: {rows} rows, {data['changed_scores']} scores changed"]
+    if not rows:
+        return lines
+    mean = data["delta_sum"] / rows
+    sd = max(data["delta_sq_sum"] / rows - mean * mean, 0) ** 0.5
+    lines.append(
+        f"  score delta: mean {mean:+.1f}, sd {sd:.1f}, "
+        f"min {data['delta_min']:+d}, max {data['delta_max']:+d}"
+    )
+    lines.append("  delta histogram:")
+    for bucket in sorted(data["delta_histogram"], key=int):
+        start = int(bucket)
+        lines.append(
+            f"    {start:+5d} .. {start + DELTA_BUCKET - 1:+5d}: {data['delta_histogram'][bucket]}"
+        )
+
+    matrix = data["band_migration"]
+    seen = set(matrix).union(*matrix.values())
+    order = [b for b in bands if b in seen] + sorted(seen.difference(bands))
+    width = max(len(b) for b in order)
+    lines.append("  band migration (rows: active, columns: shadow):")
+    lines.append("    " + " " * width + "".join(f" {b:>{width}}" for b in order))
+    for was in order:
+        counts = matrix.get(was, {})
+        lines.append(
+            f"    {was:<{width}}" + "".join(f" {counts.get(now, 0):>{width}}" for now in order)
+        )
+    lines.append("  eligibility flips:")
+    flips = data["eligibility_flips"]
+    if not flips:
+        lines.append("    none")
+    for flip in sorted(flips, key=flips.get, reverse=True):
+        lines.append(f"    {flip}: {flips[flip]}")
+    return lines
@@ -0,0 +1,175 @@
+"""
+Dirty tracking for incremental rescoring.
+
+A snapshot of the scoring inputs is taken when a Beneficiary or CaseDetails
+instance is loaded (post_init) and compared after each save (post_save);
+only when one of those columns changed is the beneficiary queued with
+scoring.mark_dirty(). Queryset update() and bulk_create() bypass signals:
+imports queue their new and changed rows themselves (mark_dirty_many()),
+and the score writers queue nothing.
+
+Dashboard rollup slices are marked stale when a beneficiary joins or
+leaves one, when its score, band or eligibility changes, and when one of
+its loan applications is saved or deleted.
+
+Daily analytics summaries are marked stale for the day a beneficiary was
+registered when it is created or deleted, for the days of its score log
+entries when it is deleted, and for the old and new decision day of a
+loan application.
+
+The beneficiary's FeatureVector row is refreshed whenever one of its
+source rows is saved or deleted with a changed feature source (imports
+refresh theirs per batch instead). Refreshes after a delete wait for the
+commit, and are skipped when the delete cascades from the beneficiary.
+
+Saving a Scorecard drops this process's compiled scorecards, and deleting
+a ScoreExplanation the explanation ids it remembers.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .dashboard import DASHBOARD_INPUTS, SLICE_FIELDS, mark_slices_stale, mark_stale
+from .features import BENEFICIARY_SOURCES, refresh_features
+from .models import (
+    AIScoreLog, Beneficiary, CaseDetails, ConsumptionData, LoanApplication, LoanHistory, Scorecard,
+    ScoreExplanation,
+)
+from .score_log import forget_explanations
+from .scorecards import clear_cache
+from .scoring import CASE_DETAILS_INPUTS, mark_dirty, model_features
+from .timeseries import day_of, mark_days_of, mark_days_stale
+
+
+BENEFICIARY_INPUTS = tuple(model_features())
+
+_TRACKED = {
+    Beneficiary: BENEFICIARY_INPUTS,
+    CaseDetails: CASE_DETAILS_INPUTS,
+}
+
+
+def _snapshot(instance, fields):
+    # __dict__, not getattr(): reading a deferred field would cost a query
+    return tuple(instance.__dict__.get(name) for name in fields)
+
+
+@receiver(post_init, sender=Beneficiary)
+@receiver(post_init, sender=CaseDetails)
+def remember_score_inputs(sender, instance, **kwargs):
+    instance._score_inputs = _snapshot(instance, _TRACKED[sender])
+
+
+@receiver(post_save, sender=Beneficiary)
+@receiver(post_save, sender=CaseDetails)
+def queue_rescore_on_input_change(sender, instance, created, update_fields=None, **kwargs):
+    fields = _TRACKED[sender]
+    if update_fields is not None and not set(update_fields).intersection(fields):
+        return
+    current = _snapshot(instance, fields)
+    if created:
+        # a new beneficiary has no score yet; new case details matter once filled in
+        changed = sender is Beneficiary or any(value is not None for value in current)
+    else:
+        changed = current != instance._score_inputs
+    if changed:
+        mark_dirty(instance.pk if sender is Beneficiary else instance.beneficiary_id)
+    instance._score_inputs = current
+
+
+@receiver(post_init, sender=Beneficiary)
+def remember_feature_sources(sender, instance, **kwargs):
+    instance._feature_sources = _snapshot(instance, BENEFICIARY_SOURCES)
+
+
+@receiver(post_save, sender=Beneficiary)
+def refresh_features_on_beneficiary_change(sender, instance, created, **kwargs):
+    current = _snapshot(instance, BENEFICIARY_SOURCES)
+    if created or current != instance._feature_sources:
+        refresh_features([instance.pk])
+    instance._feature_sources = current
+
+
+@receiver(post_save, sender=CaseDetails)
+@receiver(post_save, sender=LoanHistory)
+@receiver(post_save, sender=ConsumptionData)
+def refresh_features_on_related_change(sender, instance, **kwargs):
+    refresh_features([instance.beneficiary_id])
+
+
+@receiver(post_delete, sender=CaseDetails)
+@receiver(post_delete, sender=LoanHistory)
+@receiver(post_delete, sender=ConsumptionData)
+def refresh_features_on_related_delete(sender, instance, origin=None, **kwargs):
+    # a cascade from the beneficiary removes its feature row too; refreshing
+    # here would re-insert it before the beneficiary row is gone
+    if isinstance(origin, Beneficiary) or getattr(origin, "model", None) is Beneficiary:
+        return
+    # refresh_features() skips beneficiaries deleted later in the transaction
+    beneficiary_id = instance.beneficiary_id
+    transaction.on_commit(lambda: refresh_features([beneficiary_id]))
+
+
+@receiver(post_init, sender=Beneficiary)
+def remember_dashboard_inputs(sender, instance, **kwargs):
+    instance._dashboard_inputs = _snapshot(instance, DASHBOARD_INPUTS)
+
+
+@receiver(post_save, sender=Beneficiary)
+def mark_rollups_on_beneficiary_change(sender, instance, created, **kwargs):
+    current = _snapshot(instance, DASHBOARD_INPUTS)
+    before = instance._dashboard_inputs
+    if created:
+        mark_slices_stale([current[:len(SLICE_FIELDS)]])
+    elif current != before:
+        mark_slices_stale([before[:len(SLICE_FIELDS)], current[:len(SLICE_FIELDS)]])
+    instance._dashboard_inputs = current
+
+
+@receiver(post_delete, sender=Beneficiary)
+def mark_rollups_on_beneficiary_delete(sender, instance, **kwargs):
+    mark_slices_stale([_snapshot(instance, SLICE_FIELDS)])
+
+
+@receiver(post_save, sender=LoanApplication)
+@receiver(post_delete, sender=LoanApplication)
+def mark_rollups_on_loan_application_change(sender, instance, **kwargs):
+    # no-op when the beneficiary itself is being deleted; its own delete marks the slice
+    mark_stale(Beneficiary.objects.filter(pk=instance.beneficiary_id))
+
+
+@receiver(post_save, sender=Beneficiary)
+@receiver(post_delete, sender=Beneficiary)
+def mark_summaries_on_registration(sender, instance, created=True, **kwargs):
+    if created:
+        mark_days_stale([day_of(instance.created_at)])
+
+
+@receiver(pre_delete, sender=Beneficiary)
+def mark_summaries_on_log_delete(sender, instance, **kwargs):
+    # its score log entries go with it, without signals of their own
+    mark_days_of(AIScoreLog.objects.filter(beneficiary_id=instance.pk))
+
+
+@receiver(post_init, sender=LoanApplication)
+def remember_decision_day(sender, instance, **kwargs):
+    instance._decided_at = instance.decided_at
+
+
+@receiver(post_save, sender=LoanApplication)
+@receiver(post_delete, sender=LoanApplication)
+def mark_summaries_on_decision(sender, instance, **kwargs):
+    days = [instance._decided_at, instance.decided_at]
+    mark_days_stale(day_of(moment) for moment in set(days) if moment is not None)
+    instance._decided_at = instance.decided_at
+
+
+@receiver(post_save, sender=Scorecard)
+@receiver(post_delete, sender=Scorecard)
+def recompile_scorecards(sender, instance, **kwargs):
+    clear_cache()
+
+
+@receiver(post_delete, sender=ScoreExplanation)
+def forget_deleted_explanations(sender, instance, **kwargs):
+    forget_explanations()
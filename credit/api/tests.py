@@ -1,8 +1,22 @@
-
-from django.test import TestCase, Client
+import csv
+import importlib
+import io
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
-from .models import Beneficiary, Profile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from .models import (
+    Beneficiary, Profile, ImportJob, IdCounter, RescoreRun, DirtyBeneficiary, CaseDetails, Scorecard,
+    AIScoreLog, ScoreExplanation, FeatureVector, LoanHistory, ConsumptionData, LoanApplication,
+)
+from .readers import iter_csv_rows
 from unittest.mock import patch
 
 class AuthTests(TestCase):
@@ -108,3 +122,1269 @@ class AuthTests(TestCase):
         response = self.client.get(reverse('beneficiary_verify_otp'))
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(response, reverse('beneficiary_register'))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class OfficerUploadTests(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.officer = User.objects.create_user('officer', 'officer@example.com', 'password123', is_staff=True)
+        self.client.login(username='officer', password='password123')
+
+    def _upload(self, content, name='upload.csv', upsert_key=''):
+        response = self.client.post(reverse('officer_upload'), {
+            'file': SimpleUploadedFile(name, content.encode('utf-8'), content_type='text/csv'),
+            'upsert_key': upsert_key,
+        })
+        call_command('process_imports', '--once', stdout=io.StringIO())
+        return response
+
+    def _progress(self, job):
+        return self.client.get(reverse('officer_import_progress', args=[job.pk])).json()
+
+    def test_upload_bulk_inserts_related_rows(self):
+        """
+        Tests that uploaded rows are stored with income_category, loans and consumption.
+        """
+        response = self._upload(
+            "name,age,income_est,estimated_monthly_income,loan_amount,tenure,electricity_bill\n"
+            "Asha,30,12000,30000,5000,24,400\n"
+            "Ravi,,5000,,,,\n"
+        )
+        self.assertEqual(response.status_code, 200)
+        job = ImportJob.objects.get()
+        self.assertContains(response, f"Import job #{job.pk} has been queued")
+        progress = self._progress(job)
+        self.assertEqual(progress['status'], ImportJob.STATUS_DONE)
+        self.assertEqual(progress['rows_done'], 2)
+
+        asha = Beneficiary.objects.get(name='Asha')
+        self.assertEqual(asha.income_category, 'lower medium')
+        self.assertEqual(asha.officer, self.officer)
+        self.assertEqual(asha.loans.get().tenure, 24)
+        self.assertEqual(asha.consumption_records.get().electricity_bill, 400)
+
+        ravi = Beneficiary.objects.get(name='Ravi')
+        self.assertEqual(ravi.income_category, 'very low')
+        self.assertFalse(ravi.loans.exists())
+        self.assertNotEqual(asha.id, ravi.id)
+
+    def test_upload_accepts_bom_prefixed_csv(self):
+        """
+        Tests that an Excel-style BOM does not end up in the first column name.
+        """
+        self._upload("﻿name,age\r\nAsha,30\r\n")
+        self.assertEqual(Beneficiary.objects.get().name, 'Asha')
+
+    def test_bad_rows_go_to_error_report(self):
+        """
+        Tests that invalid rows are reported with line and reason while good rows import.
+        """
+        self._upload(
+            "name,age,income_est\n"
+            "Asha,30,12000\n"
+            "Ravi,thirty,5000\n"
+            "Meena,40,-5\n"
+            "Kiran,50,\n"
+        )
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, ImportJob.STATUS_DONE)
+        self.assertEqual((job.rows_done, job.rows_failed), (2, 2))
+        self.assertEqual(
+            sorted(Beneficiary.objects.values_list('name', flat=True)), ['Asha', 'Kiran']
+        )
+
+        progress = self._progress(job)
+        response = self.client.get(progress['errors_url'])
+        report = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(report[0], ['line', 'reason', 'name', 'age', 'income_est'])
+        self.assertEqual(report[1][:3], ['3', "age: 'thirty' is not a whole number", 'Ravi'])
+        self.assertEqual(report[2][:2], ['4', 'income_est: must be a non-negative number'])
+
+    def test_upsert_by_phone_updates_only_changed_rows(self):
+        """
+        Tests that re-uploading with an upsert key updates matches instead of duplicating them.
+        """
+        self._upload("name,phone,income_est,loan_amount\nAsha,111,12000,5000\nRavi,222,5000,\n")
+        ravi_updated_at = Beneficiary.objects.get(phone='222').updated_at
+
+        self._upload(
+            "name,phone,income_est,loan_amount\nAsha,111,30000,5000\nRavi,222,5000,\nMeena,333,,\n",
+            upsert_key='phone',
+        )
+        job = ImportJob.objects.latest('created_at')
+        self.assertEqual((job.rows_done, job.rows_inserted, job.rows_updated), (3, 1, 1))
+        self.assertEqual(Beneficiary.objects.count(), 3)
+
+        asha = Beneficiary.objects.get(phone='111')
+        self.assertEqual(asha.income_est, 30000)
+        self.assertEqual(asha.income_category, 'lower medium')
+        self.assertEqual(asha.loans.count(), 1)
+        self.assertEqual(Beneficiary.objects.get(phone='222').updated_at, ravi_updated_at)
+
+    def test_job_resumes_from_checkpoint(self):
+        """
+        Tests that a crashed RUNNING job restarts after its last committed row.
+        """
+        job = ImportJob.objects.create(
+            officer=self.officer,
+            file=SimpleUploadedFile('upload.csv', b"name\nAsha\nRavi\nMeena\n"),
+            status=ImportJob.STATUS_RUNNING,
+            rows_done=1,
+        )
+        ImportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        call_command('process_imports', '--once', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_DONE)
+        self.assertEqual(job.rows_done, 3)
+        self.assertEqual(
+            sorted(Beneficiary.objects.values_list('name', flat=True)), ['Meena', 'Ravi']
+        )
+
+
+class ImportCommandTests(TestCase):
+
+    def setUp(self):
+        self.officer = User.objects.create_user('officer', 'officer@example.com', 'password123', is_staff=True)
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'people.csv')
+        with open(self.path, 'w') as fh:
+            fh.write("name,age,phone\nAsha,30,111\nRavi,abc,222\nMeena,41,333\n")
+
+    def test_dry_run_writes_nothing(self):
+        """
+        Tests that --dry-run validates the file without inserting rows.
+        """
+        out = io.StringIO()
+        call_command('import_beneficiaries', self.path, '--dry-run', stdout=out, stderr=io.StringIO())
+        self.assertIn('2 valid rows, 1 rejected', out.getvalue())
+        self.assertFalse(Beneficiary.objects.exists())
+
+    def test_import_with_officer_and_error_file(self):
+        """
+        Tests a full offline import attributed to an officer, with rejected rows written out.
+        """
+        errors = os.path.join(self.tmpdir, 'errors.csv')
+        out = io.StringIO()
+        call_command(
+            'import_beneficiaries', self.path, '--officer', 'officer', '--batch-size', '1',
+            '--errors', errors, stdout=out, stderr=io.StringIO(),
+        )
+        self.assertIn('2 added', out.getvalue())
+        self.assertEqual(Beneficiary.objects.filter(officer=self.officer).count(), 2)
+        with open(errors) as fh:
+            self.assertEqual(list(csv.reader(fh))[1], ['3', "age: 'abc' is not a whole number", 'Ravi', 'abc', '222'])
+
+        call_command(
+            'import_beneficiaries', self.path, '--upsert-key', 'phone', stdout=out, stderr=io.StringIO(),
+        )
+        self.assertEqual(Beneficiary.objects.count(), 2)
+
+    def test_import_queues_new_and_rescorable_rows(self):
+        """
+        Tests that imports queue new rows, and upserted rows only when a scoring input changed.
+        """
+        with open(self.path, 'w') as fh:
+            fh.write("name,phone,income_est\nAsha,111,12000\nMeena,333,8000\n")
+        call_command('import_beneficiaries', self.path, stdout=io.StringIO(), stderr=io.StringIO())
+        ids = dict(Beneficiary.objects.values_list('name', 'id'))
+        self.assertEqual(
+            set(DirtyBeneficiary.objects.values_list('beneficiary_id', flat=True)), set(ids.values())
+        )
+
+        DirtyBeneficiary.objects.all().delete()
+        with open(self.path, 'w') as fh:
+            fh.write("name,phone,income_est\nAsha,111,15000\nMeena Devi,333,8000\n")
+        out = io.StringIO()
+        call_command(
+            'import_beneficiaries', self.path, '--upsert-key', 'phone', stdout=out, stderr=io.StringIO(),
+        )
+        self.assertIn('2 updated', out.getvalue())
+        self.assertEqual(
+            list(DirtyBeneficiary.objects.values_list('beneficiary_id', flat=True)), [ids['Asha']]
+        )
+
+
+class BeneficiaryIdTests(TestCase):
+
+    def test_ids_are_allocated_in_blocks(self):
+        """
+        Tests that blocks and single IDs come from one series and never overlap.
+        """
+        from .models import generate_beneficiary_ids
+        block = generate_beneficiary_ids(3)
+        first = int(block[0][3:])
+        self.assertEqual(block, [f'BEN{n:06d}' for n in range(first, first + 3)])
+        ben = Beneficiary.objects.create(name='Next')
+        self.assertEqual(ben.id, f'BEN{first + 3:06d}')
+        # an unsaved instance takes no ID; the first save assigns the next one
+        pending = Beneficiary(name='A')
+        self.assertEqual(pending.id, '')
+        pending.save()
+        self.assertEqual(pending.id, f'BEN{first + 4:06d}')
+
+    @unittest.skipIf(connection.vendor == 'postgresql', 'PostgreSQL allocates from a sequence')
+    def test_counter_seeded_from_existing_ids(self):
+        """
+        Tests that a missing counter row starts after the highest stored ID.
+        """
+        from .models import generate_beneficiary_ids
+        Beneficiary.objects.create(id='BEN100041', name='Existing')
+        IdCounter.objects.all().delete()
+        self.assertEqual(generate_beneficiary_ids(2), ['BEN100042', 'BEN100043'])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'needs concurrent connections')
+    def test_allocation_does_not_block_other_transactions(self):
+        """
+        Tests that a block reserved in an open transaction does not make another connection wait.
+        """
+        import threading
+        from django.db import connections, transaction
+        from .models import generate_beneficiary_ids
+        found = {}
+
+        def allocate_elsewhere():
+            try:
+                with connections['default'].cursor() as cursor:
+                    cursor.execute("SET lock_timeout = '2s'")
+                found['ids'] = generate_beneficiary_ids(2)
+            except Exception as exc:
+                found['error'] = exc
+            finally:
+                connections['default'].close()
+
+        with transaction.atomic():
+            mine = generate_beneficiary_ids(5)
+            thread = threading.Thread(target=allocate_elsewhere)
+            thread.start()
+            thread.join()
+        self.assertNotIn('error', found)
+        self.assertFalse(set(mine) & set(found['ids']))
+
+
+class CopyBackendTests(TestCase):
+
+    def test_copy_text_escaping(self):
+        """
+        Tests that values are rendered in COPY text format.
+        """
+        from .pg_copy import _escape
+        self.assertEqual(_escape(None), '\\N')
+        self.assertEqual(_escape(True), 't')
+        self.assertEqual(_escape({}), '{}')
+        self.assertEqual(_escape('a\tb\\c\nd'), 'a\\tb\\\\c\\nd')
+
+    def test_copy_writer_imports_rows(self):
+        """
+        Tests the COPY writer (bulk_create fallback on databases without COPY).
+        """
+        from .importer import import_rows
+        from .pg_copy import write_batch_copy
+        result = import_rows(
+            [{'name': 'Asha\tK', 'loan_amount': '5000', 'mobile_bill': '200'}, {'name': 'Ravi'}],
+            writer=write_batch_copy,
+        )
+        self.assertEqual(result.added, 2)
+        asha = Beneficiary.objects.get(name='Asha\tK')
+        self.assertEqual(asha.loans.get().amount, 5000)
+        self.assertEqual(asha.consumption_records.get().mobile_bill, 200)
+        self.assertEqual(asha.other_details, {})
+        self.assertEqual(DirtyBeneficiary.objects.count(), 2)
+
+
+def _import_or_skip(name):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise unittest.SkipTest(f"{name} is not installed")
+
+
+class ReaderTests(TestCase):
+
+    def test_parallel_parse_matches_sequential(self):
+        """
+        Tests that sharded multi-process parsing yields the same stream, in order.
+        """
+        from .importer import iter_parsed
+        from .parallel_import import iter_parsed_parallel, plan_shards
+        lines = ["name,age"] + [f"Person {i},{'x' if i % 7 == 0 else i % 90}" for i in range(200)]
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write("\n".join(lines) + "\n")
+
+        _fieldnames, shards = plan_shards(fh.name, shard_bytes=256)
+        self.assertGreater(len(shards), 4)
+        with open(fh.name, 'rb') as raw:
+            expected = list(iter_parsed(iter_csv_rows(raw)))
+        self.assertEqual(list(iter_parsed_parallel(fh.name, workers=2, shard_bytes=256)), expected)
+        os.unlink(fh.name)
+
+    def test_iter_csv_rows_across_small_chunks(self):
+        """
+        Tests that rows, quoted newlines and multi-byte characters survive chunk boundaries.
+        """
+        data = '﻿name,location\r\n"Asha","Line 1\nLine 2"\r\nRavi,Bengalūru\r\n'.encode('utf-8')
+        rows = list(iter_csv_rows(io.BytesIO(data), chunk_size=3))
+        self.assertEqual(rows, [
+            {'name': 'Asha', 'location': 'Line 1\nLine 2'},
+            {'name': 'Ravi', 'location': 'Bengalūru'},
+        ])
+
+    def test_xlsx_rows_match_csv_strings(self):
+        """
+        Tests that XLSX cells are read as CSV-style strings (30, not 30.0).
+        """
+        openpyxl = _import_or_skip('openpyxl')
+        from .readers import open_rows
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['name', 'age', 'consent_given', 'income_est'])
+        sheet.append(['Asha', 30.0, True, 1250.5])
+        sheet.append([None, None, None, None])
+        sheet.append(['Ravi', None, False, 5000])
+        buf = io.BytesIO()
+        workbook.save(buf)
+        buf.seek(0)
+
+        reader = open_rows(buf, 'upload.xlsx')
+        self.assertEqual(reader.fieldnames, ['name', 'age', 'consent_given', 'income_est'])
+        self.assertEqual(list(reader), [
+            {'name': 'Asha', 'age': '30', 'consent_given': 'true', 'income_est': '1250.5'},
+            {'name': 'Ravi', 'age': '', 'consent_given': 'false', 'income_est': '5000'},
+        ])
+
+    def test_parquet_rows_in_batches(self):
+        """
+        Tests that Parquet record batches are converted column-wise into row dicts.
+        """
+        pa = _import_or_skip('pyarrow')
+        import pyarrow.parquet as pq
+        from .importer import import_rows
+        from .readers import open_rows
+        table = pa.table({
+            'name': [f'Person {i}' for i in range(25)],
+            'age': [float(i) for i in range(25)],
+            'phone': [None] * 25,
+        })
+        buf = io.BytesIO()
+        pq.write_table(table, buf, row_group_size=10)
+        buf.seek(0)
+
+        reader = open_rows(buf, 'upload.parquet')
+        reader._batch_size = 7
+        result = import_rows(reader)
+        self.assertEqual(result.added, 25)
+        self.assertEqual(Beneficiary.objects.get(name='Person 24').age, 24)
+
+
+class BatchScoringTests(TestCase):
+
+    def test_batch_scores_match_scalar_scorer(self):
+        """
+        Tests that the vectorized scorer agrees with the per-object one, band edges included.
+        """
+        import random
+        from types import SimpleNamespace
+        from .scoring import NUMERIC_FEATURES, FLAG_FEATURES, compute_credit_score, score_batch
+
+        # every threshold the rules use, either side of it, plus missing values
+        edges = [0, 0.2, 0.25, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1, 3, 4, 5, 15, 20, 25,
+                 30, 90, 600, 650, 720, 780, 8000, 15000, 30000, 60000]
+        choices = [None] + edges + [e + d for e in edges for d in (-0.01, 0.01)]
+        employment = [None, '', 'Salaried', 'government', 'Self-Employed', 'business', 'farmer']
+        rng = random.Random(7)
+        rows = []
+        for _ in range(3000):
+            row = {name: rng.choice(choices) for name in NUMERIC_FEATURES}
+            row.update({name: rng.choice([None, False, True]) for name in FLAG_FEATURES})
+            row['employment_type'] = rng.choice(employment)
+            rows.append(row)
+
+        batch = score_batch({name: [r[name] for r in rows] for name in rows[0]})
+        for i, row in enumerate(rows):
+            self.assertEqual(batch.row(i), compute_credit_score(SimpleNamespace(**row)), row)
+
+    def test_parallel_scorer_matches_score_batch(self):
+        """
+        Tests that scoring slices in worker processes over shared memory gives score_batch's result.
+        """
+        import random
+        from .parallel_scoring import ParallelScorer
+        from .scoring import NUMERIC_FEATURES, FLAG_FEATURES, score_batch
+
+        rng = random.Random(11)
+        size = 2500
+        features = {
+            name: [rng.choice([None, 0, 0.3, 0.9, 2, 25, 640, 790, 12000, 70000]) for _ in range(size)]
+            for name in NUMERIC_FEATURES
+        }
+        features.update({name: [rng.choice([None, False, True]) for _ in range(size)]
+                         for name in FLAG_FEATURES})
+        features['employment_type'] = [rng.choice([None, 'Salaried', 'business', 'farmer'])
+                                       for _ in range(size)]
+        # stored results ride along with the inputs and must not disturb them
+        features['model_score'] = [rng.choice([None, 640.0]) for _ in range(size)]
+        features['risk_band'] = [rng.choice([None, 'Low_Risk']) for _ in range(size)]
+
+        expected = score_batch(features)
+        with ParallelScorer(workers=2, min_slice=600) as scorer:
+            self.assertEqual(scorer._slices(size), [(0, 1250), (1250, 2500)])
+            batch = scorer(features)
+
+            # a card with fractional ladder values keeps its fractions
+            import copy
+            from .scorecards import DEFAULT_SCORECARDS, CompiledScorecard
+            definition = copy.deepcopy(DEFAULT_SCORECARDS['credit_score'])
+            definition['ladders']['cibil']['values'] = [0, 12.5, 25.5, 37.5, 50.5]
+            card = CompiledScorecard('credit_score', definition)
+            fractional = scorer(features, card=card)
+        self.assertEqual(batch.score.tolist(), expected.score.tolist())
+        self.assertEqual(batch.risk_band.tolist(), expected.risk_band.tolist())
+        self.assertEqual(batch.eligibility_label.tolist(), expected.eligibility_label.tolist())
+        for name, values in expected.blocks.items():
+            self.assertEqual(batch.blocks[name].tolist(), values.tolist(), name)
+        expected = score_batch(features, card=card)
+        self.assertEqual(fractional.blocks['repayment'].dtype, expected.blocks['repayment'].dtype)
+        self.assertEqual(fractional.blocks['repayment'].tolist(), expected.blocks['repayment'].tolist())
+        self.assertEqual(fractional.score.tolist(), expected.score.tolist())
+
+    def test_scored_chunks_read_the_database(self):
+        """
+        Tests that chunks come back in pk order and score the stored columns.
+        """
+        from .scoring import compute_credit_score, iter_scored_chunks
+        for i in range(5):
+            Beneficiary.objects.create(
+                name=f'Person {i}', cibil_score=600 + 50 * i,
+                estimated_monthly_income=20000 * i or None, income_est=9000,
+                employment_type='Salaried', work_consistency_days=20 + 2 * i,
+            )
+        chunks = list(iter_scored_chunks(chunk_size=2))
+        self.assertEqual([len(ids) for ids, _ in chunks], [2, 2, 1])
+        for ids, batch in chunks:
+            for i, pk in enumerate(ids):
+                ben = Beneficiary.objects.get(pk=pk)
+                self.assertEqual(batch.row(i), compute_credit_score(ben))
+
+    def test_rescore_all_writes_changed_scores_and_resumes(self):
+        """
+        Tests rescore_all: time-boxed runs pause, --resume finishes, unchanged rows are skipped.
+        """
+        from .scoring import compute_credit_score
+        for i in range(7):
+            Beneficiary.objects.create(
+                name=f'Person {i}', cibil_score=560 + 40 * i,
+                estimated_monthly_income=9000 * i, employment_type='government',
+                work_consistency_days=26,
+            )
+        out = io.StringIO()
+        call_command('rescore_all', chunk_size=3, time_budget=0, stdout=out)
+        run = RescoreRun.objects.get()
+        self.assertEqual((run.status, run.rows_scored), (RescoreRun.STATUS_PAUSED, 0))
+        self.assertIn('--resume', out.getvalue())
+
+        call_command('rescore_all', '--resume', chunk_size=3, stdout=io.StringIO())
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.rows_scored, run.rows_changed), (RescoreRun.STATUS_DONE, 7, 7))
+        for ben in Beneficiary.objects.all():
+            stored = (int(ben.model_score), ben.risk_band, ben.eligibility_label)
+            self.assertEqual(stored, compute_credit_score(ben))
+
+        Beneficiary.objects.filter(name='Person 3').update(cibil_score=None)
+        call_command('rescore_all', chunk_size=3, stdout=io.StringIO())
+        self.assertEqual(RescoreRun.objects.latest('pk').rows_changed, 1)
+
+    def test_score_page_is_read_only_until_inputs_change(self):
+        """
+        Tests that repeat score page views write nothing, and input changes write only score columns.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        user = User.objects.create_user('asha', 'asha@example.com', 'password123')
+        ben = Beneficiary.objects.create(
+            user=user, name='Asha', cibil_score=790, estimated_monthly_income=40000,
+        )
+        self.client.login(username='asha', password='password123')
+
+        response = self.client.get(reverse('beneficiary_score'))
+        self.assertEqual(response.context['credit_score'], 686)
+        ben.refresh_from_db()
+        self.assertEqual((ben.model_score, ben.risk_band), (686, 'High_Risk'))
+        updated_at = ben.updated_at
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('beneficiary_score'))
+        self.assertEqual(response.context['credit_score'], 686)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE')])
+
+        Beneficiary.objects.filter(pk=ben.pk).update(cibil_score=600)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('beneficiary_score'))
+        self.assertEqual(response.context['eligibility_label'], 'Not_Eligible')
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('updated_at', updates[0])
+        self.assertNotIn('"name"', updates[0])
+        ben.refresh_from_db()
+        self.assertEqual(ben.updated_at, updated_at)
+
+    def test_score_cache_ignores_results_of_other_writers(self):
+        """
+        Tests that the score page recomputes after officer scoring or a rescore overwrote the stored result.
+        """
+        from .scoring import compute_credit_score
+        user = User.objects.create_user('asha', 'asha@example.com', 'password123')
+        ben = Beneficiary.objects.create(
+            user=user, name='Asha', cibil_score=790, estimated_monthly_income=40000,
+        )
+        self.client.login(username='asha', password='password123')
+        self.assertEqual(self.client.get(reverse('beneficiary_score')).context['credit_score'], 686)
+
+        officer = Client()
+        User.objects.create_user('officer', 'officer@example.com', 'password123', is_staff=True)
+        officer.login(username='officer', password='password123')
+        officer.post(reverse('officer_score', args=[ben.pk]))
+        ben.refresh_from_db()
+        expected = compute_credit_score(ben)
+        self.assertNotEqual(ben.risk_band, expected[1])  # the fallback card's band
+        response = self.client.get(reverse('beneficiary_score'))
+        self.assertEqual(
+            (response.context['credit_score'], response.context['risk_band'],
+             response.context['eligibility_label']),
+            expected,
+        )
+
+        # a rescore for other inputs, which then revert, must not look current
+        Beneficiary.objects.filter(pk=ben.pk).update(cibil_score=600)
+        call_command('rescore_all', stdout=io.StringIO())
+        ben.refresh_from_db()
+        self.assertEqual(ben.score_fingerprint, '')
+        Beneficiary.objects.filter(pk=ben.pk).update(cibil_score=790)
+        self.assertEqual(self.client.get(reverse('beneficiary_score')).context['credit_score'], 686)
+
+    def test_input_changes_queue_incremental_rescoring(self):
+        """
+        Tests that only scoring-input changes queue a beneficiary, and that draining rescores it.
+        """
+        from .scoring import BLOCK_INPUTS, SCORE_INPUTS, blocks_reading
+        self.assertEqual(set().union(*BLOCK_INPUTS.values()), set(SCORE_INPUTS))
+        self.assertEqual(blocks_reading(['income_est', 'name']), ['income', 'banking'])
+
+        ben = Beneficiary.objects.create(name='Asha', cibil_score=790)
+        self.assertTrue(DirtyBeneficiary.objects.filter(beneficiary=ben).exists())
+        call_command('rescore_all', '--dirty', stdout=io.StringIO())
+        self.assertFalse(DirtyBeneficiary.objects.exists())
+        ben.refresh_from_db()
+        self.assertEqual(ben.risk_band, 'Very_High_Risk')
+
+        ben.name = 'Asha K'
+        ben.save()
+        ben.case_type = 'CASE1'
+        ben.save(update_fields=['case_type'])
+        CaseDetails.objects.create(beneficiary=ben)
+        self.assertFalse(DirtyBeneficiary.objects.exists())
+
+        details = CaseDetails.objects.get(beneficiary=ben)
+        details.gas_bill = 900
+        details.save()
+        self.assertTrue(DirtyBeneficiary.objects.filter(beneficiary=ben).exists())
+        DirtyBeneficiary.objects.all().delete()
+
+        ben = Beneficiary.objects.get(pk=ben.pk)
+        ben.estimated_monthly_income = 70000
+        ben.employment_type = 'Salaried'
+        ben.work_consistency_days = 26
+        ben.save()
+        out = io.StringIO()
+        call_command('rescore_all', '--dirty', stdout=out)
+        self.assertIn('Rescored 1 queued beneficiaries, 1 changed', out.getvalue())
+        ben.refresh_from_db()
+        self.assertEqual(ben.risk_band, 'Medium_Risk')
+
+
+class ScorecardTests(TestCase):
+
+    def setUp(self):
+        from .scorecards import clear_cache
+        clear_cache()
+        self.addCleanup(clear_cache)
+
+    def test_ladders_bisect_with_mixed_edge_operators(self):
+        """
+        Tests that scalar and batch lookups agree on ">=" and ">" edges.
+        """
+        import numpy as np
+        from .scorecards import compile_ladder
+        ladder = compile_ladder({
+            'edges': [10000, 25000, 40000, 75000, {'>': 100000}],
+            'values': ['very low', 'low', 'lower medium', 'medium', 'upper medium', 'high'],
+        })
+        xs = [0, 9999.99, 10000, 74999, 75000, 100000, 100000.01]
+        expected = ['very low', 'very low', 'low', 'medium', 'upper medium', 'upper medium', 'high']
+        self.assertEqual([ladder.lookup(x) for x in xs], expected)
+        self.assertEqual(ladder.lookup_many(np.array(xs)).tolist(), expected)
+        with self.assertRaises(ValueError):
+            compile_ladder({'edges': [2, 1], 'values': [0, 1, 2]})
+
+    def test_stored_scorecard_version_replaces_builtin(self):
+        """
+        Tests that an active Scorecard row overrides the built-in rules for scalar and batch scoring.
+        """
+        import copy
+        from django.core.exceptions import ValidationError
+        from .scorecards import DEFAULT_SCORECARDS, get_scorecard
+        from .scoring import compute_credit_score, score_batch, score_fingerprint
+        ben = Beneficiary(name='Asha', cibil_score=790, estimated_monthly_income=40000)
+        self.assertEqual(compute_credit_score(ben), (686, 'High_Risk', 'Not_Eligible'))
+        old_fingerprint = score_fingerprint(ben)
+
+        definition = copy.deepcopy(DEFAULT_SCORECARDS['credit_score'])
+        definition['ladders']['cibil']['values'] = [0, 20, 40, 60, 80]
+        definition['params']['repayment_cap'] = 100
+        Scorecard.objects.create(name='credit_score', version=2, definition=definition)
+        self.assertEqual(get_scorecard('credit_score').version, 1)  # not active yet
+        Scorecard.objects.filter(version=2).update(is_active=True)
+        Scorecard.objects.get(version=2).save()  # saving drops compiled cards
+
+        self.assertEqual(get_scorecard('credit_score').version, 2)
+        self.assertEqual(compute_credit_score(ben), (770, 'Low_Risk', 'Eligible_Auto'))
+        batch = score_batch({'cibil_score': [790], 'estimated_monthly_income': [40000]})
+        self.assertEqual(batch.row(0), (770, 'Low_Risk', 'Eligible_Auto'))
+        self.assertNotEqual(score_fingerprint(ben), old_fingerprint)
+
+        definition['ladders']['cibil']['values'] = [0, 1]
+        with self.assertRaises(ValidationError):
+            Scorecard(name='credit_score', version=3, definition=definition).full_clean()
+
+    def test_activation_without_signal_picked_up_after_ttl(self):
+        """
+        Tests that a queryset update() activating a version reaches the cached cards after CACHE_TTL.
+        """
+        import copy
+        from . import scorecards
+        definition = copy.deepcopy(scorecards.DEFAULT_SCORECARDS['credit_score'])
+        definition['ladders']['cibil']['values'] = [0, 20, 40, 60, 80]
+        Scorecard.objects.create(name='credit_score', version=2, definition=definition)
+        self.assertEqual(scorecards.get_scorecard('credit_score').version, 1)
+
+        Scorecard.objects.filter(version=2).update(is_active=True)  # no signal
+        self.assertEqual(scorecards.get_scorecard('credit_score').version, 1)  # within the TTL
+        with patch.object(scorecards, 'CACHE_TTL', 0):
+            self.assertEqual(scorecards.get_scorecard('credit_score').version, 2)
+            Scorecard.objects.filter(version=2).update(is_active=False)
+            self.assertEqual(scorecards.get_scorecard('credit_score').version, 1)
+
+    def test_shadow_version_compared_in_the_same_pass(self):
+        """
+        Tests that rescore_all --shadow reports deltas, band migration and eligibility flips.
+        """
+        import copy
+        from .scorecards import DEFAULT_SCORECARDS
+        definition = copy.deepcopy(DEFAULT_SCORECARDS['credit_score'])
+        definition['ladders']['cibil']['values'] = [0, 20, 40, 60, 80]
+        definition['params']['repayment_cap'] = 100
+        Scorecard.objects.create(name='credit_score', version=2, definition=definition)
+        for cibil in (None, 610, 790, 790):
+            Beneficiary.objects.create(name='B', cibil_score=cibil, estimated_monthly_income=40000)
+
+        out = io.StringIO()
+        call_command('rescore_all', shadow=[2], compare_only=True, chunk_size=3, stdout=out)
+        run = RescoreRun.objects.get()
+        report = run.shadow_report['credit_score v2']
+        self.assertEqual((report['rows'], report['changed_scores']), (4, 3))
+        # 790: 686 -> 770; 610: 622 -> 644; no CIBIL: unchanged
+        self.assertEqual((report['delta_min'], report['delta_max'], report['delta_sum']), (0, 84, 190))
+        self.assertEqual(report['band_migration'], {
+            'High_Risk': {'Low_Risk': 2},
+            'Very_High_Risk': {'Very_High_Risk': 2},
+        })
+        self.assertEqual(report['eligibility_flips'], {'Not_Eligible -> Eligible_Auto': 2})
+        self.assertIn('credit_score v2 vs active: 4 rows, 3 scores changed', out.getvalue())
+        self.assertIn('Not_Eligible -> Eligible_Auto: 2', out.getvalue())
+        self.assertFalse(Beneficiary.objects.filter(model_score__isnull=False).exists())
+
+        with self.assertRaises(CommandError):
+            call_command('rescore_all', shadow=[9], stdout=io.StringIO())
+
+
+class ScoreLogTests(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user('officer', 'officer@example.com', 'password123', is_staff=True)
+        self.client.login(username='officer', password='password123')
+        self.ben = Beneficiary.objects.create(name='Asha', income_est=20000)
+
+    def test_writer_batches_inserts_and_shares_explanations(self):
+        """
+        Tests that buffered log entries are bulk inserted and repeated text is stored once.
+        """
+        from .score_log import ScoreLogWriter
+        other = Beneficiary.objects.create(name='Ravi')
+        writer = ScoreLogWriter(batch_size=4)
+        with self.assertNumQueries(4):  # new explanations, their ids, the log rows, the stale day
+            for i in range(4):
+                writer.add(self.ben if i % 2 else other.pk, 600 + i, 'Low Risk', 'Low Need',
+                           'Fallback scoring algorithm used.', 'officer_fallback v1')
+        with self.assertNumQueries(2):  # explanation already known; log rows and stale day
+            with writer:
+                writer.add(self.ben, 700, 'Low Risk', 'Low Need',
+                           'Fallback scoring algorithm used.', 'officer_fallback v1')
+        self.assertEqual(writer.written, 5)
+        self.assertEqual(AIScoreLog.objects.count(), 5)
+        self.assertEqual(ScoreExplanation.objects.count(), 1)
+
+        # a fresh writer finds the existing pair instead of duplicating it
+        with ScoreLogWriter() as again:
+            again.add(other, 500, 'High Risk', 'Low Need',
+                      'Fallback scoring algorithm used.', 'officer_fallback v1')
+        self.assertEqual(ScoreExplanation.objects.count(), 1)
+        self.assertEqual(AIScoreLog.objects.filter(beneficiary=other).count(), 3)
+
+    def test_single_log_reuses_committed_explanation(self):
+        """
+        Tests that log_score() skips the explanation lookup for a pair already committed in this process.
+        """
+        from .score_log import forget_explanations, log_score
+        forget_explanations()
+        self.addCleanup(forget_explanations)
+        with self.captureOnCommitCallbacks(execute=True):
+            log_score(self.ben, 600, 'Low Risk', 'Low Need', 'Manual review.', 'officer')
+        with self.assertNumQueries(2):  # the log row and the stale day
+            log_score(self.ben, 610, 'Low Risk', 'Low Need', 'Manual review.', 'officer')
+        self.assertEqual(ScoreExplanation.objects.count(), 1)
+
+        AIScoreLog.objects.all().delete()
+        ScoreExplanation.objects.get().delete()
+        with self.assertNumQueries(4):
+            log_score(self.ben, 620, 'Low Risk', 'Low Need', 'Manual review.', 'officer')
+        self.assertEqual(AIScoreLog.objects.get().score, 620)
+
+    def test_officer_score_history_trend(self):
+        """
+        Tests that officer scoring is logged and the history endpoint returns the trend oldest first.
+        """
+        from .score_log import ScoreLogWriter
+        start = timezone.now() - timedelta(days=3)
+        with ScoreLogWriter() as writer:
+            for day, score in enumerate([550, 600, 580]):
+                writer.add(self.ben, score, 'High Risk', 'High Need', 'Manual review.', 'officer',
+                           created_at=start + timedelta(days=day))
+        response = self.client.post(reverse('officer_score', args=[self.ben.pk]))
+        self.assertEqual(response.json()['score'], 600)
+
+        response = self.client.get(reverse('officer_score_history', args=[self.ben.pk]), {'limit': 3})
+        history = response.json()['history']
+        self.assertEqual([h['score'] for h in history], [600, 580, 600])
+        self.assertEqual([h['change'] for h in history], [None, -20, 20])
+        # the label the log has always used for officer scoring
+        self.assertEqual(history[-1]['model_used'], 'fallback')
+        for limit in ('0', '-1'):
+            response = self.client.get(reverse('officer_score_history', args=[self.ben.pk]), {'limit': limit})
+            self.assertEqual(response.status_code, 400)
+
+        log = self.ben.ai_logs.select_related('reason').latest('created_at')
+        self.assertEqual(log.explanation, 'Fallback scoring algorithm used.')
+        response = self.client.get(reverse('ai_explain', args=[self.ben.pk]))
+        self.assertContains(response, 'Fallback scoring algorithm used.')
+
+
+class BatchOfficerScoringTests(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.officer = User.objects.create_user('officer', 'officer@example.com', 'password123', is_staff=True)
+        self.client.login(username='officer', password='password123')
+
+    def _post(self, body):
+        import json
+        response = self.client.post(
+            reverse('officer_score_batch'), json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_district_scored_in_one_request(self):
+        """
+        Tests that a filtered batch matches single scoring and skips other districts.
+        """
+        bens = []
+        for i in range(5):
+            ben = Beneficiary.objects.create(
+                name=f'Person {i}', district='Pune' if i < 4 else 'Nashik',
+                income_est=30000 + 10000 * i, officer=self.officer,
+            )
+            for status in ['Paid'] * i + ['Pending']:
+                LoanHistory.objects.create(beneficiary=ben, amount=1000, tenure=12, repayment_status=status)
+            bens.append(ben)
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .officer_scoring import iter_fallback_scores, select_beneficiaries
+        with CaptureQueriesContext(connection) as ctx:
+            results = list(iter_fallback_scores(select_beneficiaries(district='pune'), chunk_size=2))
+        self.assertEqual([r['id'] for r in results], [b.pk for b in bens[:4]])
+        queries = [q['sql'] for q in ctx.captured_queries]
+        # per chunk of two: one loan query and one log insert, never one per beneficiary
+        self.assertEqual(sum('"api_loanhistory"' in q for q in queries), 2)
+        self.assertEqual(sum(q.startswith('INSERT INTO "api_aiscorelog"') for q in queries), 2)
+
+        data = self._post({'filter': {'district': 'Pune', 'officer': self.officer.pk}})
+        self.assertEqual((data['scored'], data['missing']), (4, []))
+        for result, ben in zip(data['results'], bens):
+            single = self.client.post(reverse('officer_score', args=[ben.pk])).json()
+            self.assertEqual({k: result[k] for k in single}, single)
+        self.assertEqual(data['results'][3]['score'], 750)
+        self.assertEqual(Beneficiary.objects.get(pk=bens[3].pk).eligibility, 'Eligible')
+        self.assertIsNone(Beneficiary.objects.get(pk=bens[4].pk).score)
+        self.assertEqual(AIScoreLog.objects.filter(beneficiary=bens[0]).count(), 3)
+
+    def test_ids_and_unscored_filter(self):
+        """
+        Tests scoring listed IDs, reporting unknown ones, and the unscored-only filter.
+        """
+        first = Beneficiary.objects.create(name='Asha')
+        second = Beneficiary.objects.create(name='Ravi', score=720)
+        data = self._post({'ids': [second.pk, first.pk, 'BEN999'], 'filter': {'unscored': True}})
+        self.assertEqual([r['id'] for r in data['results']], [first.pk])
+        self.assertEqual(data['missing'], [second.pk, 'BEN999'])
+
+        response = self.client.post(reverse('officer_score_batch'), '{}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse('officer_score_batch'), '{"filter": {"city": "x"}}', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bad_officer_filter_rejected_before_streaming(self):
+        """
+        Tests that a bad officer filter or body shape is a 400, not a 500 or a truncated streamed 200.
+        """
+        Beneficiary.objects.create(name='Asha', officer=self.officer)
+        response = self.client.post(
+            reverse('officer_score_batch'), '{"filter": {"officer": "abc"}}', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['detail'], 'officer must be a numeric user id')
+        for body in ('[1, 2]', '{"ids": [{"a": 1}]}', '{"ids": [5]}', '{"filter": {"state": ["x"]}}'):
+            response = self.client.post(reverse('officer_score_batch'), body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+        data = self._post({'filter': {'officer': str(self.officer.pk)}})
+        self.assertEqual(data['scored'], 1)
+
+
+class FeatureStoreTests(TestCase):
+
+    def test_vector_follows_source_tables(self):
+        """
+        Tests that the feature row is derived from all four sources and refreshed on their changes.
+        """
+        ben = Beneficiary.objects.create(name='Asha', estimated_monthly_income=20000, cibil_score=710)
+        vector = FeatureVector.objects.get(pk=ben.pk)
+        self.assertEqual((vector.cibil_score, vector.monthly_income, vector.loans_total), (710, 20000, 0))
+        self.assertIsNone(vector.repaid_loan_ratio)
+
+        CaseDetails.objects.create(
+            beneficiary=ben, total_emi_per_month=5000, average_bank_balance=10000,
+            electricity_bill=300, gas_bill=200,
+        )
+        for status in ('Paid', 'Paid', 'Pending'):
+            LoanHistory.objects.create(beneficiary=ben, amount=1000, tenure=12, repayment_status=status)
+        vector.refresh_from_db()
+        self.assertEqual((vector.emi_to_income_ratio, vector.liquidity_ratio), (0.25, 0.5))
+        self.assertEqual((vector.loans_total, vector.loans_paid, vector.loan_amount_total), (3, 2, 3000))
+        self.assertAlmostEqual(vector.repaid_loan_ratio, 2 / 3)
+        self.assertEqual(vector.monthly_bills, 500)  # CaseDetails bills
+
+        ConsumptionData.objects.create(beneficiary=ben, electricity_bill=400, mobile_bill=200)
+        ben.estimated_monthly_income = 40000
+        ben.save()
+        vector.refresh_from_db()
+        self.assertEqual((vector.monthly_bills, vector.bills_to_income_ratio), (600, 0.015))
+        self.assertEqual(vector.emi_to_income_ratio, 0.125)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LoanHistory.objects.filter(repayment_status='Pending').get().delete()
+        vector.refresh_from_db()
+        self.assertEqual(vector.repaid_loan_ratio, 1.0)
+
+    def test_deleting_beneficiary_with_related_rows(self):
+        """
+        Tests that a beneficiary with loans, consumption rows and case details can be deleted with its feature row.
+        """
+        from django.db import transaction
+        ben = Beneficiary.objects.create(name='Asha', estimated_monthly_income=20000)
+        CaseDetails.objects.create(beneficiary=ben, total_emi_per_month=5000)
+        LoanHistory.objects.create(beneficiary=ben, amount=1000, tenure=12, repayment_status='Paid')
+        ConsumptionData.objects.create(beneficiary=ben, electricity_bill=400, mobile_bill=200)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                ben.delete()
+        self.assertFalse(Beneficiary.objects.filter(name='Asha').exists())
+        self.assertFalse(FeatureVector.objects.exists())
+
+        # deleting a related row, then its beneficiary, in one transaction
+        ben = Beneficiary.objects.create(name='Ravi')
+        loan = LoanHistory.objects.create(beneficiary=ben, amount=1000, tenure=12)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                loan.delete()
+                ben.delete()
+        self.assertFalse(FeatureVector.objects.exists())
+
+    def test_imports_and_rebuild_fill_the_store(self):
+        """
+        Tests that import batches write feature rows and that the store scores like the source rows.
+        """
+        from .features import iter_stored_feature_chunks
+        from .importer import import_rows
+        from .scoring import compute_credit_score, score_batch
+        import_rows(iter_csv_rows(io.BytesIO(
+            b"name,cibil_score,estimated_monthly_income,loan_amount,tenure,electricity_bill\n"
+            b"Asha,790,40000,5000,12,350\n"
+            b"Ravi,640,,,,\n"
+        )))
+        self.assertEqual(FeatureVector.objects.count(), 2)
+        self.assertEqual(FeatureVector.objects.get(beneficiary__name='Asha').loans_total, 1)
+
+        FeatureVector.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_features', chunk_size=1, stdout=out)
+        self.assertIn('Rebuilt 2 feature rows', out.getvalue())
+        (ids, features), = iter_stored_feature_chunks()
+        batch = score_batch(features, size=len(ids))
+        for i, pk in enumerate(ids):
+            self.assertEqual(batch.row(i), compute_credit_score(Beneficiary.objects.get(pk=pk)))
+
+    def test_store_scores_like_live_scorer_with_case_details(self):
+        """
+        Tests that case details, which the store keeps under names of their own, do not change store scores.
+        """
+        from .features import iter_stored_feature_chunks
+        from .scoring import compute_credit_score, iter_feature_chunks, score_batch
+        ben = Beneficiary.objects.create(
+            name='Asha', cibil_score=760, estimated_monthly_income=30000,
+            employment_type='Salaried', work_consistency_days=400,
+        )
+        CaseDetails.objects.create(
+            beneficiary=ben, average_bank_balance=90000, transactions_per_month=80,
+            number_of_active_loans=4, total_emi_per_month=15000,
+        )
+        (ids, features), = iter_stored_feature_chunks()
+        self.assertEqual(ids, [ben.pk])
+        self.assertEqual(set(features), {
+            'cibil_score', 'estimated_monthly_income', 'income_est',
+            'work_consistency_days', 'employment_type',
+        })
+        stored = score_batch(features, size=1).row(0)
+        (_, live_features), = iter_feature_chunks()
+        self.assertEqual(stored, score_batch(live_features, size=1).row(0))
+        self.assertEqual(stored, compute_credit_score(Beneficiary.objects.get(pk=ben.pk)))
+
+
+class DashboardTests(TestCase):
+
+    def test_dashboard_stats_in_one_query(self):
+        """
+        Tests that the dashboard figures come from a single aggregate query with inclusive top bucket.
+        """
+        User.objects.create_user('officer', 'officer@example.com', 'password123', is_staff=True)
+        self.client.login(username='officer', password='password123')
+        for score, model_score, band, eligibility in [
+            (350, 400, 'High Risk', 'Not Eligible'),
+            (650, 700, 'Low Risk', 'Eligible'),
+            (700, 800, 'Low Risk', 'Eligible'),
+            (900, 900, 'Low Risk', 'Eligible'),
+            (None, 600, None, None),
+        ]:
+            Beneficiary.objects.create(
+                name='B', score=score, model_score=model_score, risk_band=band, eligibility=eligibility,
+            )
+
+        from .dashboard import live_stats
+        with self.assertNumQueries(2):  # the aggregate, and the pending loan application count
+            stats = live_stats()
+        self.assertEqual((stats['total'], stats['high_risk'], stats['low_risk'], stats['eligible']), (5, 1, 3, 3))
+        self.assertEqual(stats['avg_score'], 700)  # model_score of the scored rows only
+
+        response = self.client.get(reverse('officer_dashboard_stats'))
+        self.assertEqual(
+            [item['count'] for item in response.context['score_distribution']], [1, 0, 0, 1, 1, 1]
+        )
+        self.assertEqual(response.context['average_score'], 700)
+
+    def test_rollups_follow_score_changes(self):
+        """
+        Tests that rollup slices are marked stale by every kind of score write and recomputed on read.
+        """
+        from .dashboard import live_stats, portfolio_stats
+        from .models import DashboardRollup
+        from .officer_scoring import iter_fallback_scores, select_beneficiaries
+        from .scoring import score_beneficiary
+        officer = User.objects.create_user('officer', 'officer@example.com', 'password123')
+        for i in range(6):
+            Beneficiary.objects.create(
+                name=f'B{i}', state='Kerala' if i % 2 else None, district='Kochi' if i % 2 else '',
+                officer=officer if i < 3 else None, cibil_score=600 + 40 * i, income_est=20000,
+            )
+        out = io.StringIO()
+        call_command('rebuild_rollups', stdout=out)
+        self.assertIn('Rebuilt 4 rollup slices', out.getvalue())
+        self.assertFalse(DashboardRollup.objects.filter(stale=True).exists())
+
+        def check():
+            stats = portfolio_stats()
+            self.assertEqual(stats, live_stats())
+            self.assertFalse(DashboardRollup.objects.filter(stale=True).exists())
+            return stats
+
+        # queryset update() paths mark their slices
+        list(iter_fallback_scores(select_beneficiaries(state='Kerala')))
+        self.assertEqual(DashboardRollup.objects.filter(stale=True).count(), 2)
+        self.assertEqual(check()['scored'], 0)  # fallback sets score, not model_score
+        ben = Beneficiary.objects.get(name='B0')
+        score_beneficiary(ben)
+        call_command('rescore_all', stdout=io.StringIO())
+        self.assertEqual(check()['total'], 6)
+
+        # save() moving a beneficiary to another slice
+        ben.state, ben.score, ben.risk_band = 'Goa', 850, 'Low Risk'
+        ben.save()
+        self.assertEqual(portfolio_stats(state='Goa')['bucket_5'], 1)
+        self.assertEqual(check()['total'], 6)
+        self.assertEqual(DashboardRollup.objects.count(), 5)
+
+        # a slice left empty disappears
+        ben.state = None
+        ben.save()
+        check()
+        self.assertFalse(DashboardRollup.objects.filter(state='Goa').exists())
+
+    def test_region_drill_down(self):
+        """
+        Tests that the state, district and pincode drill-down is served from the rollups and follows loan applications.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .dashboard import live_stats
+        User.objects.create_user('officer', 'officer@example.com', 'password123', is_staff=True)
+        self.client.login(username='officer', password='password123')
+        regions = [
+            ('Kerala', 'Kochi', '682001', 'Eligible'),
+            ('Kerala', 'Kochi', '682001', 'Not Eligible'),
+            ('Kerala', 'Kochi', '682002', 'Eligible'),
+            ('Kerala', 'Wayanad', '673121', 'Eligible'),
+            ('Goa', 'North Goa', '403001', 'Eligible'),
+            (None, None, None, None),
+        ]
+        for i, (state, district, pincode, eligibility) in enumerate(regions):
+            Beneficiary.objects.create(
+                name=f'B{i}', state=state, district=district, pincode=pincode,
+                score=600 + 50 * i, model_score=600 + 50 * i, eligibility=eligibility,
+            )
+        first, second = Beneficiary.objects.filter(pincode='682001').order_by('name')
+        for ben, status in [(first, 'PENDING'), (second, 'PENDING'), (second, 'APPROVED')]:
+            LoanApplication.objects.create(
+                beneficiary=ben, loan_amount=10000, tenure_months=12,
+                phone='9000000000', email='b@example.com', status=status,
+            )
+        url = reverse('officer_region_stats')
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['level'], 'state')
+        by_region = {row['state']: row for row in response.json()['regions']}
+        self.assertEqual(list(by_region), [None, 'Goa', 'Kerala'])
+        self.assertEqual(by_region['Kerala']['beneficiaries'], 4)
+        self.assertEqual(by_region['Kerala']['eligibility_rate'], 0.75)
+        self.assertEqual(by_region['Kerala']['pending_applications'], 2)
+        self.assertEqual(by_region['Kerala']['average_score'], 675)
+
+        response = self.client.get(url, {'state': 'Kerala'})
+        self.assertEqual(
+            [(row['district'], row['beneficiaries']) for row in response.json()['regions']],
+            [('Kochi', 3), ('Wayanad', 1)],
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'state': 'Kerala', 'district': 'Kochi'})
+        self.assertFalse([q for q in queries.captured_queries if '"api_beneficiary"' in q['sql']])
+        pincodes = {row['pincode']: row for row in response.json()['regions']}
+        self.assertEqual(response.json()['level'], 'pincode')
+        self.assertEqual(pincodes['682001']['beneficiaries'], 2)
+        self.assertEqual(pincodes['682001']['eligibility_rate'], 0.5)
+        self.assertEqual(pincodes['682001']['pending_applications'], 2)
+
+        # deciding an application updates its slice
+        application = LoanApplication.objects.get(beneficiary=first)
+        application.status = LoanApplication.STATUS_APPROVED
+        application.save()
+        response = self.client.get(url, {'state': 'Kerala', 'district': 'Kochi'})
+        self.assertEqual(response.json()['regions'][0]['pending_applications'], 1)
+        kochi = live_stats(Beneficiary.objects.filter(district='Kochi'))
+        self.assertEqual(kochi['pending_loans'], 1)
+
+        # an empty value selects beneficiaries without a region
+        response = self.client.get(url, {'state': ''})
+        self.assertEqual(response.json()['regions'], [
+            {'district': None, 'beneficiaries': 1, 'scored': 1, 'average_score': 850.0, 'eligible': 0,
+             'eligibility_rate': 0.0, 'pending_applications': 0},
+        ])
+
+
+class TimeSeriesTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_user('officer', 'officer@example.com', 'password123', is_staff=True)
+        self.client.login(username='officer', password='password123')
+        self.url = reverse('officer_timeseries')
+
+    def at(self, day, hour=10):
+        return timezone.make_aware(timezone.datetime(2026, *day, hour))
+
+    def test_series_from_daily_summaries(self):
+        """
+        Tests that day, week and month series come from the summary rows and follow registrations, scores and decisions.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import DailySummary
+        from .score_log import ScoreLogWriter
+        first = Beneficiary.objects.create(name='A', created_at=self.at((3, 30)))
+        Beneficiary.objects.create(name='B', created_at=self.at((3, 30), 23))
+        second = Beneficiary.objects.create(name='C', created_at=self.at((4, 2)))
+        Beneficiary.objects.create(name='D', created_at=self.at((5, 10)))
+        with ScoreLogWriter() as writer:
+            for day, score in [((3, 31), 350), ((4, 1), 850), ((4, 1), 650)]:
+                writer.add(first, score, 'Band', 'Need', 'Test', 'test_model', created_at=self.at(day))
+        for status, day in [('APPROVED', (4, 3)), ('REJECTED', (4, 6)), ('PENDING', None)]:
+            application = LoanApplication.objects.create(
+                beneficiary=second, loan_amount=10000, tenure_months=12,
+                phone='9000000000', email='b@example.com',
+            )
+            if day:
+                application.status, application.decided_at = status, self.at(day)
+                application.save()
+
+        response = self.client.get(self.url, {'start': '2026-03-30', 'end': '2026-04-06'})
+        data = response.json()
+        self.assertEqual(data['periods'][0], '2026-03-30')
+        self.assertEqual(data['registrations'], [2, 0, 0, 1, 0, 0, 0, 0])
+        self.assertEqual(data['scored'], [0, 1, 2, 0, 0, 0, 0, 0])
+        self.assertEqual(data['average_score'][:3], [None, 350, 750])
+        self.assertEqual(data['score_distribution']['800-900'], [0, 0, 1, 0, 0, 0, 0, 0])
+        self.assertEqual(data['approvals'], [0, 0, 0, 0, 1, 0, 0, 0])
+        self.assertEqual(data['rejections'], [0, 0, 0, 0, 0, 0, 0, 1])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'start': '2026-03-30', 'end': '2026-04-06', 'interval': 'week'})
+        raw = ('"api_beneficiary"', '"api_aiscorelog"', '"api_loanapplication"')
+        self.assertFalse([q for q in queries.captured_queries if any(table in q['sql'] for table in raw)])
+        data = response.json()
+        self.assertEqual(data['periods'], ['2026-03-30', '2026-04-06'])
+        self.assertEqual((data['registrations'], data['scored'], data['approvals'], data['rejections']),
+                         ([3, 0], [3, 0], [1, 0], [0, 1]))
+        self.assertEqual(data['average_score'], [616.67, None])
+
+        data = self.client.get(self.url, {'start': '2026-03-01', 'end': '2026-05-31', 'interval': 'month'}).json()
+        self.assertEqual(data['periods'], ['2026-03-01', '2026-04-01', '2026-05-01'])
+        self.assertEqual(data['registrations'], [2, 1, 1])
+        self.assertEqual(data['scored'], [1, 2, 0])
+
+        # deleting a beneficiary takes its registration and score log days with it
+        Beneficiary.objects.create(name='E', created_at=self.at((3, 30)))
+        first.delete()
+        data = self.client.get(self.url, {'start': '2026-03-30', 'end': '2026-04-01'}).json()
+        self.assertEqual(data['registrations'], [2, 0, 0])
+        self.assertEqual(data['scored'], [0, 0, 0])
+        self.assertFalse(DailySummary.objects.filter(stale=True).exists())
+
+        # incremental rows match a rebuild
+        def summaries():
+            return list(DailySummary.objects.order_by('day').values_list('day', 'registrations', 'scored', 'approvals', 'rejections'))
+        incremental = summaries()
+        call_command('rebuild_summaries', stdout=io.StringIO())
+        self.assertEqual(summaries(), incremental)
+
+    def test_series_input_validation(self):
+        """
+        Tests that bad intervals and date ranges are rejected and the default range ends today.
+        """
+        self.assertEqual(self.client.get(self.url, {'interval': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start': '2026-04-02', 'end': '2026-04-01'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start': '1900-01-01', 'end': '2026-01-01'}).status_code, 400)
+        data = self.client.get(self.url, {'interval': 'week'}).json()
+        self.assertEqual(len(data['periods']), 30)
+        self.assertEqual(data['end'], timezone.localdate().isoformat())
+
+
+class OfficerListingTests(TestCase):
+
+    def setUp(self):
+        self.officer = User.objects.create_user('officer', 'officer@example.com', 'password123', is_staff=True)
+        self.client.login(username='officer', password='password123')
+        base = timezone.now() - timedelta(days=1)
+        # pairs of rows share a created_at, so pages must break ties on id
+        for i in range(7):
+            Beneficiary.objects.create(
+                name=f'B{i}', created_at=base + timedelta(minutes=i // 2),
+                state='Kerala' if i % 2 else 'Goa', officer=self.officer if i < 4 else None,
+            )
+        self.expected = list(
+            Beneficiary.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def test_keyset_pages_walk_both_ways(self):
+        """
+        Tests that keyset pages cover every row once in (created_at, id) order, forwards and back.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .listing import beneficiary_page
+        pages = []
+        page = beneficiary_page(size=3)
+        while True:
+            pages.append(page)
+            if not page['next']:
+                break
+            with CaptureQueriesContext(connection) as queries:
+                page = beneficiary_page(after=page['next'], size=3)
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn('cibil_score', queries[0]['sql'])  # only the listed columns
+        self.assertEqual([[row['id'] for row in page['rows']] for page in pages],
+                         [self.expected[0:3], self.expected[3:6], self.expected[6:]])
+        self.assertIsNone(pages[0]['previous'])
+
+        back = beneficiary_page(before=pages[2]['previous'], size=3)
+        self.assertEqual([row['id'] for row in back['rows']], self.expected[3:6])
+        back = beneficiary_page(before=back['previous'], size=3)
+        self.assertEqual([row['id'] for row in back['rows']], self.expected[0:3])
+        self.assertIsNone(back['previous'])
+        self.assertEqual(back['next'], pages[0]['next'])
+
+    def test_listing_view_filters_and_pages(self):
+        """
+        Tests that the listing view filters, carries filters into the page links and rejects bad cursors.
+        """
+        url = reverse('officer_beneficiaries')
+        response = self.client.get(url, {'state': 'Kerala', 'officer': self.officer.pk, 'size': 1})
+        ids = [row['id'] for row in response.context['beneficiaries']]
+        kerala_mine = list(
+            Beneficiary.objects.filter(state='Kerala', officer=self.officer)
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, kerala_mine[:1])
+        self.assertContains(response, f'state=Kerala&amp;officer={self.officer.pk}&amp;size=1&amp;after=')
+
+        response = self.client.get(url, {'state': 'Kerala', 'officer': self.officer.pk, 'size': 1,
+                                         'after': response.context['next_cursor']})
+        self.assertEqual([row['id'] for row in response.context['beneficiaries']], kerala_mine[1:2])
+        self.assertIsNone(response.context['next_cursor'])
+
+        self.assertEqual(self.client.get(url, {'after': 'nonsense'}).status_code, 400)
+        for cursor in ('999999999999999999999_BEN1', '-99999999999999999_BEN1'):
+            self.assertEqual(self.client.get(url, {'after': cursor}).status_code, 400)
+            self.assertEqual(self.client.get(url, {'before': cursor}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'officer': 'me'}).status_code, 400)
+        self.assertContains(self.client.get(url, {'state': 'Nowhere'}), 'No beneficiaries match')
@@ -0,0 +1,251 @@
+"""
+Time-series analytics from daily summary rows.
+
+DailySummary holds one row per calendar day: beneficiary registrations
+(by created_at), scoring events from AIScoreLog with their score
+histogram, and loan approvals and rejections (by decided_at). Every
+writer marks the days it touches stale (mark_days_stale()); a read
+recomputes the stale days, and only those, with one grouped query per
+source table over its date index, then reads summary rows alone. A
+series over any date range therefore never scans the raw tables.
+rebuild_summaries() (the `rebuild_summaries` command) recomputes them all.
+
+series() returns the figures per day, week (from Monday) or month as
+parallel lists, ready for charting.
+"""
+import datetime
+import functools
+import operator
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .dashboard import BUCKET_FIELDS, SCORE_BUCKETS, bucket_aggregates
+from .models import AIScoreLog, Beneficiary, DailySummary, LoanApplication
+
+
+COUNTS = ["registrations", "scored", "approvals", "rejections"]
+MEASURES = COUNTS + ["score_sum"] + BUCKET_FIELDS
+INTERVALS = {"day": None, "week": TruncWeek, "month": TruncMonth}
+DEFAULT_PERIODS = 30  # of the interval, when no start date is given
+MAX_PERIODS = 1000
+REFRESH_BATCH = 100  # stale days recomputed per query
+
+
+def day_of(moment):
+    """The summary day of an aware datetime, in the project time zone."""
+    return timezone.localdate(moment)
+
+
+def mark_days_stale(days):
+    """Flag the summaries of `days` (dates; None is ignored) for recomputing."""
+    days = {day for day in days if day is not None}
+    if not days:
+        return
+    now = timezone.now()
+    DailySummary.objects.bulk_create(
+        [DailySummary(day=day, stale=True, marked_at=now) for day in days],
+        update_conflicts=True,
+        unique_fields=["day"],
+        update_fields=["stale", "marked_at"],
+    )
+
+
+def mark_days_of(queryset, field="created_at"):
+    """Flag the days the `field` values of `queryset` fall on."""
+    mark_days_stale(
+        queryset.order_by().annotate(summary_day=TruncDate(field))
+        .values_list("summary_day", flat=True).distinct()
+    )
+
+
+def _day_ranges(days):
+    # consecutive days merged into [start, end) datetime ranges
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + datetime.timedelta(days=1)
+        else:
+            ranges.append([day, day + datetime.timedelta(days=1)])
+    zone = timezone.get_current_timezone()
+    return [
+        (datetime.datetime.combine(start, datetime.time.min, tzinfo=zone),
+         datetime.datetime.combine(end, datetime.time.min, tzinfo=zone))
+        for start, end in ranges
+    ]
+
+
+def _days_q(field, days):
+    return functools.reduce(operator.or_, (
+        Q(**{f"{field}__gte": start, f"{field}__lt": end}) for start, end in _day_ranges(days)
+    ))
+
+
+def _decision_aggregates():
+    return {
+        "approvals": Count("pk", filter=Q(status=LoanApplication.STATUS_APPROVED)),
+        "rejections": Count("pk", filter=Q(status=LoanApplication.STATUS_REJECTED)),
+    }
+
+
+def _score_aggregates():
+    return {"scored": Count("pk"), "score_sum": Sum("score"), **bucket_aggregates()}
+
+
+# (model, date field, aggregates) behind each group of measures
+SOURCES = [
+    (Beneficiary, "created_at", lambda: {"registrations": Count("pk")}),
+    (AIScoreLog, "created_at", _score_aggregates),
+    (LoanApplication, "decided_at", _decision_aggregates),
+]
+
+
+def _compute_days(days=None):
+    """{day: measures} for `days` (every day with activity by default)."""
+    computed = defaultdict(lambda: dict.fromkeys(MEASURES, 0))
+    for model, field, aggregates in SOURCES:
+        queryset = model.objects.filter(**{f"{field}__isnull": False})
+        if days is not None:
+            queryset = queryset.filter(_days_q(field, days))
+        rows = (
+            queryset.order_by()
+            .annotate(summary_day=TruncDate(field))
+            .values("summary_day")
+            .annotate(**aggregates())
+        )
+        for row in rows:
+            measures = computed[row.pop("summary_day")]
+            for name, value in row.items():
+                measures[name] = value or 0
+    return computed
+
+
+def _summary_rows(computed, now):
+    return [
+        DailySummary(day=day, updated_at=now, **measures) for day, measures in computed.items()
+    ]
+
+
+def refresh_stale_days(batch_size=REFRESH_BATCH):
+    """
+    Recompute the stale days, `batch_size` per grouped query. A day marked
+    again while it was being recomputed stays stale.
+    """
+    started = timezone.now()
+    days = list(DailySummary.objects.filter(stale=True).values_list("day", flat=True))
+    for start in range(0, len(days), batch_size):
+        chunk = days[start:start + batch_size]
+        computed = _compute_days(chunk)
+        with transaction.atomic():
+            if computed:
+                DailySummary.objects.bulk_create(
+                    _summary_rows(computed, timezone.now()),
+                    update_conflicts=True,
+                    unique_fields=["day"],
+                    update_fields=MEASURES + ["updated_at"],
+                )
+            settled = DailySummary.objects.filter(day__in=chunk, marked_at__lte=started)
+            emptied = [day for day in chunk if day not in computed]
+            if emptied:
+                settled.filter(day__in=emptied).delete()
+            settled.update(stale=False)
+    return len(days)
+
+
+def rebuild_summaries():
+    """Recompute every day from scratch; returns the number of days."""
+    started = timezone.now()
+    computed = _compute_days()
+    with transaction.atomic():
+        remarked = list(
+            DailySummary.objects.filter(marked_at__gt=started).values_list("day", flat=True)
+        )
+        DailySummary.objects.all().delete()
+        DailySummary.objects.bulk_create(_summary_rows(computed, timezone.now()), batch_size=1000)
+        mark_days_stale(remarked)  # changed while we were reading
+    return len(computed)
+
+
+def _fresh_summaries():
+    # stale days recomputed first; an empty table is built on first use
+    if not DailySummary.objects.exists():
+        if any(model.objects.exists() for model, _, _ in SOURCES):
+            rebuild_summaries()
+    else:
+        refresh_stale_days()
+    return DailySummary.objects.all()
+
+
+def _period_start(day, interval):
+    if interval == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(day, interval):
+    if interval == "week":
+        return day + datetime.timedelta(days=7)
+    if interval == "month":
+        return (day + datetime.timedelta(days=32)).replace(day=1)
+    return day + datetime.timedelta(days=1)
+
+
+def periods(start, end, interval="day"):
+    """The first days of the periods covering start..end (inclusive)."""
+    days = []
+    day = _period_start(start, interval)
+    while day <= end:
+        days.append(day)
+        day = _next_period(day, interval)
+    return days
+
+
+def default_start(end, interval="day"):
+    """The start of the DEFAULT_PERIODS periods ending with the one holding `end`."""
+    day = _period_start(end, interval)
+    for _ in range(DEFAULT_PERIODS - 1):
+        day = _period_start(day - datetime.timedelta(days=1), interval)
+    return day
+
+
+def series(start, end, interval="day"):
+    """
+    Registrations, scoring events (count, average score and histogram) and
+    loan decisions per `interval` period from `start` to `end` (dates,
+    inclusive), as {"periods": [first day, ...], measure: [value per
+    period], ...}. The first and last periods count only their days inside
+    the range. Raises ValueError for an unknown interval or too many periods.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+    period_days = periods(start, end, interval)
+    if len(period_days) > MAX_PERIODS:
+        raise ValueError(f"at most {MAX_PERIODS} periods per series")
+
+    trunc = INTERVALS[interval]
+    rows = (
+        _fresh_summaries().filter(day__gte=start, day__lte=end)
+        .annotate(period=trunc("day") if trunc else F("day"))
+        .values("period")
+        .annotate(**{name: Sum(name) for name in MEASURES})
+    )
+    by_period = {row["period"]: row for row in rows}
+    empty = dict.fromkeys(MEASURES, 0)
+    found = [by_period.get(day, empty) for day in period_days]
+
+    result = {"periods": [day.isoformat() for day in period_days]}
+    for name in COUNTS:
+        result[name] = [row[name] or 0 for row in found]
+    result["average_score"] = [
+        round(row["score_sum"] / row["scored"], 2) if row["scored"] else None for row in found
+    ]
+    result["score_distribution"] = {
+        f"{low}-{high}": [row[name] or 0 for row in found]
+        for (low, high), name in zip(SCORE_BUCKETS, BUCKET_FIELDS)
+    }
+    return result
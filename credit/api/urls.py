@@ -14,11 +14,17 @@ urlpatterns = [
 
     # officer endpoints
     path("officer/upload/", views.officer_upload, name="officer_upload"),
+    path("officer/import-jobs/<int:job_id>/progress/", views.officer_import_progress, name="officer_import_progress"),
+    path("officer/import-jobs/<int:job_id>/errors.csv", views.officer_import_errors, name="officer_import_errors"),
     path("officer/beneficiaries/", views.officer_beneficiaries, name="officer_beneficiaries"),
     path("officer/beneficiary/<str:beneficiary_id>/", views.officer_beneficiary_details, name="officer_beneficiary_details"),
     path("officer/beneficiary/<str:beneficiary_id>/documents/", views.officer_beneficiary_documents, name="officer_beneficiary_documents"),
+    path("officer/score/batch/", views.officer_score_batch, name="officer_score_batch"),
     path("officer/score/<str:beneficiary_id>/", views.officer_score, name="officer_score"),
+    path("officer/score/<str:beneficiary_id>/history/", views.officer_score_history, name="officer_score_history"),
     path("officer/dashboard-stats/", views.officer_dashboard_stats, name="officer_dashboard_stats"),
+    path("officer/analytics/regions/", views.officer_region_stats, name="officer_region_stats"),
+    path("officer/analytics/timeseries/", views.officer_timeseries, name="officer_timeseries"),
     path("officer/ai-explain/<str:beneficiary_id>/", views.get_ai_explanation, name="ai_explain"),
 
     # beneficiary endpoints
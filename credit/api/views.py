@@ -1,14 +1,15 @@
-import csv
-import io
+import json
 import logging
 import requests
+from datetime import date
 from api.forms import (
      BeneficiaryRegisterForm, BeneficiaryDocumentForm, BeneficiaryEditForm,CaseDetailsForm
 )
 from django.shortcuts import render, redirect, get_object_or_404
 from twilio.rest import Client
 from django.conf import settings
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+from django.urls import reverse
 from django.core.mail import send_mail
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
@@ -16,10 +17,22 @@ from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
 from .models import (
-    Beneficiary, LoanHistory, ConsumptionData, AIScoreLog, Profile,
-    BeneficiaryDocument, LoanApplication,CaseDetails
+    Beneficiary, LoanHistory, Profile,
+    BeneficiaryDocument, LoanApplication,CaseDetails, ImportJob
 )
+from .dashboard import portfolio_stats, region_stats, score_distribution
+from .importer import iter_error_csv
+from .listing import DEFAULT_PAGE_SIZE, FILTERS, MAX_PAGE_SIZE, beneficiary_page, listing_filters
+from .officer_scoring import (
+    EXPLANATION as FALLBACK_EXPLANATION, MODEL_USED as FALLBACK_MODEL, fallback_score,
+    iter_fallback_scores, paid_loan_counts, select_beneficiaries,
+)
+from .score_log import DEFAULT_HISTORY_LIMIT, log_score, score_history
+from .scorecards import get_scorecard, income_category_for
+from .scoring import score_beneficiary
+from .timeseries import default_start, series
 from django.contrib.auth.models import User
+from django.db.models import Q
 from django.utils import timezone
 
 
@@ -92,16 +105,7 @@ def auto_compute_income_from_details(ben):
         personal_est = 0.0
 
     # 4. Map bills → income band (simple heuristic)
-    if total_bills <= 0:
-        income_from_bills = 0
-    elif total_bills <= 1000:
-        income_from_bills = 6000
-    elif total_bills <= 2000:
-        income_from_bills = 10000
-    elif total_bills <= 4000:
-        income_from_bills = 16000
-    else:
-        income_from_bills = 25000
+    income_from_bills = get_scorecard("income").lookup("bills_to_income", total_bills)
 
     # final income_est = max(personal_est, bill-based)
     final_income = max(personal_est, income_from_bills) if (personal_est or income_from_bills) else None
@@ -109,20 +113,7 @@ def auto_compute_income_from_details(ben):
 
     # 5. Recompute income_category from income_est
     base = float(final_income or 0)
-    if base == 0:
-        ben.income_category = None
-    elif base < 10000:
-        ben.income_category = "very low"
-    elif base < 25000:
-        ben.income_category = "low"
-    elif base < 40000:
-        ben.income_category = "lower medium"
-    elif base < 75000:
-        ben.income_category = "medium"
-    elif base <= 100000:
-        ben.income_category = "upper medium"
-    else:
-        ben.income_category = "high"
+    ben.income_category = income_category_for(base) if base else None
 
     # 6. Reset scoring fields: ML model will later update these
     ben.score = None
@@ -356,102 +347,89 @@ def officer_upload(request):
 
     message = None
     error = None
+    job = None
 
     if request.method == "POST":
         uploaded_file = request.FILES.get("file")
+        upsert_key = request.POST.get("upsert_key", "")
         if not uploaded_file:
-            error = "CSV file required."
+            error = "CSV, XLSX or Parquet file required."
+        elif upsert_key and upsert_key not in dict(ImportJob.UPSERT_KEY_CHOICES):
+            error = "Unknown upsert key."
         else:
-            try:
-                content = uploaded_file.read().decode("utf-8")
-                reader = csv.DictReader(io.StringIO(content))
-                added = 0
-                for row in reader:
-                    def _p_bool(val):
-                        if val is None:
-                            return False
-                        v = str(val).strip().lower()
-                        return v in ("1", "true", "yes", "y")
-
-                    ben = Beneficiary.objects.create(
-                        name=row.get("name") or "",
-                        age=int(row["age"]) if row.get("age") else None,
-                        location=row.get("location") or "",
-                        state=row.get("state") or None,
-                        district=row.get("district") or None,
-                        pincode=row.get("pincode") or None,
-                        phone=row.get("phone") or None,
-                        income_est=float(row["income_est"]) if row.get("income_est") else None,
-                        estimated_monthly_income=float(row["estimated_monthly_income"]) if row.get("estimated_monthly_income") else None,
-                        consent_given=_p_bool(row.get("consent_given")),
-                        aadhaar_verified=_p_bool(row.get("aadhaar_verified")),
-                        pan_available=_p_bool(row.get("pan_available")),
-                        bank_account_active=_p_bool(row.get("bank_account_active")),
-                        employment_type=row.get("employment_type") or None,
-                        officer=request.user,
-                        created_at=timezone.now()
-                    )
-                    # compute income_category for uploaded record using the higher of the two fields
-                    try:
-                        v1 = float(ben.income_est) if ben.income_est is not None else 0.0
-                    except Exception:
-                        v1 = 0.0
-                    try:
-                        v2 = float(ben.estimated_monthly_income) if ben.estimated_monthly_income is not None else 0.0
-                    except Exception:
-                        v2 = 0.0
-                    base = max(v1, v2)
-                    if base < 10000:
-                        ben.income_category = "very low"
-                    elif base < 25000:
-                        ben.income_category = "low"
-                    elif base < 40000:
-                        ben.income_category = "lower medium"
-                    elif base < 75000:
-                        ben.income_category = "medium"
-                    elif base <= 100000:
-                        ben.income_category = "upper medium"
-                    else:
-                        ben.income_category = "high"
-                    ben.save()
-                    # loan
-                    if row.get("loan_amount"):
-                        LoanHistory.objects.create(
-                            beneficiary=ben,
-                            amount=float(row.get("loan_amount", 0)),
-                            tenure=int(row.get("tenure", 12)),
-                            repayment_status=row.get("repayment_status", "Pending"),
-                            created_at=timezone.now()
-                        )
-                    # consumption
-                    if row.get("electricity_bill") or row.get("mobile_bill"):
-                        ConsumptionData.objects.create(
-                            beneficiary=ben,
-                            electricity_bill=float(row["electricity_bill"]) if row.get("electricity_bill") else None,
-                            mobile_bill=float(row["mobile_bill"]) if row.get("mobile_bill") else None,
-                            other_bills=float(row["other_bills"]) if row.get("other_bills") else None,
-                            created_at=timezone.now()
-                        )
-                    added += 1
-                message = f"Successfully uploaded {added} beneficiaries"
-            except Exception as e:
-                logger.exception("Upload error")
-                error = str(e)
+            # the import itself runs in the `process_imports` worker;
+            # the page polls officer_import_progress for status
+            job = ImportJob.objects.create(
+                officer=request.user, file=uploaded_file, upsert_key=upsert_key
+            )
+            message = f"Upload received. Import job #{job.pk} has been queued."
 
     return render(request, "officer_upload.html", {
         "message": message,
-        "error": error
+        "error": error,
+        "job": job,
+        "upsert_key_choices": ImportJob.UPSERT_KEY_CHOICES,
     })
 
 
+@login_required
+@require_http_methods(["GET"])
+def officer_import_progress(request, job_id):
+    if not is_officer(request.user):
+        return HttpResponseForbidden("Officer access required")
+    job = get_object_or_404(ImportJob, pk=job_id)
+    return JsonResponse({
+        "id": job.pk,
+        "status": job.status,
+        "rows_done": job.rows_done,
+        "rows_inserted": job.rows_inserted,
+        "rows_updated": job.rows_updated,
+        "rows_failed": job.rows_failed,
+        "rows_per_second": round(job.rows_per_second, 1),
+        "error": job.error,
+        "errors_url": reverse("officer_import_errors", args=[job.pk]) if job.rows_failed else None,
+        "finished_at": job.finished_at,
+    })
+
+
+@login_required
+@require_http_methods(["GET"])
+def officer_import_errors(request, job_id):
+    """Download the rows an import job rejected, with line number and reason."""
+    if not is_officer(request.user):
+        return HttpResponseForbidden("Officer access required")
+    job = get_object_or_404(ImportJob, pk=job_id)
+    response = StreamingHttpResponse(iter_error_csv(job), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="import_{job.pk}_errors.csv"'
+    return response
+
+
 @login_required
 @require_http_methods(["GET"])
 def officer_beneficiaries(request):
     if not is_officer(request.user):
         return HttpResponseForbidden("Officer access required")
-    qs = Beneficiary.objects.all().order_by("-created_at")[:1000]
+    try:
+        filters = listing_filters(request.GET)
+        size = min(max(int(request.GET.get("size", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        page = beneficiary_page(
+            filters, after=request.GET.get("after"), before=request.GET.get("before"), size=size,
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    # the filters (and page size) carried over to the next/previous links
+    query = request.GET.copy()
+    for key in ("after", "before"):
+        query.pop(key, None)
     return render(request, "officer_beneficiaries.html", {
-        "beneficiaries": qs
+        "beneficiaries": page["rows"],
+        "next_cursor": page["next"],
+        "previous_cursor": page["previous"],
+        "query": query.urlencode(),
+        "filters": {name: request.GET.get(name, "") for name in FILTERS},
+        "case_types": Beneficiary.CASE_TYPE_CHOICES,
+        "officers": User.objects.filter(Q(is_staff=True) | Q(profile__role="officer"))
+        .order_by("username").values_list("id", "username").distinct(),
     })
 
 
@@ -462,17 +440,11 @@ def officer_score(request, beneficiary_id):
         return HttpResponseForbidden("Officer access required")
     ben = get_object_or_404(Beneficiary, pk=beneficiary_id)
 
-    loans = list(ben.loans.all())
-    consumption = ben.consumption_records.last()
-
     # Fallback scoring logic (same as earlier)
     try:
-        score = 600
-        paid_loans = sum(1 for loan in loans if loan.repayment_status == "Paid")
-        score += paid_loans * 50
-        risk_band = "Low Risk" if score > 650 else "High Risk"
-        need_band = "High Need" if (ben.income_est or 0) < 50000 else "Low Need"
-        eligibility = "Eligible" if score > 600 else "Not Eligible"
+        card = get_scorecard("officer_fallback")
+        paid_loans = paid_loan_counts([ben.pk]).get(ben.pk, 0)
+        score, risk_band, need_band, eligibility = fallback_score(card, paid_loans, ben.income_est)
 
         ben.score = score
         ben.risk_band = risk_band
@@ -480,15 +452,7 @@ def officer_score(request, beneficiary_id):
         ben.eligibility = eligibility
         ben.save()
 
-        AIScoreLog.objects.create(
-            beneficiary=ben,
-            score=score,
-            risk_band=risk_band,
-            need_band=need_band,
-            explanation="Fallback scoring algorithm used.",
-            model_used="fallback",
-            created_at=timezone.now()
-        )
+        log_score(ben, score, risk_band, need_band, FALLBACK_EXPLANATION, FALLBACK_MODEL)
 
         return JsonResponse({"score": score, "risk_band": risk_band, "need_band": need_band, "eligibility": eligibility})
     except Exception as e:
@@ -496,45 +460,143 @@ def officer_score(request, beneficiary_id):
         return JsonResponse({"detail": str(e)}, status=500)
 
 
+def _stream_batch_scores(results, missing):
+    # one JSON document, written out as the chunks are scored
+    yield '{"results": ['
+    scored = 0
+    for result in results:
+        yield ("," if scored else "") + json.dumps(result)
+        scored += 1
+    yield '], "scored": %d, "missing": %s}' % (scored, json.dumps(missing))
+
+
+@login_required
+@require_http_methods(["POST"])
+def officer_score_batch(request):
+    """
+    Score many beneficiaries in one request. The JSON body holds "ids"
+    (a list of beneficiary IDs) and/or "filter" ({"state", "district",
+    "officer", "unscored"}); per-ID results are streamed back as JSON.
+    """
+    if not is_officer(request.user):
+        return HttpResponseForbidden("Officer access required")
+    try:
+        body = json.loads(request.body.decode("utf-8") or "{}")
+        if not isinstance(body, dict):
+            raise ValueError("The body must be a JSON object")
+        ids = body.get("ids")
+        filters = body.get("filter") or {}
+        if ids is not None and not (
+            isinstance(ids, list) and all(isinstance(pk, str) for pk in ids)
+        ):
+            raise ValueError("ids must be a list of beneficiary IDs")
+        if not isinstance(filters, dict) or set(filters) - {"state", "district", "officer", "unscored"}:
+            raise ValueError("filter takes state, district, officer and unscored")
+        if any(isinstance(value, (list, dict)) for value in filters.values()):
+            raise ValueError("filter values must be single values")
+        if "officer" in filters:
+            # checked here: once streaming starts an error can no longer be a 400
+            officer = str(filters["officer"] if filters["officer"] is not None else "").strip()
+            if officer and not officer.isdigit():
+                raise ValueError("officer must be a numeric user id")
+            filters["officer"] = int(officer) if officer else None
+    except ValueError as e:  # includes malformed JSON
+        return JsonResponse({"detail": str(e)}, status=400)
+    if ids is None and not any(filters.values()):
+        return JsonResponse({"detail": "Give ids or at least one filter."}, status=400)
+
+    queryset = select_beneficiaries(ids=ids, **filters)
+    missing = []
+    if ids is not None:
+        found = set(queryset.filter(pk__in=ids).values_list("pk", flat=True))
+        missing = [pk for pk in ids if pk not in found]
+    return StreamingHttpResponse(
+        _stream_batch_scores(iter_fallback_scores(queryset), missing),
+        content_type="application/json",
+    )
+
+
 @login_required
 @require_http_methods(["GET"])
 def officer_dashboard_stats(request):
     if not is_officer(request.user):
         return HttpResponseForbidden("Officer access required")
-    all_b = Beneficiary.objects.all()
-    total = all_b.count()
-    scored = [b for b in all_b if b.score is not None]
-    avg_score = sum(b.model_score for b in scored) / len(scored) if scored else 0
-    high_risk = all_b.filter(risk_band="High Risk").count()
-    low_risk = all_b.filter(risk_band="Low Risk").count()
-    eligible = all_b.filter(eligibility="Eligible").count()
-
-    ranges = [
-        {"range": "300-400", "count": len([b for b in scored if 300 <= b.score < 400])},
-        {"range": "400-500", "count": len([b for b in scored if 400 <= b.score < 500])},
-        {"range": "500-600", "count": len([b for b in scored if 500 <= b.score < 600])},
-        {"range": "600-700", "count": len([b for b in scored if 600 <= b.score < 700])},
-        {"range": "700-800", "count": len([b for b in scored if 700 <= b.score < 800])},
-        {"range": "800-900", "count": len([b for b in scored if 800 <= b.score <= 900])},
-    ]
-
+    stats = portfolio_stats()  # pre-aggregated rollup rows
     return render(request, "officer_dashboard.html", {
-        "total_beneficiaries": total,
-        "average_score": round(avg_score, 2),
-        "high_risk_count": high_risk,
-        "low_risk_count": low_risk,
-        "eligible_count": eligible,
-        "score_distribution": ranges,
+        "total_beneficiaries": stats["total"],
+        "average_score": round(stats["avg_score"] or 0, 2),
+        "high_risk_count": stats["high_risk"],
+        "low_risk_count": stats["low_risk"],
+        "eligible_count": stats["eligible"],
+        "score_distribution": score_distribution(stats),
     })
 
 
+def _region_row(stats, name):
+    return {
+        name: stats["region"] or None,
+        "beneficiaries": stats["total"],
+        "scored": stats["scored"],
+        "average_score": round(stats["avg_score"], 2) if stats["avg_score"] is not None else None,
+        "eligible": stats["eligible"],
+        "eligibility_rate": round(stats["eligibility_rate"], 4) if stats["eligibility_rate"] is not None else None,
+        "pending_applications": stats["pending_loans"],
+    }
+
+
+@login_required
+@require_http_methods(["GET"])
+def officer_region_stats(request):
+    """
+    Geographic drill-down from the dashboard rollups: per state, per
+    district of ?state=, per pincode of ?state= and ?district=. An empty
+    value selects beneficiaries without that region.
+    """
+    if not is_officer(request.user):
+        return HttpResponseForbidden("Officer access required")
+    state = request.GET.get("state")
+    district = request.GET.get("district") if state is not None else None
+    level, rows = region_stats(state=state, district=district)
+    return JsonResponse({
+        "level": level,
+        "state": state,
+        "district": district,
+        "regions": [_region_row(row, level) for row in rows],
+    })
+
+
+@login_required
+@require_http_methods(["GET"])
+def officer_timeseries(request):
+    """
+    Registrations, scoring events and loan decisions per ?interval= (day,
+    week or month) between ?start= and ?end= (YYYY-MM-DD, inclusive), from
+    the daily summaries. Defaults to the last 30 periods up to today.
+    """
+    if not is_officer(request.user):
+        return HttpResponseForbidden("Officer access required")
+    interval = request.GET.get("interval", "day")
+    try:
+        end = date.fromisoformat(request.GET["end"]) if request.GET.get("end") else timezone.localdate()
+        start = (
+            date.fromisoformat(request.GET["start"]) if request.GET.get("start")
+            else default_start(end, interval)
+        )
+        if start > end:
+            raise ValueError("start is after end")
+        data = series(start, end, interval)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    return JsonResponse({"interval": interval, "start": start.isoformat(), "end": end.isoformat(), **data})
+
+
 @login_required
 @require_http_methods(["GET"])
 def get_ai_explanation(request, beneficiary_id):
     if not is_officer(request.user):
         return HttpResponseForbidden("Officer access required")
     ben = get_object_or_404(Beneficiary, pk=beneficiary_id)
-    log = ben.ai_logs.all().order_by("-created_at").first()
+    log = ben.ai_logs.select_related("reason").order_by("-created_at").first()
     
     return render(request, "officer_ai_explanation.html", {
         "beneficiary": ben,
@@ -542,6 +604,23 @@ def get_ai_explanation(request, beneficiary_id):
     })
 
 
+@login_required
+@require_http_methods(["GET"])
+def officer_score_history(request, beneficiary_id):
+    """Score trend of one beneficiary from the score log, oldest first."""
+    if not is_officer(request.user):
+        return HttpResponseForbidden("Officer access required")
+    ben = get_object_or_404(Beneficiary.objects.only("pk"), pk=beneficiary_id)
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_HISTORY_LIMIT))
+    except ValueError:
+        return JsonResponse({"detail": "limit must be a number"}, status=400)
+    if limit < 1:
+        return JsonResponse({"detail": "limit must be at least 1"}, status=400)
+    limit = min(limit, 500)
+    return JsonResponse({"beneficiary_id": ben.pk, "history": score_history(ben.pk, limit=limit)})
+
+
 @login_required
 @require_http_methods(["GET"])
 def officer_beneficiary_documents(request, beneficiary_id):
@@ -568,7 +647,7 @@ def officer_beneficiary_details(request, beneficiary_id):
     ben = get_object_or_404(Beneficiary, pk=beneficiary_id)
     docs = BeneficiaryDocument.objects.filter(beneficiary=ben)
     loans = ben.loans.all()
-    log = ben.ai_logs.all().order_by("-created_at").first()
+    log = ben.ai_logs.select_related("reason").order_by("-created_at").first()
 
     
     try:
@@ -693,23 +772,18 @@ def beneficiary_calculate(request):
     electricity_bill = float(body.get("electricity_bill", 0))
     mobile_bill = float(body.get("mobile_bill", 0))
 
-    base_score = 600
-    if loan_amount > 100000:
-        base_score -= 20
-    if tenure >= 24:
-        base_score += 30
-    elif tenure >= 12:
-        base_score += 15
-    total_bills = electricity_bill + mobile_bill
-    if total_bills > 5000:
-        base_score += 40
-    elif total_bills > 2000:
-        base_score += 20
-    score = min(900, max(300, base_score))
+    card = get_scorecard("loan_estimate")
+    base_score = (
+        card.params["base_score"]
+        - card.lookup("loan_amount_penalty", loan_amount)
+        + card.lookup("tenure", tenure)
+        + card.lookup("bills", electricity_bill + mobile_bill)
+    )
+    score = min(card.params["max_score"], max(card.params["min_score"], base_score))
     return JsonResponse({
         "estimated_score": score,
-        "risk_band": "Low Risk" if score > 650 else "High Risk",
-        "need_band": "High Need" if loan_amount > 50000 else "Low Need",
+        "risk_band": card.lookup("risk_band", score),
+        "need_band": card.lookup("need_band", loan_amount),
         "message": "This is an estimated score. Actual score may vary based on complete profile analysis."
     })
 
@@ -765,18 +839,7 @@ def beneficiary_edit(request):
             except Exception:
                 v2 = 0.0
             base = max(v1, v2)
-            if base < 10000:
-                ben.income_category = "very low"
-            elif base < 25000:
-                ben.income_category = "low"
-            elif base < 40000:
-                ben.income_category = "lower medium"
-            elif base < 75000:
-                ben.income_category = "medium"
-            elif base <= 100000:
-                ben.income_category = "upper medium"
-            else:
-                ben.income_category = "high"
+            ben.income_category = income_category_for(base)
 
             ben.employment_type = form.cleaned_data.get("employment_type")
             ben.work_consistency_days = form.cleaned_data.get("work_consistency_days")
@@ -1031,27 +1094,15 @@ def case1_input(request):
     uti = ele + mob + gas
 
     # 2. Scoring
-    ele_score = 5 if ele <= 300 else 15 if ele <= 600 else 30
-    mob_score = 5 if mob <= 100 else 15 if mob <= 200 else 25
-    uti_score = 3 if uti <= 200 else 7 if uti <= 500 else 10
+    card = get_scorecard("case1_income")
+    ele_score = card.lookup("electricity", ele)
+    mob_score = card.lookup("mobile", mob)
+    uti_score = card.lookup("utilities", uti)
     total_score = ele_score + mob_score + uti_score
 
     # 3. Score → income band up to 1,00,000
-    if total_score <= 20:
-        income_band = "< 10,000"
-        income_val = 8000
-    elif total_score <= 40:
-        income_band = "10,000 – 25,000"
-        income_val = 18000
-    elif total_score <= 60:
-        income_band = "25,000 – 40,000"
-        income_val = 32000
-    elif total_score <= 80:
-        income_band = "40,000 – 75,000"
-        income_val = 55000
-    else:
-        income_band = "75,000 – 1,00,000"
-        income_val = 90000
+    income_band = card.lookup("income_band", total_score)
+    income_val = card.lookup("income_value", total_score)
 
     # 4. Combine with personal estimated income
     personal_est = float(ben.estimated_monthly_income or 0)
@@ -1062,30 +1113,10 @@ def case1_input(request):
     ben.income_est = final_income
 
     base = float(final_income or 0)
-    if base == 0:
-        ben.income_category = None
-    elif base < 10000:
-        ben.income_category = "very low"
-    elif base < 25000:
-        ben.income_category = "low"
-    elif base < 40000:
-        ben.income_category = "lower medium"
-    elif base < 75000:
-        ben.income_category = "medium"
-    elif base <= 100000:
-        ben.income_category = "upper medium"
-    else:
-        ben.income_category = "high"
-
-    if total_score <= 20:
-        ben.risk_band = "Low"
-        ben.need_band = "High"
-    elif total_score <= 40:
-        ben.risk_band = "Medium"
-        ben.need_band = "Medium"
-    else:
-        ben.risk_band = "High"
-        ben.need_band = "High"
+    ben.income_category = income_category_for(base) if base else None
+
+    ben.risk_band = card.lookup("risk_band", total_score)
+    ben.need_band = card.lookup("need_band", total_score)
 
     ben.eligibility = True
     ben.save()
@@ -1325,7 +1356,7 @@ def income_scoring(request):
 
     ben = get_object_or_404(Beneficiary, user=request.user)
 
-    score, band, label = compute_credit_score_for_beneficiary(ben)
+    score, band, label = score_beneficiary(ben)
 
     # You can either redirect to profile or render a result page.
     return render(
@@ -1340,204 +1371,12 @@ def income_scoring(request):
     )
 
 
-def compute_credit_score_for_beneficiary(ben):
-    """
-    Simple rule-based credit score: 300–900.
-    Uses whatever fields are available on the Beneficiary safely.
-    """
-
-    # --- Safely read attributes (0 if missing) ---
-    ontime = getattr(ben, "on_time_payment_ratio_12m", None) or 0
-    max_dpd = getattr(ben, "max_dpd", None) or 0
-    missed = getattr(ben, "missed_emi_count_12m", None) or 0
-    default_flag = bool(getattr(ben, "default_flag", False))
-    cibil = getattr(ben, "cibil_score", None)
-    dti = getattr(ben, "debt_to_income_ratio", None) or 0
-    active_loans = getattr(ben, "number_of_active_loans", None) or 0
-    income = getattr(ben, "estimated_monthly_income", None) or getattr(ben, "income_est", None) or 0
-    avg_balance = getattr(ben, "average_bank_balance", None) or 0
-    util_ratio = getattr(ben, "utility_bills_ontime_ratio", None) or 0
-    digital_freq = getattr(ben, "digital_payments_frequency", None) or 0
-    transactions = getattr(ben, "transactions_count", None) or 0
-    fraud = bool(getattr(ben, "fraud_flag", False))
-    hard6 = getattr(ben, "hard_inquiries_last_6_months", None) or 0
-    emp_type = (getattr(ben, "employment_type", None) or "").lower()
-    work_days = getattr(ben, "work_consistency_days", None) or 0
-    years_business = getattr(ben, "years_in_business", None) or 0
-    seasonal = bool(getattr(ben, "seasonal_business_flag", False))
-
-    # ---------- 1. Repayment + CIBIL (0–100) ----------
-    if default_flag:
-        repay_score = 0
-    else:
-        if ontime >= 0.95:
-            repay_score = 40
-        elif ontime >= 0.80:
-            repay_score = 25
-        else:
-            repay_score = 10
-
-        if max_dpd > 90:
-            repay_score -= 25
-        elif max_dpd > 30:
-            repay_score -= 15
-        elif max_dpd > 0:
-            repay_score -= 5
-
-        if missed >= 3:
-            repay_score -= 10
-
-        repay_score = max(0, min(60, repay_score))
-
-    cibil_part = 0
-    if cibil is not None:
-        if cibil >= 780:
-            cibil_part = 40
-        elif cibil >= 720:
-            cibil_part = 30
-        elif cibil >= 650:
-            cibil_part = 20
-        elif cibil >= 600:
-            cibil_part = 10
-        else:
-            cibil_part = 0
-
-    block_repayment = max(0, min(100, repay_score + cibil_part))
-
-    # ---------- 2. Debt burden (0–100) ----------
-    block_debt = 100
-    if dti > 0.60:
-        block_debt -= 50
-    elif dti > 0.40:
-        block_debt -= 30
-    elif dti > 0.25:
-        block_debt -= 15
-
-    if active_loans > 5:
-        block_debt -= 30
-    elif active_loans > 3:
-        block_debt -= 20
-    elif active_loans > 1:
-        block_debt -= 10
-
-    block_debt = max(0, min(100, block_debt))
-
-    # ---------- 3. Income & stability (0–100) ----------
-    if income < 8000:
-        inc_score = 10
-    elif income < 15000:
-        inc_score = 25
-    elif income < 30000:
-        inc_score = 40
-    elif income < 60000:
-        inc_score = 50
-    else:
-        inc_score = 60
-
-    if emp_type in ("salaried", "government") and work_days >= 25:
-        stab_score = 40
-    elif emp_type in ("self-employed", "business") and years_business >= 3:
-        stab_score = 30
-    elif seasonal or work_days < 20:
-        stab_score = 15
-    else:
-        stab_score = 20
-
-    block_income = max(0, min(100, inc_score + stab_score))
-
-    # ---------- 4. Banking & cashflow (0–100) ----------
-    denom = float(income or 1.0)
-    liquidity_ratio = avg_balance / denom
-
-    if liquidity_ratio >= 1.0:
-        liq_score = 40
-    elif liquidity_ratio >= 0.5:
-        liq_score = 30
-    elif liquidity_ratio >= 0.2:
-        liq_score = 20
-    else:
-        liq_score = 10
-
-    if util_ratio >= 0.9:
-        util_score = 40
-    elif util_ratio >= 0.7:
-        util_score = 25
-    else:
-        util_score = 10
-
-    if digital_freq >= 15 and transactions >= 20:
-        digi_score = 20
-    elif digital_freq >= 5:
-        digi_score = 10
-    else:
-        digi_score = 5
-
-    block_bank = max(0, min(100, liq_score + util_score + digi_score))
-
-    # ---------- 5. Flags & inquiries (0–100) ----------
-    block_flags = 100
-    if fraud:
-        block_flags = 0
-    else:
-        if hard6 > 4:
-            block_flags -= 40
-        elif hard6 > 1:
-            block_flags -= 20
-
-    block_flags = max(0, min(100, block_flags))
-
-    # ---------- 6. Weighted overall 0–100 ----------
-    overall_0_100 = (
-        0.35 * block_repayment +
-        0.20 * block_debt +
-        0.20 * block_income +
-        0.15 * block_bank +
-        0.10 * block_flags
-    )
-
-    credit_score = 300 + (overall_0_100 / 100.0) * 600
-    credit_score = int(round(credit_score))
-
-    # ---------- 7. Risk band ----------
-    if credit_score >= 800:
-        risk_band = "Very_Low_Risk"
-    elif credit_score >= 750:
-        risk_band = "Low_Risk"
-    elif credit_score >= 700:
-        risk_band = "Medium_Risk"
-    elif credit_score >= 650:
-        risk_band = "High_Risk"
-    else:
-        risk_band = "Very_High_Risk"
-
-    # ---------- 8. Eligibility label ----------
-    if risk_band in ("Very_Low_Risk", "Low_Risk"):
-        eligibility_label = "Eligible_Auto"
-    elif risk_band == "Medium_Risk":
-        eligibility_label = "Eligible_Manual"
-    else:
-        eligibility_label = "Not_Eligible"
-
-    # Save to model (fields you already have like model_score, risk_band, eligibility_label)
-    if hasattr(ben, "model_score"):
-        ben.model_score = credit_score
-    if hasattr(ben, "risk_band"):
-        ben.risk_band = risk_band
-    if hasattr(ben, "eligibility_label"):
-        ben.eligibility_label = eligibility_label
-
-    ben.save()
-
-    return credit_score, risk_band, eligibility_label
-
-
-
 @login_required
 def beneficiary_score(request):
     
     ben = get_object_or_404(Beneficiary, user=request.user)
 
-    score, risk_band, eligibility_label = compute_credit_score_for_beneficiary(ben)
+    score, risk_band, eligibility_label = score_beneficiary(ben)
 
     return render(
         request,